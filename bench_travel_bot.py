@@ -0,0 +1,707 @@
+"""Micro-benchmarks for the travel bot engine.
+
+Usage: python bench_travel_bot.py [benchmark ...] [--json out.json] [--baseline old.json --threshold 0.25]
+Without arguments every benchmark is run. Benchmarks that record latency
+samples (see record()) are saved with --json and compared with --baseline;
+the run fails if any of them got slower than the threshold allows.
+"""
+import argparse
+import asyncio
+import copy
+import gc
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+
+from travel_engine import (COUNTRY_ALIASES, COUNTRY_ATTRACTIONS, COUNTRY_INFO, DAILY_COSTS, DESTINATIONS, PACKING_LISTS,
+                           INTENT_KEYWORDS, LANGUAGES, VISA_GROUPS, CountryMatcher, KnowledgeBase, Lexicon, RuleBasedChatbot, TravelEngine, edit_distance, extract_entities, get_knowledge_base)
+
+BENCHMARKS = {}
+RESULTS = {}  # name -> latency stats of the benchmarks run, see record()
+
+# Budget for a cold `import travel_engine` in a fresh interpreter.
+IMPORT_BUDGET_MS = 150
+
+
+def benchmark(func):
+    BENCHMARKS[func.__name__[len("bench_"):]] = func
+    return func
+
+
+def per_call_us(func, *args, number=2000):
+    """Best-of-five average time of one call, in microseconds."""
+    timer = timeit.Timer(lambda: func(*args))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e6
+
+
+def synthetic_countries(count):
+    """Deterministic made-up country names, e.g. 'korabia', 'velistan'."""
+    starts = ["ka", "ve", "lo", "mi", "sa", "to", "ru", "ne", "da", "po", "ze", "bi"]
+    middles = ["ra", "li", "do", "ne", "ma", "ro", "ta", "vi"]
+    ends = ["bia", "stan", "land", "nia", "ria", "dor", "via"]
+    names = []
+    for start in starts:
+        for middle in middles:
+            for end in ends:
+                names.append(start + middle + end)
+    return names[:count]
+
+
+# --- COUNTRY DETECTION ---
+def legacy_detect_country(countries, text):
+    """The pre-matcher implementation: sort and one regex per country per call."""
+    text = text.lower()
+    for country in sorted(countries, key=len, reverse=True):
+        if re.search(r'\b' + re.escape(country) + r'\b', text): return country
+    return None
+
+
+@benchmark
+def bench_detect_country():
+    bot = RuleBasedChatbot()
+    text = "What is the best time to travel to Japan and the United States?"
+    rows = []
+    for size in (16, 250):
+        countries = list(bot.country_attractions) + synthetic_countries(size - len(bot.country_attractions))
+        matcher = CountryMatcher(Lexicon(countries, COUNTRY_ALIASES))
+        rows.append((size, per_call_us(legacy_detect_country, countries, text, number=200),
+                     per_call_us(matcher.find, text)))
+    print("detect_country (us/call)")
+    print(f"  {'countries':>9} {'legacy':>10} {'matcher':>10}")
+    for size, legacy, compiled in rows:
+        print(f"  {size:>9} {legacy:>10.2f} {compiled:>10.2f}")
+
+
+def typo_corpus(names, seed=5):
+    """One deletion, insertion, substitution and transposition (never the first letter) per name."""
+    import random as rng
+    rng.seed(seed)
+    corpus = []
+    for name in names:
+        if len(name) < 5: continue
+        i = rng.randrange(1, len(name) - 1)
+        letter = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        corpus += [(name[:i] + name[i + 1:], name), (name[:i] + letter + name[i:], name),
+                   (name[:i] + letter + name[i + 1:], name), (name[:i] + name[i + 1] + name[i] + name[i + 2:], name)]
+    return [(typo, name) for typo, name in corpus if typo != name]
+
+
+# Sentences without any country, typo'd or not: every hit is a false positive.
+NO_COUNTRY = ["suggest a beach trip please", "what should I pack for winter", "hello there how are you",
+              "thanks that is great", "how much money do I need", "recommend a cheap city break",
+              "planning a ski holiday with friends", "where can we travel in summer", "is tipping expected",
+              "i need a power adapter and sunscreen", "what is the best budget destination"]
+
+
+@benchmark
+def bench_fuzzy_country():
+    print("typo-tolerant country detection")
+    for count in (16, 250):
+        kb = synthetic_knowledge_base(count)
+        matcher = kb.country_matcher
+        corpus = typo_corpus(kb.country_attractions)
+        hits = [matcher.find_fuzzy(f"best time to visit {typo}") for typo, _ in corpus]
+        correct = sum(hit == name for hit, (_, name) in zip(hits, corpus))
+        returned = sum(hit is not None for hit in hits)
+        false_alarms = sum(matcher.find_fuzzy(text) is not None for text in NO_COUNTRY)
+        print(f"  {count:>4} countries, {len(corpus)} typos: precision {correct / max(returned, 1):.1%}, "
+              f"recall {correct / len(corpus):.1%}, {false_alarms}/{len(NO_COUNTRY)} false alarms on country-free text")
+
+        typo = f"best time to visit {corpus[len(corpus) // 2][0]}"
+        names = list(matcher.lookup)
+
+        def brute_force(text):
+            return min(((edit_distance(word, name, 2), name) for word in text.split() for name in names))
+
+        print(f"        per message: exact {per_call_us(matcher.find, 'best time to visit poland'):.2f} µs, "
+              f"typo {per_call_us(matcher.find_fuzzy, typo):.2f} µs, "
+              f"no country {per_call_us(matcher.find_fuzzy, NO_COUNTRY[0]):.2f} µs, "
+              f"brute force {per_call_us(brute_force, typo, number=20):.0f} µs")
+
+
+# --- VISA RULES ---
+@benchmark
+def bench_visa():
+    bot = RuleBasedChatbot()
+    countries = bot.visa_matrix.countries[1:]
+    pairs = [(origin, dest) for origin in countries for dest in countries]
+
+    def all_pairs():
+        for origin, dest in pairs: bot.get_visa_rule(origin, dest)
+
+    print("visa rules")
+    print(f"  get_visa_rule, {len(pairs)} pairs: {per_call_us(all_pairs, number=50) / len(pairs):.2f} us/pair")
+    print(f"  visa_free_destinations: {per_call_us(bot.visa_free_destinations, 'usa'):.2f} us/call")
+    print(f"  visa_required_origins: {per_call_us(bot.visa_required_origins, 'china'):.2f} us/call")
+
+
+# --- PACKAGE DETAILS ---
+def legacy_extract_package_details(text, current_data):
+    """The pre-extractor implementation: up to six separate regex searches."""
+    text = text.lower()
+    if 'solo' in text or 'just me' in text:
+        current_data['people'] = 1
+    elif 'couple' in text:
+        current_data['people'] = 2
+    else:
+        people_match = re.search(r'(\d+)\s*(people|person|pax|travelers)', text)
+        if people_match: current_data['people'] = int(people_match.group(1))
+    budget_match = re.search(r'(\$|€|eur|usd|budget)\s*?(\d+)', text)
+    if not budget_match: budget_match = re.search(r'(\d+)\s*(dollars|usd|eur|€|\$)', text)
+    if budget_match:
+        for group in budget_match.groups():
+            if group and group.isdigit():
+                current_data['budget'] = int(group)
+                break
+    range_match = re.search(r'(\d+)\s*-\s*(\d+)\s*(nights|days)', text)
+    if range_match:
+        current_data['min_nights'] = int(range_match.group(1))
+        current_data['max_nights'] = int(range_match.group(2))
+    else:
+        single_night_match = re.search(r'(\d+)\s*(nights|days)', text)
+        if single_night_match:
+            current_data['min_nights'] = current_data['max_nights'] = int(single_night_match.group(1))
+        elif "week" in text:
+            current_data['min_nights'] = current_data['max_nights'] = 7
+    return current_data
+
+
+@benchmark
+def bench_extract_package_details():
+    texts = ["Plan a package for Turkey for 2 people budget 1500 5 nights",
+             "2 people, $1500, 5-7 nights, 1 week buffer",
+             "I want a travel package to USA for 4 people with 2000 dollars",
+             "What is the currency in Turkey?"]
+    print("extract_package_details (us/call)")
+    for text in texts:
+        legacy = per_call_us(legacy_extract_package_details, text, {})
+        single = per_call_us(extract_entities, text)
+        print(f"  legacy {legacy:6.2f}  single-pass {single:6.2f}  {text!r}")
+
+
+# --- INTENT CLASSIFIER ---
+@benchmark
+def bench_classify():
+    text = "What is the best time to visit Japan and do I need to tip there?"
+    print("intent classification (us/call)")
+    for extra in (0, 1000, 10000):
+        keywords = dict(INTENT_KEYWORDS)
+        for i, name in enumerate(synthetic_countries(84) * (extra // 84 + 1)):
+            if i >= extra: break
+            keywords.setdefault(f"extra_{i % 50}", []).append(f"{name} {i}")
+        lexicon = Lexicon((), keywords=keywords)
+        size = sum(map(len, keywords.values()))
+        print(f"  {size:>6} keywords: {per_call_us(lexicon.classify, text):6.2f}")
+
+
+# --- LANGUAGES ---
+LANGUAGE_GROWTH_LIMIT = 0.25  # Five languages may cost at most this much more per message than English alone.
+LITHUANIAN_MESSAGES = ["vizos iš Lietuvos į Japoniją", "Ką aplankyti Italijoje?", "Kokia valiuta Lenkijoje?",
+                       "Ar reikia arbatpinigių Japonijoje?", "Kada geriausias laikas keliauti į Tailandą?",
+                       "Ką pasiimti į Graikiją?", "Pasiūlyk paplūdimio kelionę", "Kiek kainuoja kelionė?",
+                       "Kur užteks 1500 eur 2 žmonėms 5 naktims?", "ka aplankyti Prancuzijoje"]
+
+
+def synthetic_language(seed):
+    """A made-up language the size and shape of Lithuanian: its tables with the letters swapped by a fixed cipher."""
+    import random as rng
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    shuffled = list(letters)
+    rng.Random(seed).shuffle(shuffled)
+    cipher = str.maketrans(letters, "".join(shuffled))
+    tables = LANGUAGES["lt"]
+    return {"keywords": {feature: [phrase.translate(cipher) for phrase in phrases]
+                         for feature, phrases in tables["keywords"].items()},
+            "countries": {country: [name.translate(cipher) for name in names]
+                          for country, names in tables["countries"].items()}}
+
+
+@benchmark
+def bench_languages():
+    from travel_corpus import generate_corpus
+
+    messages = [m for utterances in generate_corpus(200, CORPUS_SEED).values() for m in utterances]
+    messages += LITHUANIAN_MESSAGES * 20
+    state = TravelEngine.new_state()
+    print(f"per-message cost by number of languages ({len(messages)} messages, "
+          f"limit +{LANGUAGE_GROWTH_LIMIT:.0%} from 1 to 5)")
+    print(f"  {'languages':>9} {'entries':>8} {'scan us':>8} {'respond us':>11}")
+    extra = [("lt", LANGUAGES["lt"])] + [(f"x{seed}", synthetic_language(seed)) for seed in (1, 2, 3)]
+    costs = []
+    for count in range(1, 6):
+        kb = KnowledgeBase(COUNTRY_ATTRACTIONS, COUNTRY_INFO, DAILY_COSTS, DESTINATIONS, PACKING_LISTS,
+                           languages=dict(extra[:count - 1]))
+        engine = TravelEngine(kb, cache_size=0)
+
+        def scan_all():
+            for message in messages: kb.lexicon.scan(message)
+
+        def respond_all():
+            for message in messages: engine.respond(state, message)
+
+        scan = per_call_us(scan_all, number=5) / len(messages)
+        respond = per_call_us(respond_all, number=3) / len(messages)
+        costs.append(respond)
+        print(f"  {count:>9} {len(kb.lexicon):>8} {scan:>8.2f} {respond:>11.2f}")
+    growth = costs[-1] / costs[0] - 1
+    print(f"  5 languages vs 1: {growth:+.1%}" + ("  OVER LIMIT" if growth > LANGUAGE_GROWTH_LIMIT else ""))
+    return growth <= LANGUAGE_GROWTH_LIMIT
+
+
+# --- RESPONSE CACHE ---
+@benchmark
+def bench_response_cache():
+    questions = ["What is the currency in Turkey?", "Visa from USA to Japan", "What to visit in Italy",
+                 "Tipping in USA", "Best time to visit Thailand", "What should I pack for Iceland?"]
+    state = TravelEngine.new_state()
+    cached, uncached = TravelEngine(), TravelEngine(cache_size=0)
+
+    def ask(engine):
+        for question in questions: engine.respond(state, question)
+
+    print("repeated stateless questions (us/message)")
+    print(f"  no cache: {per_call_us(ask, uncached) / len(questions):6.2f}")
+    print(f"  LRU cache: {per_call_us(ask, cached) / len(questions):6.2f}  {cached.cache.info()}")
+
+
+# --- ANSWER INDEX ---
+def synthetic_knowledge_base(count):
+    """The real knowledge base padded with made-up countries up to ``count``."""
+    names = synthetic_countries(count - len(COUNTRY_ATTRACTIONS))
+    attractions = dict(COUNTRY_ATTRACTIONS, **{n: [f"{n.title()} Old Town", f"{n.title()} National Park"] for n in names})
+    info = dict(COUNTRY_INFO, **{n: {"currency": f"{n.title()} Mark", "lang": n.title(), "tip": "10% is standard.",
+                                      "best_time": "May to September"} for n in names})
+    costs = dict(DAILY_COSTS, **{n: 40 + (i * 7) % 200 for i, n in enumerate(names)})
+    return KnowledgeBase(attractions, info, costs, DESTINATIONS, PACKING_LISTS)
+
+
+@benchmark
+def bench_answer_index():
+    print("answer index precompile")
+    for count in (16, 250):
+        engine = TravelEngine(synthetic_knowledge_base(count), cache_size=0)
+        index = engine.precompile()
+        print(f"  {count:>4} countries: {len(index):>5} answers, {index.build_seconds * 1000:6.2f} ms, "
+              f"~{index.size_bytes / 1024:7.1f} KiB")
+    state = TravelEngine.new_state()
+    plain = TravelEngine(cache_size=0)
+    compiled = TravelEngine(cache_size=0, precompile=True)
+    print(f"  'Currency in Turkey': rendered {per_call_us(plain.respond, state, 'Currency in Turkey'):.2f} us, "
+          f"precompiled {per_call_us(compiled.respond, state, 'Currency in Turkey'):.2f} us")
+
+
+# --- BATCHED BUDGET ---
+@benchmark
+def bench_budget_batch():
+    import random as rng
+    import travel_budget
+
+    rng.seed(7)
+    count = 10000
+    kb = synthetic_knowledge_base(250)
+    budgets = [rng.randrange(300, 15000) for _ in range(count)]
+    people = [rng.randrange(1, 7) for _ in range(count)]
+    low = [rng.randrange(2, 6) for _ in range(count)]
+    high = [lo + rng.randrange(0, 8) for lo in low]
+
+    def loop():
+        return [travel_budget._rank_python(kb.daily_costs, *request, 5) for request in zip(budgets, people, low, high)]
+
+    print(f"bulk quotes: {count} requests x {len(kb.daily_costs)} countries")
+    start = time.perf_counter()
+    loop()
+    print(f"  python loop: {time.perf_counter() - start:.3f} s")
+    if travel_budget.np is None:
+        print("  numpy: not installed")
+        return
+    start = time.perf_counter()
+    travel_budget.rank_all(kb.daily_costs, budgets, people, low, high)
+    print(f"  numpy batch: {time.perf_counter() - start:.3f} s")
+
+
+# --- MULTI-COUNTRY ITINERARY ---
+ITINERARY_BUDGET_MS = 100  # Interactive: one plan per chat turn.
+
+
+@benchmark
+def bench_itinerary():
+    kb = synthetic_knowledge_base(250)
+    engine = TravelEngine(kb, cache_size=0)
+    countries = list(kb.daily_costs)[:24]
+    print(f"multi-country itinerary, budget {ITINERARY_BUDGET_MS} ms")
+    worst = 0.0
+    for nights, budget in ((10, 4000), (30, 12000), (30, 1000000)):
+        start = time.perf_counter()
+        plan = engine.plan_itinerary(countries, 2, budget, nights)
+        elapsed = (time.perf_counter() - start) * 1000
+        worst = max(worst, elapsed)
+        print(f"  {len(countries)} countries, {nights:>2} nights, ${budget:>7}: {elapsed:6.2f} ms "
+              f"({len(plan.legs)} legs, {plan.attractions} attractions)")
+    return worst <= ITINERARY_BUDGET_MS
+
+
+# --- DATA FILE ---
+@benchmark
+def bench_data_file():
+    import tempfile
+    import travel_data
+
+    kb = synthetic_knowledge_base(250)
+    data = dict(travel_data.default_data(), country_attractions=dict(kb.country_attractions),
+                country_info={name: dict(info) for name, info in kb.country_info.items()}, daily_costs=dict(kb.daily_costs))
+    source = json.dumps(data, ensure_ascii=False)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "kb.bin")
+        size = travel_data.write_knowledge_base(path, data)
+        print(f"knowledge base file, 250 countries: JSON {len(source) / 1024:.1f} KiB, binary {size / 1024:.1f} KiB")
+
+        def measure(label, load):
+            start = time.perf_counter()
+            load()
+            elapsed = (time.perf_counter() - start) * 1000
+            tracemalloc.start()  # Separate run: tracing slows the timed one down several times.
+            loaded = load()
+            allocated = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            print(f"  {label:<26} {elapsed:7.2f} ms, {allocated / 1024:7.1f} KiB allocated")
+            return loaded
+
+        def from_json():
+            raw = json.loads(source)
+            return KnowledgeBase(raw["country_attractions"], raw["country_info"], raw["daily_costs"],
+                                 raw["destinations"], raw["packing_lists"], raw["visa_groups"], raw["visa_rules"])
+
+        measure("JSON + build indexes", from_json)
+        measure("mapped binary (lazy)", lambda: travel_data.load_knowledge_base(path))
+
+        def decode_all():
+            loaded = travel_data.load_knowledge_base(path)
+            for country in loaded.country_info: loaded.country_info[country], loaded.country_attractions[country]
+            return loaded
+
+        measure("  + every record decoded", decode_all)
+
+
+# --- SESSION MEMORY ---
+def allocated_per_item(factory, count):
+    """Bytes still allocated per object after creating ``count`` of them."""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    items = [factory() for _ in range(count)]
+    allocated = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del items
+    return allocated / count
+
+
+def legacy_session():
+    """What one session allocated before: its own copy of every data literal."""
+    return {
+        "context": {"state": None, "data": {}},
+        "schengen": set(VISA_GROUPS["schengen"]),
+        "eu_visa_free_to_china": set(VISA_GROUPS["eu_visa_free_to_china"]),
+        "country_attractions": copy.deepcopy(COUNTRY_ATTRACTIONS),
+        "country_info": copy.deepcopy(COUNTRY_INFO),
+        "daily_costs": dict(DAILY_COSTS),
+        "destinations": copy.deepcopy(DESTINATIONS),
+        "packing_lists": copy.deepcopy(PACKING_LISTS),
+    }
+
+
+@benchmark
+def bench_session_memory():
+    get_knowledge_base()  # the shared instance is paid for once, not per session
+    sessions = 500
+    # Before: every session rebuilt its own copy of the data literals.
+    before = allocated_per_item(legacy_session, sessions)
+    after = allocated_per_item(RuleBasedChatbot, sessions)
+    print(f"memory per session ({sessions} sessions)")
+    print(f"  own data copy (before): {before / 1024:6.1f} KiB")
+    print(f"  shared (context only): {after / 1024:6.2f} KiB")
+
+
+# --- STAGE METRICS ---
+@benchmark
+def bench_stage_metrics():
+    from travel_metrics import Metrics
+
+    messages = ["Hello there", "Visa from USA to Japan", "What is the currency in Japan?", "What to visit in France?",
+                "Suggest a mountain trip", "What to pack for Iceland?", "kdsjfklsdjfkl"]
+    state = TravelEngine.new_state()
+    metrics = Metrics()
+    engines = [("metrics off", TravelEngine(cache_size=0)), ("metrics on", TravelEngine(cache_size=0, metrics=metrics))]
+
+    def mix(engine):
+        for message in messages: engine.respond(state, message)
+
+    print(f"stage instrumentation, {len(messages)}-message mix (us/message)")
+    for label, engine in engines:
+        print(f"  {label:<12} {per_call_us(mix, engine, number=500) / len(messages):6.2f}")
+    print(f"  {'stage':<18} {'runs':>7} {'matches':>8} {'p50 us':>8} {'p99 us':>8}")
+    for row in metrics.summary():
+        matches = "" if row["matches"] is None else row["matches"]
+        print(f"  {row['name']:<18} {row['runs']:>7} {matches:>8} {row['p50_us']:>8.2f} {row['p99_us']:>8.2f}")
+
+
+# --- SESSION STORES ---
+@benchmark
+def bench_session_store():
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    from travel_sessions import MemorySessionStore, SQLiteSessionStore
+
+    sessions = 5000
+    turns = ["hello", "Create a travel package for Poland", "2 people", "budget 900", "Visa from USA to Japan"]
+    engine = TravelEngine()
+
+    def turn(store, session_id, message):
+        state = store.get(session_id) or TravelEngine.new_state()
+        state, _ = engine.respond(state, message)
+        store.put(session_id, state)
+
+    print(f"session stores: {sessions} concurrent sessions x {len(turns)} turns, 8 threads")
+    with tempfile.TemporaryDirectory() as directory:
+        stores = [("memory", MemorySessionStore(max_sessions=sessions)),
+                  ("sqlite, batched", SQLiteSessionStore(os.path.join(directory, "batched.db"))),
+                  ("sqlite, write-through", SQLiteSessionStore(os.path.join(directory, "through.db"), batch_size=1))]
+        for label, store in stores:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(8) as pool:
+                for message in turns:  # Every session takes its next turn, interleaved with all the others.
+                    list(pool.map(lambda i: turn(store, f"s{i}", message), range(sessions)))
+            store.flush()
+            elapsed = time.perf_counter() - start
+            written = f", {store.writes} rows written for {sessions * len(turns)} turns" if hasattr(store, "writes") else ""
+            print(f"  {label:<22} {sessions * len(turns) / elapsed:8.0f} turns/s{written}")
+            store.close()
+
+
+# --- DIALOGUE LOAD ---
+@benchmark
+def bench_dialogue_load():
+    import travel_load
+
+    print("package dialogues, all live at once (in-process, 8 workers, no think time)")
+    for sessions in (1000, 10000):
+        summary = travel_load.run_load(sessions, workers=8)
+        turn, completion = summary["turn_ms"], summary["completion_ms"]
+        print(f"  {sessions:>5} sessions: {summary['turns_per_second']:>6} turns/s, turn p50 {turn['p50']:.2f} / "
+              f"p99 {turn['p99']:.2f} ms, completion p50 {completion['p50']:.0f} / p99 {completion['p99']:.0f} ms, "
+              f"{travel_load.session_memory(sessions) / 1024:.2f} KiB/session, {summary['errors']} failed")
+
+
+# --- HTTP SERVICE ---
+async def _http_dialogues(clients, turns):
+    from travel_server import ChatServer
+
+    server = ChatServer()
+    host, port = await server.start("127.0.0.1", 0)
+    latencies = []
+
+    async def client(index):
+        reader, writer = await asyncio.open_connection(host, port)
+        for turn in turns:
+            body = json.dumps({"session_id": f"bench-{index}", "message": turn}).encode()
+            start = time.perf_counter()
+            writer.write(f"POST /chat HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+            await reader.readline()
+            length = 0
+            while (line := await reader.readline()) != b"\r\n":
+                if line.lower().startswith(b"content-length"): length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    await server.close()
+    return elapsed, latencies
+
+
+@benchmark
+def bench_http():
+    turns = ["Create a travel package for Poland", "2 people", "budget 900", "Visa from USA to Japan"]
+    clients = 500
+    elapsed, latencies = asyncio.run(_http_dialogues(clients, turns))
+    latencies.sort()
+    print(f"http service ({clients} concurrent planning dialogues, {len(latencies)} turns)")
+    print(f"  throughput: {len(latencies) / elapsed:.0f} turns/s")
+    print(f"  latency p50: {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"p99: {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+
+
+# --- HOT PATHS ---
+CORPUS_PER_INTENT = 2000
+CORPUS_SEED = 0
+# Compared against --baseline; p99 is too noisy on a shared machine to gate on.
+REGRESSION_STATS = ("p50_us", "p95_us")
+NOISE_FLOOR_US = 0.5  # Smaller differences are never a regression.
+
+
+def time_calls(func, args_list, repeat=3):
+    """Nanoseconds per call for each argument tuple: the best of ``repeat`` passes, after a warm-up pass."""
+    for args in args_list: func(*args)
+    best = [None] * len(args_list)
+    clock = time.perf_counter_ns
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for i, args in enumerate(args_list):
+                started = clock()
+                func(*args)
+                elapsed = clock() - started
+                if best[i] is None or elapsed < best[i]: best[i] = elapsed
+    finally:
+        if gc_enabled: gc.enable()
+    return best
+
+
+def latency_stats(samples_ns):
+    """Throughput and mean/p50/p95/p99 latency of per-call samples."""
+    ordered = sorted(samples_ns)
+    total = sum(ordered) or 1
+
+    def percentile(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1000, 3)
+
+    return {"calls": len(ordered), "per_second": round(len(ordered) / total * 1e9),
+            "mean_us": round(total / len(ordered) / 1000, 3), "p50_us": percentile(0.5),
+            "p95_us": percentile(0.95), "p99_us": percentile(0.99)}
+
+
+def record(name, samples_ns):
+    """Stores the stats of a hot path for --json and --baseline and returns them."""
+    RESULTS[name] = stats = latency_stats(samples_ns)
+    return stats
+
+
+def compare_results(results, baseline, threshold):
+    """Messages for every hot path in both runs whose REGRESSION_STATS grew by more than ``threshold``."""
+    regressions = []
+    for name, stats in results.items():
+        old = baseline.get(name)
+        if old is None: continue
+        for stat in REGRESSION_STATS:
+            before, after = old[stat], stats[stat]
+            if after > before * (1 + threshold) and after - before > NOISE_FLOOR_US:
+                regressions.append(f"{name} {stat}: {before:.2f} -> {after:.2f} us (+{after / before - 1:.0%})")
+    return regressions
+
+
+@benchmark
+def bench_hot_paths():
+    from travel_corpus import generate_corpus
+
+    corpus = generate_corpus(CORPUS_PER_INTENT, CORPUS_SEED)
+    engine = TravelEngine(cache_size=0)  # Every message runs the rules.
+    bot = RuleBasedChatbot()
+    state = TravelEngine.new_state()
+    messages = [text.lower() for utterances in corpus.values() for text in utterances]
+    packages = [text.lower() for text in corpus["package"]]
+    details = [engine.extract_package_details(text, {"country": engine.detect_country(text)}) for text in packages]
+    countries = bot.visa_matrix.countries[1:]
+    pairs = [(origin, dest) for origin in countries for dest in countries]
+
+    print(f"hot paths, {CORPUS_PER_INTENT} generated utterances per intent (seed {CORPUS_SEED})")
+    print(f"  {'path':<28} {'calls':>6} {'calls/s':>9} {'p50 us':>8} {'p95 us':>8} {'p99 us':>8}")
+    rows = [(f"match_rule/{intent}", engine.respond, [(state, text) for text in utterances])
+            for intent, utterances in corpus.items()]
+    rows += [("detect_country", bot.detect_country, [(text,) for text in messages]),
+             ("extract_package_details", bot.extract_package_details, [(text, {}) for text in packages]),
+             ("get_visa_rule", bot.get_visa_rule, pairs * (CORPUS_PER_INTENT // len(pairs) + 1)),
+             ("calculate_package", bot.calculate_package, [(data,) for data in details])]
+    for name, func, args_list in rows:
+        stats = record(name, time_calls(func, args_list))
+        print(f"  {name:<28} {stats['calls']:>6} {stats['per_second']:>9} {stats['p50_us']:>8.2f} "
+              f"{stats['p95_us']:>8.2f} {stats['p99_us']:>8.2f}")
+
+
+# --- TYPE-AHEAD ---
+SUGGEST_BUDGET_US = 1000  # p99 of one suggest() call, i.e. one keystroke.
+SUGGEST_PER_INTENT = 30
+
+
+@benchmark
+def bench_suggest():
+    from travel_corpus import generate_corpus
+    from travel_suggest import SuggestionIndex
+
+    messages = [text for utterances in generate_corpus(SUGGEST_PER_INTENT, CORPUS_SEED).values() for text in utterances]
+    messages += LITHUANIAN_MESSAGES
+    prefixes = [(message[:end],) for message in messages for end in range(len(message) + 1)]
+    print(f"type-ahead: every prefix of {len(messages)} messages ({len(prefixes)} calls, p99 budget {SUGGEST_BUDGET_US} us)")
+    print(f"  {'countries':>9} {'keys':>6} {'build ms':>9} {'p50 us':>8} {'p99 us':>8} {'max us':>8}")
+    within_budget = True
+    for count in (16, 250):
+        kb = synthetic_knowledge_base(count)
+        started = time.perf_counter()
+        index = SuggestionIndex(kb)
+        build = (time.perf_counter() - started) * 1000
+        samples = time_calls(index.suggest, prefixes)
+        stats = record(f"suggest/{count}", samples)
+        over = stats["p99_us"] >= SUGGEST_BUDGET_US
+        within_budget = within_budget and not over
+        print(f"  {count:>9} {len(index):>6} {build:>9.2f} {stats['p50_us']:>8.2f} {stats['p99_us']:>8.2f} "
+              f"{max(samples) / 1000:>8.2f}" + ("  OVER BUDGET" if over else ""))
+    return within_budget
+
+
+# --- IMPORT TIME ---
+@benchmark
+def bench_import():
+    code = "import time; start = time.perf_counter(); import {0}; print((time.perf_counter() - start) * 1000)"
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    print(f"cold import (ms, best of 3; travel_engine budget {IMPORT_BUDGET_MS} ms)")
+    within_budget = True
+    for module in ("travel_engine", "travel_bot"):
+        runs = [subprocess.run([sys.executable, "-c", code.format(module)], capture_output=True, text=True, cwd=cwd)
+                for _ in range(3)]
+        if any(run.returncode for run in runs):
+            print(f"  {module}: failed ({runs[0].stderr.strip().splitlines()[-1]})")
+            continue
+        best = min(float(run.stdout) for run in runs)
+        over = module == "travel_engine" and best > IMPORT_BUDGET_MS
+        within_budget = within_budget and not over
+        print(f"  {module}: {best:.1f}" + ("  OVER BUDGET" if over else ""))
+    return within_budget
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Travel bot benchmarks.")
+    parser.add_argument("names", nargs="*", metavar="benchmark", help=f"Any of: {', '.join(BENCHMARKS)}.")
+    parser.add_argument("--json", metavar="PATH", help="Write the recorded hot-path latencies as JSON.")
+    parser.add_argument("--baseline", metavar="PATH", help="A --json file of an earlier run to compare with.")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative slowdown against --baseline (default 0.25 = 25%%).")
+    args = parser.parse_args(argv)
+    failed = False
+    for name in args.names or list(BENCHMARKS):
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            return 2
+        if BENCHMARKS[name]() is False: failed = True
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "corpus": {"per_intent": CORPUS_PER_INTENT, "seed": CORPUS_SEED}, "results": RESULTS}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_results(RESULTS, json.load(f)["results"], args.threshold)
+        print(f"compared with {args.baseline} (threshold {args.threshold:.0%}): "
+              + ("no regressions" if not regressions else f"{len(regressions)} regressions"))
+        for line in regressions: print(f"  REGRESSION {line}")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
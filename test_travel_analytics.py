@@ -0,0 +1,84 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from collections import OrderedDict
+
+from travel_analytics import LogReport, TopK, analyze, classify_turns, main, parse_records, read_lines
+from travel_corpus import generate_corpus
+
+STREAMLIT_LOG = [
+    json.dumps([{"role": "assistant", "content": "Hello!"}, {"role": "user", "content": "Visa from USA to Japan"},
+                {"role": "assistant", "content": "..."}, {"role": "user", "content": "Create a travel package for Poland"},
+                {"role": "user", "content": "2 people"}, {"role": "user", "content": "budget 900"}]),
+    json.dumps({"session_id": "b", "turns": ["Visa from Indai to Italy", "kdsjfklsdjfkl"]}),
+    json.dumps({"session_id": "c", "role": "user", "content": "Plan a package for Spain"}),
+    json.dumps({"session_id": "c", "role": "assistant", "content": "How many people?"}),
+    json.dumps({"session_id": "c", "role": "user", "content": "2 people, $3000"}),
+    json.dumps({"session_id": "d", "message": "What is the currency in Japan?"}),
+    json.dumps({"session_id": "b", "replies": ["..."]}),
+    "not json",
+    "",
+]
+
+
+class TestAnalytics(unittest.TestCase):
+    def test_formats_and_aggregates(self):
+        result = analyze(STREAMLIT_LOG).to_dict()
+        self.assertEqual((result["lines"], result["bad_lines"], result["turns"]), (9, 1, 9))
+        self.assertEqual(result["intents"], {"package": 5, "visa": 2, "fallback": 1, "currency": 1})
+        self.assertAlmostEqual(result["fallback_rate"], 1 / 9, places=4)
+        self.assertEqual(result["top_visa_pairs"], [["india -> italy", 1], ["usa -> japan", 1]])
+        self.assertEqual(dict(result["top_countries"])["japan"], 2)
+        # "budget 900" is a package answer; "2 people, $3000" continues session c's dialogue.
+        self.assertEqual(result["budgets"]["count"], 2)
+        self.assertEqual(result["budgets"]["mean"], 1950)
+
+    def test_corpus_intents(self):
+        corpus = generate_corpus(100, seed=2)
+        lines = (json.dumps({"message": text}) for utterances in corpus.values() for text in utterances)
+        intents = analyze(lines).to_dict()["intents"]
+        self.assertEqual(intents["fallback"], 100)
+        self.assertEqual(intents["visa"], 100)
+        self.assertEqual(sum(intents.values()), 800)
+
+    def test_top_k_is_bounded(self):
+        top = TopK(capacity=4)
+        for key in "aaaaabbbbccdefg":
+            top.add(key)
+        self.assertEqual(len(top), 4)
+        self.assertEqual(top.most_common(2), [("a", 5), ("b", 4)])
+        self.assertEqual(top.evictions, 3)
+
+    def test_top_k_evicts_the_smallest_count(self):
+        top = TopK(capacity=3)
+        for key in "aaaabxyzw": top.add(key)  # y takes over b, z takes over x, w takes over y (oldest of the 2s).
+        self.assertEqual(top.counts, {"a": 4, "z": 2, "w": 3})
+        self.assertEqual(top.evictions, 3)
+        for i in range(10000): top.add(i)
+        self.assertEqual(sum(top.counts.values()), 10009)  # Space-Saving: the counts always add up to the stream length.
+
+    def test_state_is_bounded(self):
+        lines = (json.dumps({"session_id": f"s{i}", "message": f"Visa from q{i} to z{i}"}) for i in range(3000))
+        report, sessions = LogReport(top_capacity=50), OrderedDict()
+        for reply in classify_turns(parse_records(lines, report), max_sessions=100, sessions=sessions):
+            report.add(reply)
+        self.assertEqual(report.turns, 3000)
+        self.assertEqual(len(sessions), 100)
+        self.assertEqual(list(sessions)[-1], "s2999")
+        self.assertEqual(len(report.visa_pairs), 0)  # Unresolved "countries" are not counted as visa pairs.
+
+    def test_cli_reads_gzip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path, report = os.path.join(directory, "log.jsonl.gz"), os.path.join(directory, "report.json")
+            with gzip.open(path, "wt", encoding="utf-8") as f: f.write("\n".join(STREAMLIT_LOG) + "\n")
+            self.assertEqual(sum(1 for _ in read_lines([path])), 9)
+            main([path, "--json", report, "--top", "1"])
+            with open(report, encoding="utf-8") as f: result = json.load(f)
+            self.assertEqual(len(result["top_countries"]), 1)
+            self.assertEqual(result["turns"], 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
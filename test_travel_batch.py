@@ -0,0 +1,82 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from travel_batch import answer_chunk, run_batch
+from travel_corpus import generate_corpus
+from travel_engine import RuleBasedChatbot
+
+
+def conversations(count):
+    corpus = generate_corpus(count // 4 + 1, seed=5)
+    lines = []
+    for i in range(count):
+        if i % 4 == 0:
+            turns = [corpus["package"][i // 4], "2 people", {"message": "budget 900"}]
+        else:
+            turns = [corpus["suggestion"][i // 4], corpus["visa"][i // 4], corpus["info"][i // 4]]
+        lines.append(json.dumps({"session_id": f"c-{i}", "turns": turns}) + "\n")
+    return lines
+
+
+class TestBatch(unittest.TestCase):
+    def test_dialogue_state_carries_over(self):
+        line = json.dumps({"session_id": "a", "turns": ["Create a travel package for Poland", "2 people", "budget 900"]})
+        output, turns = answer_chunk([(1, line)])
+        replies = json.loads(output[0])["replies"]
+        self.assertEqual(turns, 3)
+        self.assertIn("Custom Package for Poland", replies[2])
+
+    def test_bad_lines_are_reported_in_place(self):
+        lines = ['{"session_id": "a", "turns": ["hello"]}\n', "not json\n", "\n", '{"turns": "hello"}\n', "[1]\n"]
+        out = io.StringIO()
+        self.assertEqual(run_batch(lines, out, workers=1), (4, 1))
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(rows[0]["session_id"], "a")
+        self.assertEqual([row.get("line") for row in rows[1:]], [2, 4, 5])
+        self.assertIn("'turns' must be a list", rows[2]["error"])
+
+    def test_failing_conversation_does_not_stop_the_batch(self):
+        match_rule = RuleBasedChatbot.match_rule
+
+        def flaky(bot, message):
+            if message == "boom": raise KeyError("currency")
+            return match_rule(bot, message)
+
+        lines = [json.dumps({"session_id": s, "turns": [m]}) for s, m in (("a", "hello"), ("b", "boom"), ("c", "hello"))]
+        with mock.patch.object(RuleBasedChatbot, "match_rule", flaky):
+            output, turns = answer_chunk(list(enumerate(lines, 1)))
+        rows = [json.loads(line) for line in output]
+        self.assertEqual(turns, 2)
+        self.assertEqual(rows[1], {"line": 2, "error": "KeyError: 'currency'"})
+        self.assertEqual([rows[0]["session_id"], rows[2]["session_id"]], ["a", "c"])
+
+    def test_pool_output_matches_serial(self):
+        lines = conversations(400)
+        serial, pooled = io.StringIO(), io.StringIO()
+        self.assertEqual(run_batch(lines, serial, workers=1), (400, 1200))
+        self.assertEqual(run_batch(iter(lines), pooled, workers=2, chunk_size=7), (400, 1200))
+        self.assertEqual(serial.getvalue(), pooled.getvalue())
+        other_seed = io.StringIO()
+        run_batch(lines, other_seed, workers=1, seed=1)
+        self.assertNotEqual(serial.getvalue(), other_seed.getvalue())  # Suggestions are random, but seeded.
+
+    def test_cli(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source, target = os.path.join(directory, "in.jsonl"), os.path.join(directory, "out.jsonl")
+            with open(source, "w", encoding="utf-8") as f: f.writelines(conversations(20))
+            run = subprocess.run([sys.executable, "travel_batch.py", source, "-o", target, "--workers", "2"],
+                                 capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+            self.assertEqual(run.returncode, 0, run.stderr)
+            self.assertIn("20 conversations, 60 turns", run.stderr)
+            with open(target, encoding="utf-8") as f:
+                self.assertEqual([json.loads(line)["session_id"] for line in f], [f"c-{i}" for i in range(20)])
+
+
+if __name__ == "__main__":
+    unittest.main()
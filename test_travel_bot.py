@@ -1,16 +1,15 @@
 import unittest
+import json
+import os
+import subprocess
 import sys
-from unittest.mock import MagicMock
+import tempfile
 
-# --- 1. MOCK STREAMLIT ---
-# We mock streamlit before importing the chatbot to prevent
-# "StreamlitAPIException" because standard python execution
-# doesn't support st.set_page_config() or st.markdown()
-sys.modules["streamlit"] = MagicMock()
+# The engine has no Streamlit dependency, so it is imported directly.
+from concurrent.futures import ThreadPoolExecutor
 
-# --- 2. IMPORT THE BOT ---
-# Updated to match your specific filename 'travel_bot.py'
-from travel_bot import RuleBasedChatbot
+from travel_engine import (COUNTRY_ATTRACTIONS, COUNTRY_INFO, DAILY_COSTS, DESTINATIONS, PACKING_LISTS, KnowledgeBase,
+                           STAGES, RuleBasedChatbot, TravelEngine, edit_distance, extract_entities, get_engine)
 
 class TestTravelChatbot(unittest.TestCase):
     def setUp(self):
@@ -28,6 +27,15 @@ class TestTravelChatbot(unittest.TestCase):
         response = self.bot.match_rule("kdsjfklsdjfkl")
         self.assertIn("I can help with", response)
 
+    def test_knowledge_base_shared(self):
+        """Sessions share one read-only knowledge base and only own their context."""
+        other = RuleBasedChatbot()
+        self.assertIs(self.bot.kb, other.kb)
+        self.assertIsNot(self.bot.context, other.context)
+        self.assertFalse(hasattr(self.bot, "__dict__"))
+        with self.assertRaises(TypeError):
+            self.bot.daily_costs["poland"] = 1
+
     # --- LOGIC UTILITY TESTS ---
 
     def test_detect_country_simple(self):
@@ -48,6 +56,48 @@ class TestTravelChatbot(unittest.TestCase):
         result = self.bot.detect_country(text)
         self.assertIsNone(result, "Should not match 'usa' inside 'usage'")
 
+    def test_detect_country_aliases(self):
+        """Aliases resolve to the canonical country name."""
+        self.assertEqual(self.bot.detect_country("Flying to the United States"), "usa")
+        self.assertEqual(self.bot.detect_country("a week in the U.S. soon"), "usa")
+        self.assertEqual(self.bot.detect_country("Moving to Britain"), "uk")
+        self.assertEqual(self.bot.detect_country("Urlaub in Deutschland"), "germany")
+
+    def test_detect_country_no_region_aliases(self):
+        """Regions that merely contain a country's nickname are not that country."""
+        self.assertIsNone(self.bot.detect_country("south america"))
+        self.assertIsNone(self.bot.detect_country("best time to visit latin america"))
+        self.assertIsNone(self.bot.detect_country("currency in new england"))
+
+    def test_detect_countries_positions(self):
+        """Every mention is reported with its span, in text order."""
+        text = "From Italy to Japan via the United States"
+        found = self.bot.detect_countries(text)
+        self.assertEqual([c for c, _, _ in found], ["italy", "japan", "usa"])
+        for country, start, end in found:
+            self.assertEqual(self.bot.detect_country(text[start:end]), country)
+
+    def test_detect_country_longest_mention(self):
+        """The longest mention wins over a shorter one."""
+        self.assertEqual(self.bot.detect_country("usa or united states of america"), "usa")
+        self.assertEqual(self.bot.detect_country("Visa from UK to Lithuania"), "lithuania")
+
+    def test_detect_country_typos(self):
+        """Misspelled names resolve when nothing matches exactly."""
+        for text, country in [("package for polnd", "poland"), ("best time for thialand", "thailand"),
+                              ("currency in jappan", "japan"), ("tip in germny", "germany"),
+                              ("pound in the united kingdon", "uk")]:
+            self.assertEqual(self.bot.detect_country(text), country, text)
+        self.assertEqual(self.bot.detect_country("polnd or italy"), "italy")  # Exact mentions win.
+        self.assertIsNone(self.bot.detect_country("I want to spin"))  # Too short to guess.
+        self.assertIsNone(self.bot.detect_country("suggest a trip please"))
+        self.assertIn("Japan", self.bot.match_rule("Visa from polnd to jappan"))
+
+    def test_edit_distance(self):
+        self.assertEqual(edit_distance("thialand", "thailand", 2), 1)  # Transposition is one edit.
+        self.assertEqual(edit_distance("polnd", "poland", 1), 1)
+        self.assertEqual(edit_distance("abcdef", "uvwxyz", 2), 3)  # Capped at limit + 1.
+
     # --- CATEGORY 1: TRAVEL PACKAGES TESTS ---
 
     def test_package_trigger_poland(self):
@@ -101,6 +151,30 @@ class TestTravelChatbot(unittest.TestCase):
         response = self.bot.match_rule("Visa from UK to USA")
         self.assertIn("ESTA Required", response)
 
+    def test_visa_unknown_pair(self):
+        """Pairs without a rule fall back to the generic E-Visa hint."""
+        response = self.bot.get_visa_rule("brazil", "japan")
+        self.assertIn("check if Japan offers an E-Visa for Brazil citizens", response)
+        self.assertIn("own country", self.bot.get_visa_rule("mars", "mars"))
+
+    def test_visa_free_destinations(self):
+        """Bulk query agrees with get_visa_rule for every destination."""
+        destinations = self.bot.visa_free_destinations("usa")
+        self.assertIn("turkey", destinations)
+        self.assertIn("france", destinations)
+        self.assertNotIn("usa", destinations)
+        self.assertNotIn("india", destinations)
+        for dest in destinations:
+            self.assertIn("Visa Free", self.bot.get_visa_rule("usa", dest))
+
+    def test_visa_required_origins(self):
+        origins = self.bot.visa_required_origins("china")
+        self.assertIn("india", origins)
+        self.assertNotIn("thailand", origins)
+        self.assertNotIn("france", origins)
+        for origin in origins:
+            self.assertIn("Visa Required", self.bot.get_visa_rule(origin, "china"))
+
     # --- CATEGORY 3: COUNTRY SPECIFICS TESTS ---
 
     def test_currency_turkey(self):
@@ -175,8 +249,35 @@ class TestTravelChatbot(unittest.TestCase):
         self.assertIn("Budgeting:", response)
         self.assertIn("Thailand", response)
 
+    # --- INTENT CLASSIFIER TESTS ---
+
+    def test_keywords_match_whole_tokens(self):
+        """'plan' inside 'airplane' no longer starts a travel package."""
+        response = self.bot.match_rule("Is there an airplane to Italy?")
+        self.assertIsNone(self.bot.context["state"])
+        self.assertNotIn("travel package", response)
+
+    def test_classifier_phrases(self):
+        features = self.bot.kb.lexicon.classify("Best time and places to visit, where to go?")
+        self.assertTrue({"best_time", "attractions", "visit", "suggest"} <= features)
+        self.assertNotIn("best_time", self.bot.kb.lexicon.classify("the best of times"))
+
     # --- UNIT LOGIC TESTS (Internal) ---
 
+    def test_extract_entities_conflicts(self):
+        """One scan resolves competing numbers and reports where each came from."""
+        text = "2 people, $1500, 5-7 nights, 1 week buffer"
+        details = extract_entities(text)
+        self.assertEqual(details.as_dict(), {"people": 2, "budget": 1500, "min_nights": 5, "max_nights": 7})
+        self.assertEqual(text[slice(*details.spans["budget"])], "$1500")
+        self.assertEqual(text[slice(*details.spans["nights"])], "5-7 nights")
+        self.assertEqual([kind for kind, _, _ in details.entities], ["people", "budget_pre", "range", "weeks"])
+
+    def test_extract_entities_counts_are_not_budgets(self):
+        self.assertEqual(extract_entities("budget 5 nights").as_dict(), {"min_nights": 5, "max_nights": 5})
+        self.assertEqual(extract_entities("100 usd 4 pax").as_dict(), {"people": 4, "budget": 100})
+        self.assertEqual(extract_entities("solo for 2 weeks").as_dict(), {"people": 1, "min_nights": 14, "max_nights": 14})
+
     def test_package_calculation_logic(self):
         """Test the math directly without regex parsing."""
         data = {
@@ -190,5 +291,202 @@ class TestTravelChatbot(unittest.TestCase):
         # CHANGED: Added markdown ** ** to match actual bot output
         self.assertIn("**Recommended Stay:** 5 Nights", response)
 
+
+class TestStatelessEngine(unittest.TestCase):
+    DIALOGUE = ["Create a travel package for Poland", "2 people", "budget 900"]
+
+    def run_dialogue(self, engine, turns):
+        state, replies = TravelEngine.new_state(), []
+        for turn in turns:
+            state, reply = engine.respond(state, turn)
+            replies.append(reply)
+        return replies
+
+    def test_respond_leaves_state_unchanged(self):
+        state = {"state": "planning_package", "data": {"country": "poland"}}
+        new_state, _ = get_engine().respond(state, "2 people")
+        self.assertEqual(state, {"state": "planning_package", "data": {"country": "poland"}})
+        self.assertEqual(new_state["data"]["people"], 2)
+
+    def test_respond_matches_match_rule(self):
+        bot = RuleBasedChatbot()
+        expected = [bot.match_rule(turn) for turn in self.DIALOGUE]
+        self.assertEqual(self.run_dialogue(get_engine(), self.DIALOGUE), expected)
+        self.assertIn("**Recommended Stay:** 5 Nights", expected[-1])
+
+    def test_concurrent_conversations(self):
+        """One shared engine serves many conversations at once, identical to a serial run."""
+        engine = get_engine()
+        dialogues = []
+        for i, country in enumerate(["Poland", "Japan", "Turkey", "Italy"] * 25):
+            dialogues.append([f"Plan a package for {country}", f"{i % 5 + 1} people", f"${500 + i * 37}",
+                              f"{i % 4 + 2}-{i % 4 + 6} nights", f"Visa from USA to {country}"])
+        serial = [self.run_dialogue(engine, turns) for turns in dialogues]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            parallel = list(pool.map(lambda turns: self.run_dialogue(engine, turns), dialogues))
+        self.assertEqual(parallel, serial)
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.engine = TravelEngine(cache_size=2)
+        self.state = TravelEngine.new_state()
+
+    def test_normalized_repeats_hit(self):
+        _, first = self.engine.respond(self.state, "What is the currency in Turkey?")
+        _, second = self.engine.respond(self.state, "what is the   currency in turkey")
+        self.assertEqual(first, second)
+        self.assertEqual(self.engine.cache.info()["hits"], 1)
+        self.assertEqual(self.engine.cache.info()["misses"], 1)
+
+    def test_lru_is_bounded(self):
+        for text in ["Tipping in USA", "Visa from UK to USA", "What to visit in France"]:
+            self.engine.respond(self.state, text)
+        self.assertEqual(len(self.engine.cache), 2)
+
+    def test_stateful_and_random_replies_bypass_cache(self):
+        state, _ = self.engine.respond(self.state, "Create a travel package for Poland")
+        self.engine.respond(state, "2 people")
+        self.engine.respond(self.state, "Suggest a beach trip")
+        self.engine.respond(self.state, "Suggest a beach trip")
+        self.assertEqual(len(self.engine.cache), 0)
+        self.assertEqual(self.engine.cache.info()["hits"], 0)
+
+    def test_knowledge_base_change_invalidates(self):
+        self.engine.respond(self.state, "Tipping in USA")
+        self.engine.use_knowledge_base(self.engine.kb)
+        self.assertEqual(len(self.engine.cache), 0)
+
+
+class TestStructuredReply(unittest.TestCase):
+    def test_package_dialogue(self):
+        bot = RuleBasedChatbot()
+        first = bot.reply("Plan a package for Poland for 2 people")
+        self.assertEqual((first.intent, first.stage_name, first.countries), ("package", "package_trigger", ("poland",)))
+        self.assertEqual(first.package, {"people": 2})
+        second = bot.reply("budget 900")
+        self.assertEqual((second.stage, second.package), (0, {"budget": 900}))
+        self.assertIn("Custom Package for Poland", second.text)
+        self.assertGreater(second.elapsed, 0)
+
+    def test_visa_and_entities(self):
+        engine = TravelEngine(cache_size=0)
+        _, reply = engine.reply(engine.new_state(), "Do I need a visa from Indai to Japan?")
+        self.assertEqual((reply.intent, reply.visa, reply.countries), ("visa", ("india", "japan"), ("japan",)))
+        _, reply = engine.reply(engine.new_state(), "visa for japan")
+        self.assertEqual(reply.visa, (None, "japan"))
+        _, reply = engine.reply(engine.new_state(), "Where can 3 people go for $2000, 5 nights?")
+        self.assertEqual((reply.intent, reply.package), ("budget_fit", {"people": 3, "budget": 2000, "min_nights": 5, "max_nights": 5}))
+        _, reply = engine.reply(engine.new_state(), "Best time to visit Italy or Spain?")
+        self.assertEqual((reply.intent, reply.countries, reply.package, reply.visa), ("best_time", ("italy", "spain"), None, None))
+        self.assertEqual(STAGES[reply.stage][0], "common_questions")
+
+    def test_text_matches_respond_and_cache(self):
+        engine = TravelEngine()
+        for text in ["Tipping in USA", "Tipping in USA", "hello", "Pack for iceland", "asdkjh"]:
+            state, reply = engine.reply(engine.new_state(), text)
+            self.assertEqual(reply.text, TravelEngine(cache_size=0).respond(engine.new_state(), text)[1])
+        self.assertEqual(engine.cache.info()["hits"], 1)
+        _, cached = engine.reply(engine.new_state(), "tipping in usa")
+        self.assertIsNot(cached, engine.cache.get("tipping in usa"))
+        self.assertEqual(json.loads(json.dumps(cached.as_dict()))["intent"], "tip")
+
+    def test_changing_a_reply_leaves_the_cache_alone(self):
+        engine = TravelEngine()
+        question = "Where can 2 people go for $3000?"
+        _, first = engine.reply(engine.new_state(), question)
+        first.package["budget"] = 1
+        _, second = engine.reply(engine.new_state(), question)
+        self.assertEqual(engine.cache.info()["hits"], 1)
+        self.assertEqual(second.package, {"people": 2, "budget": 3000})
+
+
+class TestLanguages(unittest.TestCase):
+    def test_lithuanian_questions(self):
+        """Inflected country names and keywords, with or without diacritics."""
+        engine = TravelEngine(cache_size=0)
+        for text, intent, countries in [("Ką aplankyti Italijoje?", "attractions", ("italy",)),
+                                        ("ka aplankyti Prancuzijoje", "attractions", ("france",)),
+                                        ("Kokia valiuta Lenkijoje?", "currency", ("poland",)),
+                                        ("Ar reikia arbatpinigių Japonijoje?", "tip", ("japan",)),
+                                        ("Kada geriausias laikas keliauti į Tailandą?", "best_time", ("thailand",)),
+                                        ("Lankytinos vietos Jungtinėje Karalystėje", "attractions", ("uk",)),
+                                        ("Ką pasiimti į Graikiją?", "packing", ("greece",)),
+                                        ("Pasiūlyk paplūdimio kelionę", "suggestion", ()),
+                                        ("Labas!", "greeting", ())]:
+            _, reply = engine.reply(engine.new_state(), text)
+            self.assertEqual((reply.intent, reply.countries), (intent, countries), text)
+
+    def test_origin_in_any_word_order(self):
+        engine = TravelEngine(cache_size=0)
+        _, reply = engine.reply(engine.new_state(), "vizos iš Lietuvos į Japoniją")
+        self.assertEqual(reply.visa, ("lithuania", "japan"))
+        _, reply = engine.reply(engine.new_state(), "Visa to Japan from UK")
+        self.assertEqual(reply.visa, ("uk", "japan"))
+        self.assertEqual(engine.trip_countries("italy and spain for citizens of india"), ("india", ["italy", "spain"]))
+
+    def test_lithuanian_package_dialogue(self):
+        bot = RuleBasedChatbot()
+        self.assertIn("how many people", bot.match_rule("Suplanuok paketą į Ispaniją").lower())
+        bot.match_rule("2 žmonės")
+        self.assertIn("Custom Package for Spain", bot.match_rule("biudžetas 1500 eur"))
+        self.assertEqual(extract_entities("3 zmones, 5-7 naktys, 900 eurų").as_dict(),
+                         {"people": 3, "budget": 900, "min_nights": 5, "max_nights": 7})
+
+    def test_languages_compile_into_one_lexicon(self):
+        english = KnowledgeBase(COUNTRY_ATTRACTIONS, COUNTRY_INFO, DAILY_COSTS, DESTINATIONS, PACKING_LISTS, languages={})
+        self.assertEqual(english.lexicon.scan("vizos į Japoniją")[:2], (set(), []))
+        lexicon = get_engine().kb.lexicon
+        self.assertGreater(len(lexicon), len(english.lexicon))
+        features, mentions, origin = lexicon.scan("Visa from Lietuvos to Japan")
+        self.assertEqual(([m[0] for m in mentions], origin), (["lithuania", "japan"], 0))
+        self.assertIn("visa", features)
+        self.assertNotIn("from", lexicon.classify("what is it"))  # "iš" is not folded into "is".
+
+
+class TestAnswerIndex(unittest.TestCase):
+    QUESTIONS = {"best_time": "When is the best time for {}?", "currency": "Currency in {}",
+                 "tip": "Tipping in {}", "language": "What language is spoken in {}?",
+                 "attractions": "Top attractions in {}"}
+
+    def test_precompiled_replies_match_rendered(self):
+        plain, compiled = TravelEngine(cache_size=0), TravelEngine(cache_size=0, precompile=True)
+        self.assertEqual(len(compiled.answers), 5 * len(plain.kb.country_info))
+        for country in plain.kb.country_info:
+            for intent, question in self.QUESTIONS.items():
+                text = question.format(country)
+                self.assertEqual(compiled.respond(compiled.new_state(), text), plain.respond(plain.new_state(), text))
+
+    def test_export_json(self):
+        index = TravelEngine(precompile=True).answers
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "answers.json")
+            index.export_json(path)
+            with open(path, encoding="utf-8") as f: table = json.load(f)
+        self.assertIn("Sakura", table["japan"]["best_time"])
+        self.assertIn("Colosseum", table["italy"]["attractions"])
+
+    def test_rebuilt_for_new_countries(self):
+        engine = TravelEngine(precompile=True)
+        kb = KnowledgeBase({**COUNTRY_ATTRACTIONS, "iceland": ["Blue Lagoon"]},
+                           {**COUNTRY_INFO, "iceland": {"currency": "Icelandic Króna (ISK)", "lang": "Icelandic",
+                                                        "tip": "Not expected.", "best_time": "June to August"}},
+                           DAILY_COSTS, DESTINATIONS, PACKING_LISTS)
+        engine.use_knowledge_base(kb)
+        self.assertIn("Króna", engine.respond(engine.new_state(), "Currency in Iceland")[1])
+        self.assertIn("Blue Lagoon", engine.answers.get(("iceland", "attractions")))
+
+
+class TestEngineImport(unittest.TestCase):
+    def test_headless_import(self):
+        """Importing the engine must not pull in Streamlit.
+
+        The import-time budget is checked by `python bench_travel_bot.py import`.
+        """
+        code = "import sys, travel_engine; print('streamlit' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(out.stdout.strip(), "False")
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,67 @@
+import re
+import unittest
+
+import travel_budget
+from travel_budget import price_all, rank_all
+from travel_engine import TravelEngine, get_engine
+
+
+class TestBatchedBudget(unittest.TestCase):
+    def setUp(self):
+        self.engine = get_engine()
+        self.costs = self.engine.kb.daily_costs
+
+    @unittest.skipIf(travel_budget.np is None, "numpy is not installed")
+    def test_matches_calculate_package(self):
+        """Every cell of the batch agrees with the single-country calculation."""
+        requests = [(budget, people, lo, hi) for budget in (300, 900, 2000, 5000)
+                    for people in (1, 2, 4) for lo, hi in ((3, 7), (5, 5))]
+        countries, affordable, nights, cost, fits = price_all(self.costs, *zip(*requests))
+        for row, (budget, people, lo, hi) in enumerate(requests):
+            for col, country in enumerate(countries):
+                reply = self.engine.calculate_package(
+                    {"country": country, "people": people, "budget": budget, "min_nights": lo, "max_nights": hi})
+                if fits[row, col]:
+                    self.assertIn(f"**Recommended Stay:** {nights[row, col]} Nights", reply)
+                    self.assertIn(f"**Estimated Total Cost:** ${cost[row, col]} ", reply)
+                else:
+                    self.assertIn(f"**{affordable[row, col]} nights**", reply)
+
+    def test_ranking_order(self):
+        ranked = rank_all(self.costs, [3000, 100], [4, 2], [5, 5], [7, 7])
+        self.assertEqual(ranked[1], [])
+        stays = [(-nights, cost) for _, nights, cost in ranked[0]]
+        self.assertEqual(stays, sorted(stays))
+        self.assertEqual(ranked[0][0][0], "india")
+
+    @unittest.skipIf(travel_budget.np is None, "numpy is not installed")
+    def test_python_fallback_agrees(self):
+        args = (self.costs, [800, 3000, 12000], [1, 4, 3], [3, 5, 2], [7, 7, 14])
+        vectorized = rank_all(*args)
+        numpy, travel_budget.np = travel_budget.np, None
+        try:
+            self.assertEqual(rank_all(*args), vectorized)
+        finally:
+            travel_budget.np = numpy
+
+    def test_huge_numbers_do_not_overflow(self):
+        huge = 99999999999999999999999
+        ranked = rank_all(self.costs, [huge, 3000, 10 ** 12], [2, huge, 10 ** 9], [3, 3, 3], [7, 7, 10 ** 9])
+        self.assertEqual([nights for _, nights, _ in ranked[0]], [7] * 5)
+        self.assertEqual(ranked[1], [])
+        self.assertEqual(ranked[2][0][1], 10 ** 12 // (10 ** 9 * min(self.costs.values())))
+        engine = TravelEngine(cache_size=0)
+        _, reply = engine.respond(TravelEngine.new_state(), f"where can I go for ${huge}")
+        self.assertIn(f"Destinations that fit ${huge}", reply)
+        _, reply = engine.respond(TravelEngine.new_state(), f"where can {huge} people go for $3000")
+        self.assertIn("does not cover", reply)
+
+    def test_budget_fit_intent(self):
+        _, reply = TravelEngine(cache_size=0).respond(TravelEngine.new_state(),
+                                                      "Where can 4 people go for $3000 for 5-7 nights?")
+        self.assertIn("Destinations that fit $3000 for 4 people (5-7 nights)", reply)
+        self.assertEqual(len(re.findall(r"^- \*\*", reply, re.MULTILINE)), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from bench_travel_bot import compare_results, latency_stats
+from travel_corpus import CORPUS_INTENTS, generate_corpus, intent_matches
+from travel_engine import TravelEngine
+
+
+class TestCorpus(unittest.TestCase):
+    def test_deterministic(self):
+        corpus = generate_corpus(200, seed=3)
+        self.assertEqual(corpus, generate_corpus(200, seed=3))
+        self.assertNotEqual(corpus, generate_corpus(200, seed=4))
+        self.assertEqual(list(corpus), list(CORPUS_INTENTS))
+        self.assertTrue(all(len(utterances) == 200 for utterances in corpus.values()))
+
+    def test_every_utterance_reaches_its_intent(self):
+        engine = TravelEngine(cache_size=0)
+        for corpus_intent, utterances in generate_corpus(300).items():
+            for text in utterances:
+                intent = engine.reply(TravelEngine.new_state(), text)[1].intent
+                self.assertTrue(intent_matches(corpus_intent, intent), (corpus_intent, intent, text))
+
+
+class TestRegressionCheck(unittest.TestCase):
+    def test_latency_stats(self):
+        stats = latency_stats([i * 1000 for i in range(1, 101)])
+        self.assertEqual((stats["calls"], stats["p50_us"], stats["p95_us"], stats["p99_us"]), (100, 51.0, 96.0, 100.0))
+        self.assertEqual(stats["per_second"], round(100 / sum(range(1, 101)) * 1e6))
+
+    def test_compare_results(self):
+        baseline = {"detect_country": {"p50_us": 5.0, "p95_us": 10.0}, "gone": {"p50_us": 1.0, "p95_us": 1.0}}
+        self.assertEqual(compare_results({"detect_country": {"p50_us": 6.0, "p95_us": 12.0}}, baseline, 0.25), [])
+        regressions = compare_results({"detect_country": {"p50_us": 7.0, "p95_us": 10.0},
+                                       "new": {"p50_us": 9.0, "p95_us": 9.0}}, baseline, 0.25)
+        self.assertEqual(regressions, ["detect_country p50_us: 5.00 -> 7.00 us (+40%)"])
+        # Below the noise floor nothing counts, however large the ratio.
+        self.assertEqual(compare_results({"gone": {"p50_us": 1.4, "p95_us": 1.4}}, baseline, 0.25), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
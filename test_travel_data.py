@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+
+import travel_data
+from travel_data import DataFile, DataFileError, default_data, load_knowledge_base, write_knowledge_base
+from travel_engine import KnowledgeBase, TravelEngine
+
+QUESTIONS = ["Visa from India to Italy", "Visa from Thailand to China", "What is the currency in Japan?",
+             "Do I need to tip in USA?", "What to visit in Spain?", "Where can 2 people go for $3000?",
+             "Plan a trip for 2 people, $4000, 10 nights: Italy + Spain + Poland", "Pack for iceland"]
+
+
+class TestDataFile(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "kb.bin")
+        write_knowledge_base(self.path, default_data(), revision=1)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_same_replies_as_builtin_data(self):
+        builtin = TravelEngine(cache_size=0)
+        loaded = TravelEngine(load_knowledge_base(self.path), cache_size=0)
+        for question in QUESTIONS:
+            self.assertEqual(loaded.respond(TravelEngine.new_state(), question),
+                             builtin.respond(TravelEngine.new_state(), question), question)
+        self.assertEqual(list(loaded.kb.visa_matrix.table), list(builtin.kb.visa_matrix.table))
+        self.assertEqual(dict(loaded.kb.daily_costs), dict(builtin.kb.daily_costs))
+
+    def test_country_without_info(self):
+        data = dict(default_data(), country_attractions=dict(default_data()["country_attractions"], portugal=["Belém Tower"]))
+        write_knowledge_base(self.path, data)
+        kb = load_knowledge_base(self.path)
+        self.assertNotIn("portugal", kb.country_info)
+        self.assertEqual(list(kb.country_attractions["portugal"]), ["Belém Tower"])
+        loaded = TravelEngine(kb, cache_size=0, precompile=True)
+        in_memory = TravelEngine(KnowledgeBase(data["country_attractions"], data["country_info"], data["daily_costs"],
+                                               data["destinations"], data["packing_lists"]), cache_size=0)
+        for question in ("currency in portugal", "best time to visit portugal", "what to visit in portugal"):
+            self.assertEqual(loaded.respond(TravelEngine.new_state(), question),
+                             in_memory.respond(TravelEngine.new_state(), question), question)
+
+    def test_visa_groups_are_sets(self):
+        kb = load_knowledge_base(self.path)
+        self.assertIsInstance(kb.visa_groups["schengen"], frozenset)
+        self.assertEqual(kb.visa_groups["schengen"], TravelEngine(cache_size=0).kb.visa_groups["schengen"])
+
+    def test_records_are_decoded_lazily(self):
+        kb = load_knowledge_base(self.path)
+        self.assertEqual(kb.revision, 1)
+        self.assertEqual(kb.country_info._decoded, {})
+        self.assertEqual(kb.country_info["japan"]["currency"], "Japanese Yen (JPY)")
+        self.assertEqual(list(kb.country_info._decoded), ["japan"])
+        with self.assertRaises(TypeError):
+            kb.country_info["japan"]["currency"] = "?"
+
+    def test_hot_reload_keeps_dialogues(self):
+        data_file = DataFile(self.path)
+        engine = TravelEngine(data_file.load())
+        state, _ = engine.respond(TravelEngine.new_state(), "Create a travel package for Poland")
+        self.assertIsNone(data_file.reload_if_changed(engine))
+
+        data = default_data()
+        data["daily_costs"] = dict(data["daily_costs"], poland=45)
+        data["country_info"] = dict(data["country_info"], japan=dict(data["country_info"]["japan"], tip="Updated tip."))
+        write_knowledge_base(self.path, data, revision=2)
+        self.assertEqual(data_file.reload_if_changed(engine).revision, 2)
+
+        state, _ = engine.respond(state, "2 people")
+        _, reply = engine.respond(state, "budget 900")
+        self.assertIn("Approx. $45/person/day", reply)
+        self.assertIn("Updated tip.", engine.respond(TravelEngine.new_state(), "tip in japan")[1])
+
+    def test_broken_file_keeps_current_data(self):
+        data_file = DataFile(self.path)
+        engine = TravelEngine(data_file.load())
+        with open(self.path, "wb") as handle: handle.write(b"not a knowledge base")
+        with self.assertRaises(DataFileError):
+            load_knowledge_base(self.path)
+        self.assertIsNone(data_file.reload_if_changed(engine))
+        self.assertEqual(engine.kb.revision, 1)
+
+    def test_cli_round_trip(self):
+        source = os.path.join(self.directory.name, "data.json")
+        travel_data.main(["export-json", source])
+        travel_data.main(["build", self.path, "--from", source, "--revision", "7"])
+        self.assertEqual(load_knowledge_base(self.path).revision, 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
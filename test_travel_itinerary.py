@@ -0,0 +1,89 @@
+import itertools
+import time
+import unittest
+
+from travel_engine import TravelEngine
+from travel_itinerary import MAX_NIGHTS, plan_itinerary
+
+
+def brute_force(countries, costs, sights, people, budget, nights, min_leg):
+    """Best (attractions, nights, -cost) over every possible split."""
+    best = (0, 0, 0)
+    options = [0] + list(range(min_leg, nights + 1))
+    for stays in itertools.product(options, repeat=len(countries)):
+        cost = sum(stay * costs[c] * people for c, stay in zip(countries, stays))
+        if sum(stays) > nights or cost > budget: continue
+        covered = sum(min(stay, sights[c]) for c, stay in zip(countries, stays))
+        best = max(best, (covered, sum(stays), -cost))
+    return best
+
+
+class TestPlanItinerary(unittest.TestCase):
+    costs = {"a": 50, "b": 120, "c": 200, "d": 80}
+    sights = {"a": 2, "b": 4, "c": 3, "d": 1}
+
+    def test_matches_brute_force(self):
+        for budget in (0, 300, 900, 1500, 4000):
+            for nights in (1, 4, 7, 10):
+                plan = plan_itinerary(list(self.costs), self.costs, self.sights, 2, budget, nights)
+                expected = brute_force(list(self.costs), self.costs, self.sights, 2, budget, nights, 2)
+                self.assertEqual((plan.attractions, plan.nights, -plan.cost), expected, (budget, nights))
+                self.assertTrue(all(leg.nights >= 2 for leg in plan.legs))
+
+    def test_nights_objective(self):
+        plan = plan_itinerary(["a", "c"], self.costs, self.sights, 1, 1000, 10, objective="nights")
+        self.assertEqual(plan.nights, 10)
+        self.assertEqual([(leg.country, leg.nights) for leg in plan.legs], [("a", 7), ("c", 3)])
+
+    def test_absurd_night_count_is_capped(self):
+        plan = plan_itinerary(list(self.costs), self.costs, self.sights, 2, 4000, 1000000)
+        self.assertEqual(plan.max_nights, MAX_NIGHTS)
+        self.assertLessEqual(plan.nights, MAX_NIGHTS)
+        expected = brute_force(["a", "b"], self.costs, self.sights, 2, 4000, 30, 2)
+        self.assertEqual(plan_itinerary(["a", "b"], self.costs, self.sights, 2, 4000, 10 ** 9).attractions, expected[0])
+
+    def test_excluded_and_skipped(self):
+        plan = plan_itinerary(["a", "b", "c"], self.costs, self.sights, 1, 300, 5, excluded={"b": "visa required"})
+        self.assertNotIn("b", [leg.country for leg in plan.legs])
+        self.assertIn(("b", "visa required"), plan.skipped)
+        self.assertEqual({country for country, _ in plan.skipped} | {leg.country for leg in plan.legs}, {"a", "b", "c"})
+        with self.assertRaises(ValueError):
+            plan_itinerary(["a"], self.costs, self.sights, 1, 300, 5, objective="fun")
+
+
+class TestItineraryIntent(unittest.TestCase):
+    def setUp(self):
+        self.engine = TravelEngine(cache_size=0)
+
+    def test_one_message(self):
+        _, reply = self.engine.respond(TravelEngine.new_state(),
+                                       "Plan a trip for 2 people, $4000, 10 nights: Italy + Spain + Poland")
+        self.assertIn("Multi-country Package: Italy + Spain + Poland", reply)
+        plan = self.engine.plan_itinerary(["italy", "spain", "poland"], 2, 4000, 10)
+        self.assertIn(f"**Total:** {plan.nights} Nights, {plan.attractions} attractions, approx. ${plan.cost}", reply)
+        self.assertLessEqual(plan.cost, 4000)
+
+    def test_absurd_night_count(self):
+        started = time.perf_counter()
+        _, reply = self.engine.respond(TravelEngine.new_state(), "plan a package italy + spain 2 people $4000 10000 nights")
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertIn(f"at most {MAX_NIGHTS} nights, not 10000", reply)
+        self.assertIn("up to **60 nights**", reply)
+
+    def test_dialogue_and_origin(self):
+        state, reply = self.engine.respond(TravelEngine.new_state(), "Plan a package from India to Italy and Thailand")
+        self.assertEqual(state["data"]["countries"], ["italy", "thailand"])
+        self.assertEqual(state["data"]["origin"], "india")
+        state, _ = self.engine.respond(state, "2 people")
+        state, reply = self.engine.respond(state, "budget 2000, 6 nights")
+        self.assertIsNone(state["state"])
+        self.assertIn("~~Italy~~ skipped: visa required for India citizens", reply)
+        self.assertIn("- **Thailand:** 6 nights", reply)
+
+    def test_single_country_unchanged(self):
+        _, reply = self.engine.respond(TravelEngine.new_state(), "Plan a package for Poland for 2 people, budget 900")
+        self.assertIn("Custom Package for Poland", reply)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import unittest
+
+from travel_load import FINAL_MARKERS, HTTPDriver, InProcessDriver, customers, drive, run_load, session_memory
+from travel_server import ChatServer
+
+
+class TestCustomers(unittest.TestCase):
+    def test_scripts_are_reproducible(self):
+        first, again = customers(50, seed=1), customers(50, seed=1)
+        self.assertEqual([c.message for c in first], [c.message for c in again])
+        self.assertEqual([c.message for c in customers(50, seed=1, first_index=1, step=2)],
+                         [c.message for c in first[1::2]])
+        reply = "Okay, for 2 people. What is your total budget for the trip (in USD/EUR)?"
+        self.assertEqual([c.answer(reply) for c in first], [c.answer(reply) for c in again])
+        self.assertIsNone(first[0].answer("🎉 **Custom Package for Poland** 🎉\n\n..."))
+
+
+class TestLoad(unittest.TestCase):
+    def test_every_dialogue_completes(self):
+        driver = InProcessDriver()
+        dialogues = customers(200, seed=2)
+        latencies, completions, turns, errors = drive(driver, dialogues, workers=4)
+        self.assertEqual(errors, 0)
+        self.assertEqual(len(completions), 200)
+        self.assertEqual(len(latencies), turns)
+        self.assertEqual(turns, sum(dialogue.turns for dialogue in dialogues))
+        self.assertTrue(all(dialogue.finished >= dialogue.started for dialogue in dialogues))
+        self.assertEqual(len(driver.server.store), 200)
+
+    def test_summary_and_process_pool(self):
+        serial = run_load(40, workers=2, seed=3)
+        pooled = run_load(40, workers=2, processes=2, seed=3)
+        for summary in (serial, pooled):
+            self.assertEqual((summary["completed"], summary["errors"]), (40, 0))
+            self.assertLessEqual(summary["turn_ms"]["p50"], summary["turn_ms"]["p99"])
+        # The same scripts whichever process runs them.
+        self.assertEqual(serial["turns"], pooled["turns"])
+
+    def test_memory_per_session(self):
+        self.assertGreater(session_memory(100), 0)
+
+    def test_http_driver(self):
+        loop = asyncio.new_event_loop()
+        server = ChatServer()
+        host, port = loop.run_until_complete(server.start("127.0.0.1", 0))
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            driver = HTTPDriver(f"http://{host}:{port}")
+            _, completions, _, errors = drive(driver, customers(20, seed=4), workers=4)
+            self.assertEqual((len(completions), errors), (20, 0))
+            reply = driver.turn("http-1", "Plan a package for Poland: 2 people, budget 900, 3 nights")
+            self.assertTrue(reply.startswith(FINAL_MARKERS))
+            driver.close()
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), loop).result()  # Let the handlers see EOF.
+        finally:
+            asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import unittest
+
+from travel_engine import STAGES, TravelEngine
+from travel_metrics import Histogram, Metrics
+from travel_server import ChatServer, HTTPError
+
+MESSAGES = ["Hello there", "Visa from USA to Japan", "What is the currency in Japan?", "What to visit in France?",
+            "Plan a package for Turkey for 2 people budget 1500 5 nights", "kdsjfklsdjfkl"]
+
+
+class TestHistogram(unittest.TestCase):
+    def test_buckets_and_quantiles(self):
+        histogram = Histogram((1.0, 2.0, 4.0))
+        for value in (0.5, 1.5, 1.5, 3.0, 10.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [(1.0, 1), (2.0, 3), (4.0, 4), ("+Inf", 5)])
+        self.assertEqual(histogram.count, 5)
+        self.assertAlmostEqual(histogram.quantile(0.5), 1.75)
+        self.assertEqual(histogram.quantile(1.0), 4.0)
+        self.assertEqual(Histogram().quantile(0.5), 0.0)
+
+
+class TestStageMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+        self.engine = TravelEngine(cache_size=0, metrics=self.metrics)
+
+    def test_replies_unchanged(self):
+        plain = TravelEngine(cache_size=0)
+        for message in MESSAGES:
+            self.assertEqual(self.engine.respond(TravelEngine.new_state(), message),
+                             plain.respond(TravelEngine.new_state(), message))
+
+    def test_stages_runs_and_matches(self):
+        self.engine.respond(TravelEngine.new_state(), "Visa from USA to Japan")
+        self.assertEqual([stage for stage in self.metrics.stages], ["package_state", "package_trigger", "visa"])
+        self.assertEqual(self.metrics.matches, {"visa": 1})
+        self.assertEqual(self.metrics.calls["detect_country"].count, 1)
+
+        self.engine.respond(TravelEngine.new_state(), "kdsjfklsdjfkl")
+        self.assertEqual(set(self.metrics.stages), {name for name, _ in STAGES})
+        self.assertEqual(self.metrics.matches["fallback"], 1)
+        self.engine.respond(TravelEngine.new_state(), MESSAGES[4])
+        self.assertEqual(self.metrics.calls["extract_package_details"].count, 1)
+
+    def test_exports(self):
+        for message in MESSAGES:
+            self.engine.respond(TravelEngine.new_state(), message)
+        text = self.metrics.to_prometheus()
+        self.assertIn("# TYPE wanderlust_stage_seconds histogram", text)
+        self.assertIn('wanderlust_stage_seconds_count{stage="package_state"} 6', text)
+        self.assertIn('wanderlust_stage_seconds_bucket{stage="package_state",le="+Inf"} 6', text)
+        self.assertIn('wanderlust_stage_matches_total{stage="visa"} 1', text)
+        dumped = json.loads(self.metrics.to_json())
+        self.assertEqual(dumped["stages"]["package_state"]["count"], 6)
+        self.assertEqual(sum(row["matches"] or 0 for row in self.metrics.summary()), len(MESSAGES))
+
+    def test_server_endpoints(self):
+        server = ChatServer(self.engine)
+        server.chat({"message": "Visa from USA to Japan"})
+        self.assertIn("wanderlust_stage_seconds_bucket", server.route("GET", "/metrics", b""))
+        self.assertEqual(server.route("GET", "/metrics.json", b"")["stages"]["visa"]["matches"], 1)
+        with self.assertRaises(HTTPError):
+            ChatServer(TravelEngine()).route("GET", "/metrics", b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
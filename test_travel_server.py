@@ -0,0 +1,179 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from travel_engine import TravelEngine, get_engine
+from travel_server import ChatServer
+from travel_sessions import MemorySessionStore, SQLiteSessionStore, decode_state, encode_state
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMemorySessionStore(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = MemorySessionStore(ttl=60, max_sessions=3, clock=self.clock)
+
+    def test_idle_sessions_expire(self):
+        self.store.put("a", {"state": None})
+        self.clock.now = 30
+        self.store.put("b", {"state": None})
+        self.clock.now = 61
+        self.assertIsNone(self.store.get("a"))
+        self.assertIsNotNone(self.store.get("b"))
+        self.clock.now = 200
+        self.assertEqual(self.store.expire(), 1)
+        self.assertEqual(len(self.store), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        for session_id in "abc": self.store.put(session_id, {})
+        self.store.get("a")
+        self.store.put("d", {})
+        self.assertNotIn("b", self.store)
+        self.assertIn("a", self.store)
+        self.assertEqual(len(self.store), 3)
+
+
+class TestSQLiteSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "sessions.db")
+        self.clock = FakeClock()
+        self.store = SQLiteSessionStore(self.path, ttl=60, batch_size=3, max_delay=10, clock=self.clock)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_encoding_round_trip(self):
+        state = {"state": "planning_package", "data": {"country": "poland", "people": 2}}
+        self.assertEqual(decode_state(encode_state(state)), state)
+        self.assertEqual(encode_state(TravelEngine.new_state()), b"[null,{}]")
+
+    def test_another_worker_resumes_a_dialogue(self):
+        engine = get_engine()
+        state, _ = engine.respond(TravelEngine.new_state(), "Create a travel package for Poland")
+        self.store.put("s1", state)
+        self.store.flush()
+
+        other = SQLiteSessionStore(self.path, ttl=60, clock=self.clock)
+        try:
+            state, _ = engine.respond(other.get("s1"), "2 people")
+            _, reply = engine.respond(state, "budget 900")
+        finally:
+            other.close()
+        self.assertIn("**Recommended Stay:** 5 Nights", reply)
+
+    def test_writes_are_batched_and_skipped_when_unchanged(self):
+        state = TravelEngine.new_state()
+        self.store.put("a", state)
+        self.store.put("b", state)
+        self.assertEqual(self.store.writes, 0)  # Still buffered, but readable.
+        self.assertEqual(self.store.get("a"), state)
+        self.store.put("a", state)  # Unchanged: no write queued.
+        self.store.put("c", state)
+        self.assertEqual(self.store.writes, 3)  # Batch of three committed together.
+        self.store.put("c", {"state": "planning_package", "data": {"country": "japan"}})
+        self.store.flush()
+        self.assertEqual(self.store.writes, 4)
+
+    def test_idle_sessions_expire(self):
+        self.store.put("a", TravelEngine.new_state())
+        self.clock.now = 30
+        self.store.put("b", TravelEngine.new_state())
+        self.store.flush()
+        self.clock.now = 61
+        self.assertIsNone(self.store.get("a"))
+        self.assertEqual(len(self.store), 1)
+        self.clock.now = 200
+        self.assertEqual(self.store.expire(), 1)
+        self.assertEqual(len(self.store), 0)
+
+
+class TestChatServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = ChatServer()
+        self.host, self.port = await self.server.start("127.0.0.1", 0)
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        await self.server.close()
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            headers[name.lower()] = value.strip()
+        return status, json.loads(await self.reader.readexactly(int(headers["content-length"])))
+
+    async def test_multi_turn_dialogue(self):
+        """Context survives between requests on one keep-alive connection."""
+        status, first = await self.request("POST", "/chat", {"message": "Create a travel package for Poland"})
+        self.assertEqual(status, 200)
+        self.assertIn("how many people", first["reply"].lower())
+        session = {"session_id": first["session_id"]}
+        await self.request("POST", "/chat", {**session, "message": "2 people"})
+        _, last = await self.request("POST", "/chat", {**session, "message": "budget 900"})
+        self.assertIn("**Recommended Stay:** 5 Nights", last["reply"])
+
+    async def test_structured_result(self):
+        _, plain = await self.request("POST", "/chat", {"message": "Visa from USA to Japan"})
+        self.assertNotIn("result", plain)
+        _, structured = await self.request("POST", "/chat", {"message": "Visa from USA to Japan", "structured": True})
+        self.assertEqual(structured["reply"], plain["reply"])
+        result = structured["result"]
+        self.assertEqual((result["intent"], result["stage"], result["visa"]), ("visa", "visa", ["usa", "japan"]))
+        self.assertEqual(result["text"], plain["reply"])
+
+    async def test_sessions_are_isolated(self):
+        await self.request("POST", "/chat", {"session_id": "one", "message": "Plan a trip to Thailand"})
+        _, other = await self.request("POST", "/chat", {"session_id": "two", "message": "2 people"})
+        self.assertIn("I can help with", other["reply"])
+        _, health = await self.request("GET", "/health")
+        self.assertEqual(health["sessions"], 2)
+
+    async def test_suggest(self):
+        status, result = await self.request("GET", "/suggest?q=currency%20in%20ja&limit=2")
+        self.assertEqual(status, 200)
+        self.assertEqual(result["query"], "currency in ja")
+        self.assertEqual(result["suggestions"][0], {"text": "currency in Japan?", "kind": "question", "country": "japan"})
+        self.assertEqual(len(result["suggestions"]), 2)
+        self.assertEqual(len((await self.request("GET", "/suggest"))[1]["suggestions"]), 5)
+        self.assertEqual((await self.request("GET", "/suggest?q=ja&limit=0"))[0], 400)
+        self.assertEqual((await self.request("POST", "/suggest"))[0], 405)
+
+    async def test_errors(self):
+        self.assertEqual((await self.request("POST", "/chat", {"message": ""}))[0], 400)
+        self.assertEqual((await self.request("GET", "/chat"))[0], 405)
+        self.assertEqual((await self.request("GET", "/nope"))[0], 404)
+
+    async def test_unexpected_error_is_a_500(self):
+        class BrokenEngine(TravelEngine):
+            def reply(self, state, user_input):
+                raise RuntimeError("boom")
+
+        self.server.engine = BrokenEngine(cache_size=0)
+        with contextlib.redirect_stderr(io.StringIO()) as log:
+            status, result = await self.request("POST", "/chat", {"message": "hello"})
+        self.assertEqual((status, result), (500, {"error": "Internal Server Error"}))
+        self.assertIn("RuntimeError: boom", log.getvalue())
+        self.assertEqual((await self.request("GET", "/health"))[0], 200)  # Same connection still works
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from travel_engine import COUNTRY_ATTRACTIONS, COUNTRY_INFO, DAILY_COSTS, DESTINATIONS, PACKING_LISTS, KnowledgeBase, TravelEngine, get_knowledge_base
+from travel_suggest import QUESTION_TEMPLATES, SuggestionIndex
+
+
+class TestSuggestionIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.index = SuggestionIndex(get_knowledge_base())
+
+    def texts(self, text, limit=5):
+        return [s.text for s in self.index.suggest(text, limit)]
+
+    def test_completes_country_slot(self):
+        first = self.index.suggest("currency in ja")[0]
+        self.assertEqual((first.text, first.kind, first.country), ("currency in Japan?", "question", "japan"))
+        self.assertEqual(self.texts("Visa from usa to ja")[0], "Visa from usa to Japan?")
+
+    def test_completes_template_text(self):
+        self.assertEqual(self.texts("what is the cur")[0], "what is the currency in Lithuania?")
+        self.assertIn("Do I need a visa from USA to Lithuania?", self.texts("Do I need a visa from USA"))
+        self.assertEqual(len(self.texts("currency in ")), 5)  # Example countries for the empty slot
+
+    def test_completes_names(self):
+        self.assertEqual(self.texts("eiff"), ["Eiffel Tower (France)"])
+        self.assertEqual(self.texts("tell me about the colos"), ["tell me about the Colosseum (Italy)"])
+        self.assertEqual(self.texts("visa for united st"), ["visa for United States"])
+        self.assertIn("Eiffel Tower (France)", self.texts("tower"))
+
+    def test_ignores_case_and_diacritics(self):
+        self.assertEqual(self.index.suggest("ką aplankyti Itali")[0].country, "italy")
+        self.assertEqual(self.index.suggest("CURRENCY IN LIETUV")[0].country, "lithuania")
+
+    def test_empty_input_lists_templates(self):
+        self.assertEqual(len(self.texts("", limit=len(QUESTION_TEMPLATES))), len(QUESTION_TEMPLATES))
+        self.assertEqual(self.texts("   ", limit=1), ["Create a travel package for Lithuania"])
+
+    def test_limit_and_no_match(self):
+        self.assertEqual(len(self.texts("sug", limit=2)), 2)
+        self.assertEqual(self.texts("xyzzy"), [])
+        self.assertEqual(self.texts("Do I need a visa from Lithuania to Japan?"), [])
+
+    def test_every_template_is_answered(self):
+        engine = TravelEngine(cache_size=0)
+        for suggestion in self.index.suggest("", limit=len(QUESTION_TEMPLATES)):
+            _, reply = engine.reply(TravelEngine.new_state(), suggestion.text)
+            self.assertNotEqual(reply.intent, "fallback", suggestion.text)
+
+
+class TestEngineSuggest(unittest.TestCase):
+    def test_follows_knowledge_base(self):
+        engine = TravelEngine(cache_size=0)
+        self.assertEqual(engine.suggest("currency in ja")[0].country, "japan")
+        attractions = dict(COUNTRY_ATTRACTIONS, jamaica=["Dunn's River Falls"])
+        engine.use_knowledge_base(KnowledgeBase(attractions, COUNTRY_INFO, DAILY_COSTS, DESTINATIONS, PACKING_LISTS))
+        self.assertIn("jamaica", [s.country for s in engine.suggest("currency in ja")])
+        self.assertEqual(engine.suggest("dunn")[0].text, "Dunn's River Falls (Jamaica)")
+
+
+if __name__ == "__main__":
+    unittest.main()
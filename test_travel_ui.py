@@ -0,0 +1,48 @@
+import unittest
+import sys
+from unittest.mock import MagicMock
+
+# --- MOCK STREAMLIT ---
+# The UI module imports streamlit at module level; the helpers tested here
+# do not need a running Streamlit app.
+sys.modules.setdefault("streamlit", MagicMock())
+
+from travel_bot import ChatHistory, reply_chunks
+
+
+class TestReplyStreaming(unittest.TestCase):
+    def test_chunks_rebuild_reply(self):
+        response = "Top things to see in **France**: \n- Eiffel Tower\n- Louvre Museum"
+        chunks = list(reply_chunks(response))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), response.rstrip())
+
+    def test_first_chunk_callback(self):
+        calls = []
+        chunks = reply_chunks("Hello there traveller", lambda: calls.append(1))
+        self.assertEqual(calls, [])
+        next(chunks)
+        self.assertEqual(calls, [1])
+        list(chunks)
+        self.assertEqual(calls, [1])
+
+
+class TestChatHistory(unittest.TestCase):
+    def test_window_is_bounded(self):
+        history = ChatHistory(size=4, archive_size=6)
+        for i in range(20): history.append("user", str(i))
+        self.assertEqual([m["content"] for m in history.recent], ["16", "17", "18", "19"])
+        self.assertEqual([m["content"] for m in history.archive], ["10", "11", "12", "13", "14", "15"])
+        self.assertEqual(history.dropped, 10)
+        self.assertEqual(len(history), 10)
+
+    def test_clear(self):
+        history = ChatHistory(size=2, archive_size=2)
+        for i in range(5): history.append("assistant", str(i))
+        history.clear()
+        self.assertEqual(len(history), 0)
+        self.assertEqual(history.dropped, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,225 @@
+"""Streaming analytics over chat logs: what do users ask about?
+
+    python travel_analytics.py chats.jsonl more_chats.jsonl.gz --top 10 --json report.json
+
+Every user turn in the logs is answered by the bot's own engine, and the
+structured Reply it returns is aggregated: the deciding stage's intent, the
+countries detected, the visa origin/destination and the package fields. The
+report has:
+- intent counts and the fallback rate;
+- the top countries and visa origin -> destination pairs;
+- a budget histogram;
+- throughput in lines per second.
+
+Each JSONL line may be:
+- a Streamlit message list (``[{"role": "user", "content": ...}, ...]``),
+  optionally wrapped as ``{"messages": [...]}``;
+- a travel_batch.py conversation (``{"session_id": ..., "turns": [...]}``);
+- a single message (``{"session_id": ..., "role": "user", "content": ...}``,
+  or a chat request ``{"session_id": ..., "message": ...}``).
+
+The pipeline is a chain of generators. Memory stays constant however large
+the input is:
+- only one line is held at a time;
+- dialogue state is kept for at most ``max_sessions`` single-message
+  sessions (least recently used first out);
+- the top-K tables are Space-Saving counters of fixed capacity.
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+from collections import Counter, OrderedDict
+
+from travel_engine import TravelEngine, get_engine, get_knowledge_base
+from travel_metrics import Histogram
+
+BUDGET_BUCKETS = (250, 500, 1000, 1500, 2000, 3000, 5000, 10000, 20000)
+
+
+# --- READING ---
+def read_lines(paths):
+    """Lines of every file in turn; ``-`` is stdin and ``.gz`` files are decompressed on the fly."""
+    for path in paths:
+        if path == "-":
+            yield from sys.stdin
+            continue
+        with (gzip.open(path, "rt", encoding="utf-8") if path.endswith(".gz") else open(path, encoding="utf-8")) as f:
+            yield from f
+
+
+def parse_records(lines, report):
+    """Yields ``(session_id, [user message, ...], whole_conversation)`` per log line; unreadable lines are counted."""
+    for line in lines:
+        report.lines += 1
+        if not line.strip(): continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            report.bad_lines += 1
+            continue
+        if isinstance(record, dict) and isinstance(record.get("messages"), list): record = record["messages"]
+        if isinstance(record, list):
+            yield None, [m.get("content") for m in record if isinstance(m, dict) and m.get("role") == "user"], True
+        elif not isinstance(record, dict):
+            report.bad_lines += 1
+        elif isinstance(record.get("turns"), list):
+            messages = [turn.get("message") if isinstance(turn, dict) else turn for turn in record["turns"]]
+            yield record.get("session_id"), messages, True
+        elif "message" in record:
+            yield record.get("session_id"), [record["message"]], False
+        elif "content" in record:
+            if record.get("role", "user") == "user": yield record.get("session_id"), [record["content"]], False
+        elif "replies" not in record:  # travel_batch.py output holds no user messages
+            report.bad_lines += 1
+
+
+# --- CLASSIFICATION ---
+def classify_turns(records, engine=None, max_sessions=10000, sessions=None):
+    """Yields the engine's Reply per user message, threading the dialogue state through each conversation.
+
+    ``sessions`` (an OrderedDict, created when not given) holds the state of
+    single-message-per-line sessions, at most ``max_sessions`` of them.
+    """
+    engine = engine or get_engine()
+    sessions = OrderedDict() if sessions is None else sessions
+    for session_id, messages, whole_conversation in records:
+        if whole_conversation or session_id is None:
+            state = TravelEngine.new_state()
+        else:
+            state = sessions.pop(session_id, None) or TravelEngine.new_state()
+        for message in messages:
+            if not isinstance(message, str) or not message.strip(): continue
+            state, reply = engine.reply(state, message)
+            yield reply
+        if session_id is not None and not whole_conversation:
+            sessions[session_id] = state
+            if len(sessions) > max_sessions: sessions.popitem(last=False)
+
+
+# --- AGGREGATES ---
+class TopK:
+    """Space-Saving heavy-hitter counter with at most ``capacity`` keys.
+
+    Once full, a new key takes over the smallest counter (and its count), so
+    counts can only be overestimated, by at most the evicted count; keys that
+    are really frequent are never lost. Keys are kept in buckets by count
+    (the stream-summary structure), so add() is O(1) even when every call
+    evicts.
+    """
+
+    __slots__ = ("capacity", "counts", "evictions", "_buckets", "_least")
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = {}
+        self.evictions = 0
+        self._buckets = {}  # count -> keys with that count, oldest first (dict as an ordered set)
+        self._least = 0  # smallest count in use
+
+    def __len__(self):
+        return len(self.counts)
+
+    def add(self, key):
+        counts, buckets = self.counts, self._buckets
+        count = counts.get(key)
+        if count is None:
+            if len(counts) < self.capacity:
+                count = 0
+            else:
+                count = self._least
+                victim = next(iter(buckets[count]))
+                self._unbucket(victim, count)
+                del counts[victim]
+                self.evictions += 1
+        else:
+            self._unbucket(key, count)
+        counts[key] = count + 1
+        buckets.setdefault(count + 1, {})[key] = None
+        if count == 0 or count == self._least and count not in buckets: self._least = count + 1
+
+    def _unbucket(self, key, count):
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket: del self._buckets[count]
+
+    def most_common(self, k):
+        return sorted(self.counts.items(), key=lambda item: (-item[1], str(item[0])))[:k]
+
+
+class LogReport:
+    """Running totals over the classified turns."""
+
+    def __init__(self, top_capacity=1000, countries=None):
+        # Visa pairs are only counted when both sides are among ``countries`` (default: every country
+        # the knowledge base knows), so unresolved words ("visa from foo12 to bar3") do not churn the table.
+        self.known = frozenset(countries if countries is not None else get_knowledge_base().lexicon.names.values())
+        self.lines = self.bad_lines = self.turns = 0
+        self.intents = Counter()
+        self.countries = TopK(top_capacity)
+        self.visa_pairs = TopK(top_capacity)
+        self.budgets = Histogram(BUDGET_BUCKETS)
+        self.seconds = 0.0
+
+    def add(self, reply):
+        self.turns += 1
+        self.intents[reply.intent] += 1
+        for country in reply.countries: self.countries.add(country)
+        visa = reply.visa
+        if visa and visa[0] in self.known and visa[1] in self.known: self.visa_pairs.add(visa)
+        budget = reply.package.get("budget") if reply.package else None
+        if budget is not None: self.budgets.observe(budget)
+
+    @property
+    def fallback_rate(self):
+        return self.intents["fallback"] / self.turns if self.turns else 0.0
+
+    def to_dict(self, top=10):
+        budgets = self.budgets
+        return {
+            "lines": self.lines, "bad_lines": self.bad_lines, "turns": self.turns,
+            "seconds": round(self.seconds, 3), "lines_per_second": round(self.lines / self.seconds) if self.seconds else None,
+            "intents": dict(self.intents.most_common()), "fallback_rate": round(self.fallback_rate, 4),
+            "top_countries": self.countries.most_common(top),
+            "top_visa_pairs": [[f"{origin} -> {dest}", count] for (origin, dest), count in self.visa_pairs.most_common(top)],
+            "budgets": {"count": budgets.count, "mean": round(budgets.sum / budgets.count) if budgets.count else None,
+                        "median": round(budgets.quantile(0.5)), "buckets": budgets.cumulative()},
+        }
+
+
+def analyze(lines, engine=None, max_sessions=10000, top_capacity=1000):
+    """Runs the whole pipeline over an iterable of log lines and returns the LogReport."""
+    engine = engine or get_engine()
+    report = LogReport(top_capacity, engine.kb.lexicon.names.values())
+    started = time.perf_counter()
+    for reply in classify_turns(parse_records(lines, report), engine, max_sessions):
+        report.add(reply)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Intent, country and budget analytics over chat logs.")
+    parser.add_argument("paths", nargs="+", help="JSONL log files (.gz allowed), or - for stdin.")
+    parser.add_argument("--top", type=int, default=10, help="How many countries and visa pairs to list.")
+    parser.add_argument("--max-sessions", type=int, default=10000,
+                        help="Dialogue states kept for logs with one message per line.")
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON.")
+    args = parser.parse_args(argv)
+
+    result = analyze(read_lines(args.paths), max_sessions=args.max_sessions).to_dict(args.top)
+    print(f"{result['lines']} lines ({result['bad_lines']} unreadable), {result['turns']} user turns "
+          f"in {result['seconds']} s ({result['lines_per_second']} lines/s)")
+    print(f"  fallback rate: {result['fallback_rate']:.1%}")
+    print("  intents: " + ", ".join(f"{intent} {count}" for intent, count in result["intents"].items()))
+    print("  top countries: " + ", ".join(f"{country} {count}" for country, count in result["top_countries"]))
+    print("  top visa pairs: " + ", ".join(f"{pair} {count}" for pair, count in result["top_visa_pairs"]))
+    budgets = result["budgets"]
+    if budgets["count"]: print(f"  budgets: {budgets['count']} mentioned, mean ${budgets['mean']}, median ~${budgets['median']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Offline batch mode: answer a JSONL file of conversations.
+
+    python travel_batch.py conversations.jsonl -o replies.jsonl
+    cat conversations.jsonl | python travel_batch.py - --workers 8 > replies.jsonl
+
+Each input line is one conversation:
+
+    {"session_id": "c-1", "turns": ["Package for Poland", "2 people", "budget 900"]}
+
+(a turn may also be ``{"message": "..."}``). Every conversation is replayed
+through its own RuleBasedChatbot, so multi-turn state carries over, and one
+line is written per conversation, in input order:
+
+    {"session_id": "c-1", "replies": ["...", "...", "..."]}
+
+A line that cannot be read or answered is answered with ``{"line": <number>, "error": "..."}``;
+the rest of the batch carries on.
+
+Conversations are sent to a process pool in chunks, and at most a few
+chunks per worker are in flight at once. Input is read lazily and output is
+written as soon as the next chunk in order is done, so memory stays bounded
+for files of any size. The random choices some replies make (suggestions)
+are seeded per conversation, so the output is byte-for-byte the same as a
+serial run, whatever the number of workers.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from travel_engine import RuleBasedChatbot, get_engine
+
+CHUNK_SIZE = 1000  # Conversations per task sent to a worker process.
+CHUNKS_PER_WORKER = 2  # In flight at once; bounds the memory used by queued input and output.
+
+
+def answer_conversation(conversation, seed=0):
+    """The replies to every turn of one parsed conversation, in order."""
+    turns = conversation.get("turns")
+    if not isinstance(turns, list): raise ValueError("'turns' must be a list")
+    messages = [turn.get("message") if isinstance(turn, dict) else turn for turn in turns]
+    if not all(isinstance(message, str) for message in messages): raise ValueError("every turn must be a string")
+    random.seed(f"{seed}:{conversation.get('session_id')}")
+    bot = RuleBasedChatbot()
+    return [bot.match_rule(message) for message in messages]
+
+
+def answer_chunk(lines, seed=0):
+    """Output lines (without newline) for ``[(line number, line), ...]``, plus the number of turns answered."""
+    output, turns = [], 0
+    for number, line in lines:
+        try:
+            conversation = json.loads(line)
+            if not isinstance(conversation, dict): raise ValueError("a conversation must be a JSON object")
+            replies = answer_conversation(conversation, seed)
+        except Exception as error:  # Bad input, or a bug hit by this conversation only: report it in place.
+            message = str(error) if isinstance(error, ValueError) else f"{type(error).__name__}: {error}"
+            output.append(json.dumps({"line": number, "error": message}, ensure_ascii=False))
+            continue
+        turns += len(replies)
+        output.append(json.dumps({"session_id": conversation.get("session_id"), "replies": replies}, ensure_ascii=False))
+    return output, turns
+
+
+def _chunks(lines, size):
+    """``[(line number, line), ...]`` for every ``size`` non-blank lines, read lazily."""
+    numbered = ((number, line) for number, line in enumerate(lines, 1) if line.strip())
+    while True:
+        chunk = list(itertools.islice(numbered, size))
+        if not chunk: return
+        yield chunk
+
+
+def run_batch(lines, out, workers=None, chunk_size=CHUNK_SIZE, seed=0):
+    """Answers every conversation in ``lines`` and writes the JSONL replies to ``out``; returns (conversations, turns).
+
+    With ``workers=1`` everything runs in this process; otherwise chunks go to
+    a ProcessPoolExecutor (default: one worker per core).
+    """
+    workers = workers or os.cpu_count() or 1
+    conversations = turns = 0
+
+    def write(result):
+        nonlocal conversations, turns
+        output, answered = result
+        if output: out.write("\n".join(output) + "\n")
+        conversations += len(output)
+        turns += answered
+
+    if workers == 1:
+        for chunk in _chunks(lines, chunk_size): write(answer_chunk(chunk, seed))
+        return conversations, turns
+
+    with ProcessPoolExecutor(workers, initializer=get_engine) as pool:
+        pending = deque()  # Futures in input order; the oldest is always written first.
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(pool.submit(answer_chunk, chunk, seed))
+            while len(pending) >= workers * CHUNKS_PER_WORKER: write(pending.popleft().result())
+        while pending: write(pending.popleft().result())
+    return conversations, turns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of conversations.")
+    parser.add_argument("input", help="JSONL conversations, or - for stdin.")
+    parser.add_argument("-o", "--output", default="-", help="Where to write the JSONL replies (default: stdout).")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per core; 1 = no pool).")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Conversations per task.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random choices in replies.")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    started = time.perf_counter()
+    try:
+        conversations, turns = run_batch(source, out, args.workers, args.chunk_size, args.seed)
+    finally:
+        if source is not sys.stdin: source.close()
+        if out is not sys.stdout: out.close()
+    elapsed = time.perf_counter() - started
+    print(f"{conversations} conversations, {turns} turns in {elapsed:.2f} s ({turns / max(elapsed, 1e-9):.0f} turns/s)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Batched budget pricing: every destination x every request at once.
+
+TravelEngine.calculate_package() prices one country for one request. The
+functions here apply the same arithmetic to arrays of requests against all
+countries in ``daily_costs`` with NumPy, for the "what fits my budget" intent
+and for bulk quote jobs. NumPy is imported lazily by the engine, so a plain
+`import travel_engine` stays cheap; without NumPy a pure-Python loop with the
+same results is used.
+"""
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+# Defaults match TravelEngine.calculate_package().
+DEFAULT_PEOPLE = 2
+DEFAULT_MIN_NIGHTS = 3
+DEFAULT_MAX_NIGHTS = 7
+# Requests whose budget or people x daily cost x nights reach this are ranked in
+# pure Python: NumPy's int64 would raise or silently wrap around.
+INT64_LIMIT = 2 ** 63
+
+
+def price_all(daily_costs, budgets, people, min_nights, max_nights):
+    """Prices R requests against C countries.
+
+    Arguments are sequences of length R (scalars are broadcast). Returns
+    ``(countries, affordable, nights, cost, fits)``: the country names and
+    four R x C arrays with the affordable nights, suggested stay, estimated
+    total cost and whether the stay reaches ``min_nights``.
+    """
+    if np is None: raise ImportError("price_all() needs numpy")
+    countries = list(daily_costs)
+    daily = np.fromiter(daily_costs.values(), dtype=np.int64, count=len(countries))
+    budgets, people, min_nights, max_nights = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(a, dtype=np.int64)) for a in (budgets, people, min_nights, max_nights)))
+
+    burn = people[:, None] * daily[None, :]
+    burn = np.where(burn <= 0, 100, burn)  # Safety, as in calculate_package()
+    affordable = budgets[:, None] // burn
+    nights = np.minimum(affordable, max_nights[:, None])
+    return countries, affordable, nights, nights * burn, affordable >= min_nights[:, None]
+
+
+def rank_all(daily_costs, budgets, people, min_nights, max_nights, top=5):
+    """Ranked destinations for every request.
+
+    Per request, countries that fit are ordered by longest stay, then lowest
+    estimated cost. Returns one list of ``(country, nights, cost)`` per request.
+    """
+    if np is None or _overflows(daily_costs, budgets, people, max_nights):
+        return [_rank_python(daily_costs, *request, top)
+                for request in zip(*_as_lists(budgets, people, min_nights, max_nights))]
+
+    countries, _, nights, cost, fits = price_all(daily_costs, budgets, people, min_nights, max_nights)
+    # Sort key per cell: fitting first, then more nights, then cheaper.
+    order = np.lexsort((cost, -nights, ~fits), axis=1)[:, :top]
+    ranked = []
+    for row, columns in enumerate(order):
+        ranked.append([(countries[c], int(nights[row, c]), int(cost[row, c])) for c in columns if fits[row, c]])
+    return ranked
+
+
+def rank_destinations(daily_costs, budget, people=DEFAULT_PEOPLE, min_nights=DEFAULT_MIN_NIGHTS,
+                      max_nights=DEFAULT_MAX_NIGHTS, top=5):
+    """rank_all() for a single request."""
+    return rank_all(daily_costs, [budget], [people], [min_nights], [max_nights], top)[0]
+
+
+def _overflows(daily_costs, budgets, people, max_nights):
+    try:
+        budget, most_people, longest = (int(np.max(np.abs(np.asarray(a, dtype=np.int64)), initial=0))
+                                        for a in (budgets, people, max_nights))
+    except OverflowError:
+        return True
+    daily = max((abs(cost) for cost in daily_costs.values()), default=0)
+    return max(budget, max(most_people * daily, 100) * longest) >= INT64_LIMIT
+
+
+def _as_lists(*columns):
+    length = max(len(c) if isinstance(c, (list, tuple)) else 1 for c in columns)
+    return [list(c) if isinstance(c, (list, tuple)) else [c] * length for c in columns]
+
+
+def _rank_python(daily_costs, budget, people, min_nights, max_nights, top):
+    options = []
+    for country, daily in daily_costs.items():
+        burn = daily * people
+        if burn <= 0: burn = 100
+        affordable = budget // burn
+        if affordable < min_nights: continue
+        nights = min(affordable, max_nights)
+        options.append((country, nights, nights * burn))
+    options.sort(key=lambda option: (-option[1], option[2]))
+    return options[:top]
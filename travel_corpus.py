@@ -0,0 +1,68 @@
+"""Generated utterances per intent, for benchmarks and load tests.
+
+    corpus = generate_corpus(per_intent=2000, seed=0)
+    corpus["visa"][:2]  # ['Do I need a visa from japan to italy?', ...]
+
+The corpus is deterministic for a given seed and knowledge base, so runs on
+different commits time exactly the same messages. Every utterance is built to
+reach its intent (CORPUS_INTENTS; "info" covers currency, tip, language and
+best time) through TravelEngine's rule stages.
+"""
+import random
+
+from travel_engine import INFO_INTENTS, get_knowledge_base
+
+CORPUS_INTENTS = ("package", "visa", "info", "attractions", "packing", "suggestion", "budgeting", "fallback")
+
+TEMPLATES = {
+    "package": ["Create a travel package for {country}", "Plan a package to {country} for {people} people budget {budget} {nights} nights",
+                "I want a travel package to {country} for {people} people with {budget} dollars",
+                "package for {country}, couple, ${budget}, {nights}-{more} nights", "planning a solo trip package to {country}"],
+    "visa": ["Do I need a visa from {origin} to {country}?", "Visa from {origin} to {country}",
+             "visa for {origin} citizens going to {country}", "Is a visa needed for {country}?",
+             "What visa do I need from {country}?"],
+    "info": ["What is the currency in {country}?", "Do I need to tip in {country}?", "Best time to visit {country}?",
+             "What language is spoken in {country}?", "which money do they use in {country}",
+             "when should I go to {country}", "tipping in {country}", "do they speak english in {country}"],
+    "attractions": ["What to visit in {country}?", "Top attractions in {country}", "places to visit in {country}",
+                    "sightseeing in {country}", "what to see in {country}", "I am visiting {country}, ideas?"],
+    "packing": ["What should I pack for {target}?", "What to bring for {target}", "packing list for {target} please",
+                "what to wear for {target}"],
+    "suggestion": ["Suggest a {kind} trip", "Can you recommend a {kind} destination?", "where to go for a {kind} holiday",
+                   "any suggestions?", "recommend somewhere nice"],
+    "budgeting": ["How much does a trip cost?", "Are prices high for travel?", "is it expensive to travel",
+                  "what is a cheap destination", "typical travel costs per day", "my budget is tight"],
+    "fallback": ["tell me a joke", "what's the weather like", "thanks a lot", "who are you", "ok", "{noise}",
+                 "{noise} {noise}"],
+}
+
+PACKING_TARGETS = ("winter", "summer", "the beach", "a ski trip", "hot weather", "snow", "a business trip")
+SUGGESTION_KINDS = ("beach", "mountain", "city", "budget")
+_CONSONANTS = "bcdfghjklmnpqrstvwxz"  # Gibberish without vowels never looks like a country name.
+
+
+def generate_corpus(per_intent=1000, seed=0, kb=None):
+    """Returns ``{intent: [utterance, ...]}`` with ``per_intent`` utterances for each of CORPUS_INTENTS."""
+    kb = kb or get_knowledge_base()
+    rng = random.Random(seed)
+    countries = sorted(kb.country_attractions)
+    info_countries = sorted(kb.country_info)
+    # Slots are filled by keyword, so unused ones are simply ignored by format().
+    corpus = {}
+    for intent in CORPUS_INTENTS:
+        utterances = []
+        for _ in range(per_intent):
+            template = rng.choice(TEMPLATES[intent])
+            nights = rng.randrange(2, 10)
+            utterances.append(template.format(
+                country=rng.choice(info_countries if intent == "info" else countries), origin=rng.choice(countries),
+                people=rng.randrange(1, 7), budget=rng.randrange(300, 9000, 50), nights=nights,
+                more=nights + rng.randrange(1, 5), target=rng.choice(PACKING_TARGETS + tuple(countries)),
+                kind=rng.choice(SUGGESTION_KINDS), noise="".join(rng.choice(_CONSONANTS) for _ in range(rng.randrange(3, 10)))))
+        corpus[intent] = utterances
+    return corpus
+
+
+def intent_matches(corpus_intent, intent):
+    """Whether the engine's ``intent`` is the one a ``corpus_intent`` utterance was built for."""
+    return intent in INFO_INTENTS if corpus_intent == "info" else intent == corpus_intent
@@ -0,0 +1,315 @@
+"""Knowledge base data files: a compact, memory-mapped binary form with hot reload.
+
+    python travel_data.py export-json data.json          # built-in data as editable JSON
+    python travel_data.py build kb.bin [--from data.json] [--revision N]
+    python travel_data.py info kb.bin
+
+Point the bot at a built file with ``WANDERLUST_DATA=kb.bin`` (or
+``travel_server.py --data kb.bin``). The file is mapped read-only and decoded
+lazily: loading reads the header, the country names, the daily costs and the
+precompiled visa table, while a country's attractions and info are only
+decoded when first asked for. ``build`` replaces the file atomically, and
+DataFile.reload_if_changed() swaps a running engine over to the new data
+between turns; conversation state is plain data outside the engine, so
+planning dialogues carry on.
+
+Layout (little-endian): a header ``magic, format, sections, revision``, a
+section table of ``(name, offset, length)`` and the sections:
+
+    countries    UTF-8 names joined by newlines
+    daily_costs  int32 per country
+    visa_table   VisaMatrix.table, one rule index per (origin, dest) pair
+    attractions  uint32 record count n, n uint32 country indexes, n + 1 uint32
+                 offsets, then the n JSON records; only countries with a record
+    info         same layout as attractions
+    meta         JSON: destinations, packing lists, visa groups/rules/countries, aliases
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import Mapping
+
+from travel_engine import (COUNTRY_ALIASES, COUNTRY_ATTRACTIONS, COUNTRY_INFO, DAILY_COSTS, DESTINATIONS, PACKING_LISTS,
+                           VISA_GROUPS, VISA_RULES, KnowledgeBase, VisaMatrix, _freeze)
+
+MAGIC = b"WLKB"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHHI")  # magic, format version, section count, data revision
+SECTION = struct.Struct("<16sII")  # name, offset, length
+
+
+class DataFileError(ValueError):
+    pass
+
+
+# --- LAZY SECTIONS ---
+class RecordMap(Mapping):
+    """Read-only country -> record mapping over an offsets + JSON blob section.
+
+    Records are decoded (and frozen) on first access and kept afterwards.
+    """
+
+    def __init__(self, index, buffer, offsets):
+        self._index = index
+        self._buffer = buffer
+        self._offsets = offsets
+        self._decoded = {}
+
+    def __getitem__(self, country):
+        record = self._decoded.get(country)
+        if record is None:
+            i = self._index[country]
+            record = self._decoded[country] = _freeze(json.loads(bytes(self._buffer[self._offsets[i]:self._offsets[i + 1]])))
+        return record
+
+    def __contains__(self, country):
+        return country in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+
+class CostMap(Mapping):
+    """Read-only country -> daily cost mapping over an int32 section."""
+
+    def __init__(self, index, values):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, country):
+        return self._values[self._index[country]]
+
+    def __contains__(self, country):
+        return country in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def values(self):
+        return self._values.tolist()
+
+
+# --- READING ---
+def _sections(buffer):
+    if len(buffer) < HEADER.size: raise DataFileError("File too short for a knowledge base header")
+    magic, version, count, revision = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC: raise DataFileError("Not a knowledge base file")
+    if version != FORMAT_VERSION: raise DataFileError(f"Unsupported knowledge base format {version}")
+    sections = {}
+    for i in range(count):
+        name, offset, length = SECTION.unpack_from(buffer, HEADER.size + i * SECTION.size)
+        if offset + length > len(buffer): raise DataFileError(f"Truncated section {name.rstrip(bytes(1)).decode()!r}")
+        sections[name.rstrip(bytes(1)).decode()] = (offset, length)
+    return revision, sections
+
+
+def _view(buffer, sections, name, fmt="B", start=0, length=None):
+    """Zero-copy typed view of (part of) a section; ``start``/``length`` are in bytes."""
+    offset, size = sections[name]
+    end = offset + size if length is None else offset + start + length
+    view = buffer[offset + start:end].cast(fmt)
+    if sys.byteorder == "big" and fmt != "B":  # Sections are little-endian; copy once on big-endian hosts.
+        swapped = array(fmt, view)
+        swapped.byteswap()
+        return memoryview(swapped)
+    return view
+
+
+def load_knowledge_base(path):
+    """Maps ``path`` read-only and returns a KnowledgeBase backed by it."""
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    buffer = memoryview(mapped)
+    revision, sections = _sections(buffer)
+
+    names = bytes(_view(buffer, sections, "countries")).decode("utf-8").split("\n")
+    index = {name: i for i, name in enumerate(names)}
+    meta = json.loads(bytes(_view(buffer, sections, "meta")))
+
+    def records(name):
+        count = _view(buffer, sections, name, "I", 0, 4)[0]
+        present = _view(buffer, sections, name, "I", 4, count * 4)
+        table = 4 + count * 4 + (count + 1) * 4
+        return RecordMap({names[country]: slot for slot, country in enumerate(present)},
+                         _view(buffer, sections, name, start=table), _view(buffer, sections, name, "I", 4 + count * 4, (count + 1) * 4))
+
+    visa_rules = _freeze(meta["visa_rules"])
+    visa_matrix = VisaMatrix.from_table(visa_rules, meta["visa_countries"],
+                                        _view(buffer, sections, "visa_table", "B" if len(visa_rules) < 256 else "H"))
+    return KnowledgeBase(records("attractions"), records("info"), CostMap(index, _view(buffer, sections, "daily_costs", "i")),
+                         meta["destinations"], meta["packing_lists"],
+                         visa_groups={group: frozenset(members) for group, members in meta["visa_groups"].items()},
+                         visa_rules=visa_rules, aliases=meta["aliases"], visa_matrix=visa_matrix, revision=revision)
+
+
+# --- WRITING ---
+def _record_section(names, records):
+    # Countries without a record are left out, so ``in`` on the loaded RecordMap means what it did in memory.
+    present = array("I", [i for i, name in enumerate(names) if name in records])
+    blobs = [json.dumps(records[names[i]], ensure_ascii=False, separators=(",", ":")).encode("utf-8") for i in present]
+    offsets = array("I", [0])
+    for blob in blobs: offsets.append(offsets[-1] + len(blob))
+    # Offsets are relative to the first blob byte, which follows the offsets table.
+    return _little_endian(array("I", [len(present)])) + _little_endian(present) + _little_endian(offsets) + b"".join(blobs)
+
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode(country_attractions, country_info, daily_costs, destinations, packing_lists,
+           visa_groups=VISA_GROUPS, visa_rules=VISA_RULES, aliases=COUNTRY_ALIASES, revision=0):
+    """Serializes knowledge base data into the binary layout described above."""
+    names = list(country_attractions)
+    if any("\n" in name for name in names): raise DataFileError("Country names must not contain newlines")
+    matrix = VisaMatrix(_freeze(visa_rules), _freeze(visa_groups), names)
+    meta = {"destinations": destinations, "packing_lists": packing_lists,
+            "visa_groups": {group: sorted(members) for group, members in visa_groups.items()},
+            "visa_rules": [list(rule) for rule in visa_rules], "visa_countries": matrix.countries, "aliases": aliases}
+    payloads = [
+        ("countries", "\n".join(names).encode("utf-8")),
+        ("daily_costs", _little_endian(array("i", [daily_costs.get(name, 100) for name in names]))),
+        ("visa_table", _little_endian(matrix.table)),
+        ("attractions", _record_section(names, country_attractions)),
+        ("info", _record_section(names, country_info)),
+        ("meta", json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")),
+    ]
+    offset = HEADER.size + SECTION.size * len(payloads)
+    head = [HEADER.pack(MAGIC, FORMAT_VERSION, len(payloads), revision)]
+    for name, payload in payloads:
+        offset += -offset % 4  # Keep every section aligned for memoryview.cast().
+        head.append(SECTION.pack(name.encode(), offset, len(payload)))
+        offset += len(payload)
+    out = bytearray(b"".join(head))
+    for name, payload in payloads:
+        out += bytes(-len(out) % 4)
+        out += payload
+    return bytes(out)
+
+
+def write_knowledge_base(path, data, revision=0):
+    """Writes ``data`` (the JSON source layout) to ``path`` atomically.
+
+    Readers that still map the old file keep a valid view of it; new loads
+    see the complete new file.
+    """
+    blob = encode(data["country_attractions"], data["country_info"], data["daily_costs"], data["destinations"],
+                  data["packing_lists"], data.get("visa_groups", VISA_GROUPS), data.get("visa_rules", VISA_RULES),
+                  data.get("aliases", COUNTRY_ALIASES), revision)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp = tempfile.mkstemp(dir=directory, prefix=".kb-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(blob)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp): os.unlink(temp)
+        raise
+    return len(blob)
+
+
+def default_data():
+    """The built-in knowledge base in the JSON source layout."""
+    return {"country_attractions": COUNTRY_ATTRACTIONS, "country_info": COUNTRY_INFO, "daily_costs": DAILY_COSTS,
+            "destinations": DESTINATIONS, "packing_lists": PACKING_LISTS,
+            "visa_groups": {group: sorted(members) for group, members in VISA_GROUPS.items()},
+            "visa_rules": [list(rule) for rule in VISA_RULES], "aliases": COUNTRY_ALIASES}
+
+
+# --- HOT RELOAD ---
+class DataFile:
+    """A knowledge base file that a running process can reload when it changes."""
+
+    def __init__(self, path):
+        self.path = path
+        self.signature = None
+
+    def _stat(self):
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def load(self):
+        signature = self._stat()
+        knowledge_base = load_knowledge_base(self.path)
+        self.signature = signature
+        return knowledge_base
+
+    def changed(self):
+        try:
+            return self._stat() != self.signature
+        except FileNotFoundError:
+            return False
+
+    def reload_if_changed(self, engine=None):
+        """Loads the file again if it changed and installs it; returns the new KnowledgeBase or None.
+
+        With an ``engine`` only that engine is switched, otherwise the
+        process-wide knowledge base and shared engine are (set_knowledge_base()).
+        A file that fails to load leaves the current data in place.
+        """
+        if not self.changed(): return None
+        from travel_engine import set_knowledge_base
+        signature = self._stat()
+        try:
+            knowledge_base = self.load()
+        except (OSError, ValueError) as error:
+            print(f"Knowledge base reload failed, keeping the current data: {error}", file=sys.stderr)
+            self.signature = signature  # Retry only once the file changes again.
+            return None
+        if engine is not None:
+            engine.use_knowledge_base(knowledge_base)
+        else:
+            set_knowledge_base(knowledge_base)
+        return knowledge_base
+
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and inspect knowledge base data files.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export-json", help="Write the built-in data as editable JSON.")
+    export.add_argument("path")
+    build = commands.add_parser("build", help="Compile JSON data (or the built-in data) into a binary file.")
+    build.add_argument("path")
+    build.add_argument("--from", dest="source", help="JSON file in the export-json layout.")
+    build.add_argument("--revision", type=int, default=0, help="Data revision stored in the header.")
+    info = commands.add_parser("info", help="Show the header of a binary file.")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "export-json":
+        with open(args.path, "w", encoding="utf-8") as handle:
+            json.dump(default_data(), handle, ensure_ascii=False, indent=2)
+    elif args.command == "build":
+        if args.source:
+            with open(args.source, encoding="utf-8") as handle: data = json.load(handle)
+        else:
+            data = default_data()
+        size = write_knowledge_base(args.path, data, args.revision)
+        print(f"Wrote {args.path}: {len(data['country_attractions'])} countries, {size} bytes, revision {args.revision}")
+    else:
+        with open(args.path, "rb") as handle:
+            revision, sections = _sections(memoryview(handle.read()))
+        print(f"{args.path}: format {FORMAT_VERSION}, revision {revision}")
+        for name, (offset, length) in sections.items(): print(f"  {name:<12} {length:>9} bytes @ {offset}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1378 @@
+"""Rule engine and knowledge base of the Wanderlust AI travel bot.
+
+This module has no Streamlit dependency, so workers, batch jobs and tests can
+import it cheaply. The Streamlit UI lives in travel_bot.py.
+"""
+import json
+import os
+import re
+import random
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from types import MappingProxyType
+
+# --- COUNTRY DETECTION ---
+# Alternative names users type for the countries we know about. Keys are the
+# canonical country names used throughout the knowledge base.
+COUNTRY_ALIASES = {
+    "usa": ["united states", "united states of america", "u.s.", "u.s.a."],
+    "uk": ["united kingdom", "britain", "great britain", "u.k."],
+    "germany": ["deutschland"],
+    "turkey": ["turkiye", "türkiye"],
+    "spain": ["espana", "españa"],
+    "italy": ["italia"],
+    "poland": ["polska"],
+    "lithuania": ["lietuva"],
+    "greece": ["hellas"],
+    "japan": ["nippon"],
+}
+
+
+def _trie_pattern(words):
+    """Builds a regex alternation shaped like a prefix trie.
+
+    Shared prefixes are matched once, and at every branch longer
+    continuations are tried first, so the leftmost match is also the
+    longest one starting at that position. A space matches any run of
+    whitespace.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        terminal = "" in node
+        branches = [(r"\s+" if char == " " else re.escape(char)) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches: return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal: body = ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+        return body
+
+    return build(trie)
+
+
+def _trigrams(word):
+    padded = f"^{word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Damerau (optimal string alignment) distance of ``a`` and ``b``, or ``limit + 1`` once it exceeds ``limit``."""
+    if abs(len(a) - len(b)) > limit: return limit + 1
+    # Typos are local: drop the common prefix and suffix, leaving a tiny table.
+    start, end = 0, 0
+    while start < min(len(a), len(b)) and a[start] == b[start]: start += 1
+    while end < min(len(a), len(b)) - start and a[-1 - end] == b[-1 - end]: end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b: return min(max(len(a), len(b)), limit + 1)
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit: return limit + 1
+    return min(current[-1], limit + 1)
+
+
+# Typo matching only considers words of at least this many letters, and allows
+# one edit up to FUZZY_LONG_WORD letters and two beyond that.
+FUZZY_MIN_LENGTH = 5
+FUZZY_LONG_WORD = 9
+
+
+class CountryMatcher:
+    """Country lookups over the names of a Lexicon.
+
+    Exact mentions come from the lexicon's single scan. find_fuzzy() is the
+    typo-tolerant fallback: a character-trigram index narrows the names down
+    to a few candidates that share enough trigrams with a word, and only those
+    get a bounded edit-distance check.
+    """
+
+    def __init__(self, lexicon):
+        self.lexicon = lexicon
+        self.lookup = lexicon.names
+        # Words that are never typos of a country (the intent keywords).
+        self.ignore = lexicon.words
+        self.fuzzy_names = [name for name in self.lookup
+                            if len(name) >= FUZZY_MIN_LENGTH and all(part.isalpha() for part in name.split(" "))]
+        # Postings are keyed by first letter + trigram: typos rarely hit the
+        # first letter, and this keeps lists like "ia$" short.
+        postings = {}
+        for i, name in enumerate(self.fuzzy_names):
+            for gram in _trigrams(name): postings.setdefault(name[0] + gram, []).append(i)
+        self.trigram_index = {key: tuple(ids) for key, ids in postings.items()}
+        multiword = [name for name in self.fuzzy_names if " " in name]
+        self.pair_initials = frozenset(name[0] for name in multiword)
+        self.pair_lengths = range(min(map(len, multiword), default=0) - 2, max(map(len, multiword), default=0) + 3)
+
+    def find_all(self, text):
+        """Returns ``(country, start, end)`` for every mention, in text order."""
+        return self.lexicon.scan(text)[1]
+
+    def find(self, text):
+        """Returns the country of the longest mention (earliest on ties), or None."""
+        return self.longest(self.find_all(text))
+
+    @staticmethod
+    def longest(found):
+        """The country of the longest of find_all()'s mentions (earliest on ties), or None."""
+        if not found: return None
+        return max(found, key=lambda item: item[2] - item[1])[0]
+
+    def closest(self, word):
+        """Returns ``(country, distance)`` for the name closest to one word (or word pair), or None."""
+        word = word.lower()
+        if word in self.lookup: return self.lookup[word], 0
+        if len(word) < FUZZY_MIN_LENGTH or word in self.ignore: return None
+        limit = 1 if len(word) <= FUZZY_LONG_WORD else 2
+        grams = _trigrams(word)
+        # An edit changes at most four trigrams (a transposition), so a match shares at least this many.
+        needed = max(1, len(grams) - 4 * limit)
+        shared = {}
+        for gram in grams:
+            for i in self.trigram_index.get(word[0] + gram, ()): shared[i] = shared.get(i, 0) + 1
+        best, tied = None, False
+        for i, count in shared.items():
+            if count < needed: continue
+            name = self.fuzzy_names[i]
+            distance = edit_distance(word, name, limit)
+            if distance > limit: continue
+            if best is None or distance < best[1]:
+                best, tied = (self.lookup[name], distance), False
+            elif distance == best[1] and self.lookup[name] != best[0]:
+                tied = True
+        return None if tied else best  # Equally close to two countries: do not guess.
+
+    def find_fuzzy(self, text):
+        """Country of the closest typo-tolerant match among the words of ``text``, or None."""
+        words = _TOKEN.findall(text.lower())
+        candidates = words + [pair for pair in (f"{a} {b}" for a, b in zip(words, words[1:]))
+                              if pair[0] in self.pair_initials and len(pair) in self.pair_lengths]
+        best = None
+        for word in candidates:
+            match = self.closest(word)
+            if match and (best is None or match[1] < best[1]): best = match
+        return best[0] if best else None
+
+
+# --- VISA RULES ---
+# Ordered first-match table of (origins, destinations, status, reply). "*"
+# matches any country and "@name" refers to a group in VISA_GROUPS. Replies
+# may use {origin} and {dest}. The last rule must match everything.
+VISA_GROUPS = {
+    "schengen": {'lithuania', 'poland', 'greece', 'france', 'germany', 'italy', 'spain', 'portugal'},
+    "eu_visa_free_to_china": {'poland', 'greece', 'france', 'germany', 'italy', 'spain'},
+}
+
+VISA_RULES = [
+    (["@schengen"], ["@schengen"], "visa_free",
+     "✅ **Visa Free:** Freedom of movement applies within the Schengen Area."),
+    (["usa", "canada", "uk", "japan", "ukraine", "brazil"], ["@schengen"], "visa_free",
+     "✅ **Visa Free:** Citizens of {origin} can usually enter the Schengen area ({dest}) for 90 days."),
+    (["russia", "china", "india", "turkey", "thailand"], ["@schengen"], "visa_required",
+     "🛂 **Visa Required:** Citizens of {origin} generally need a Schengen Visa."),
+
+    (["@schengen", "ukraine", "russia", "thailand", "uk", "usa"], ["turkey"], "visa_free",
+     "✅ **Visa Free:** generally visa-free for short tourism stays."),
+    (["india", "china"], ["turkey"], "visa_required", "🛂 **Visa Required:** E-Visa or Sticker visa required."),
+
+    (["@schengen", "uk", "japan"], ["usa"], "esta", "📝 **ESTA Required:** Visa Waiver Program available (ESTA)."),
+    (["*"], ["usa"], "visa_required", "🛂 **Visa Required:** B1/B2 Visa typically needed."),
+
+    (["china", "thailand", "turkey"], ["russia"], "visa_free",
+     "✅ **Visa Free / Simplified:** Visa-free for groups or simplified entry."),
+    (["@schengen", "usa", "uk", "canada", "india"], ["russia"], "visa_required",
+     "🛂 **Visa Required:** You likely need a visa. (Unified E-visa is available)."),
+
+    (["@schengen", "usa", "uk", "canada", "turkey"], ["ukraine"], "visa_free",
+     "✅ **Visa Free:** Up to 90 days within 180 days."),
+    (["india"], ["ukraine"], "visa_required", "🛂 **Visa Required:** E-Visa available."),
+    (["china"], ["ukraine"], "visa_required", "🛂 **Visa Required:** Standard visa required."),
+
+    (["@schengen", "usa", "uk", "canada", "russia", "turkey", "china", "india", "ukraine"], ["thailand"], "visa_free",
+     "✅ **Visa Free / VOA:** Thailand currently has very open policies."),
+
+    (["usa", "uk", "russia", "ukraine", "thailand", "turkey", "@schengen", "china"], ["india"], "visa_required",
+     "🛂 **Visa Required:** E-Visa is widely available."),
+
+    (["thailand"], ["china"], "visa_free", "✅ **Visa Free:** Permanent mutual visa exemption."),
+    (["@eu_visa_free_to_china"], ["china"], "visa_free", "✅ **Visa Free:** 15-day visa-free entry (Trial policy)."),
+    (["usa", "uk", "canada", "india", "lithuania", "turkey", "ukraine"], ["china"], "visa_required",
+     "🛂 **Visa Required:** You generally need a tourist (L) visa."),
+
+    (["*"], ["*"], "check", "Generally, check if {dest} offers an E-Visa for {origin} citizens."),
+]
+
+
+class VisaMatrix:
+    """VISA_RULES compiled into a dense origin x destination table of rule indices.
+
+    Countries get integer IDs; ID 0 stands for any country the rules and the
+    knowledge base do not know, so every (origin, dest) pair is one array read.
+    """
+
+    OTHER = "*"
+
+    def __init__(self, rules, groups, countries):
+        self.rules = rules
+        names = set(countries)
+        for members in groups.values(): names.update(members)
+        specs = []
+        for origins, dests, _, _ in rules:
+            specs.append((self._expand(origins, groups), self._expand(dests, groups)))
+            names.update(name for name in origins + dests if name != self.OTHER and not name.startswith("@"))
+
+        self.countries = [self.OTHER] + sorted(names)
+        self.ids = {country: i for i, country in enumerate(self.countries)}
+        self.size = size = len(self.countries)
+        self.table = array('B' if len(rules) < 256 else 'H', bytes(size * size))
+        for oid, origin in enumerate(self.countries):
+            for did, dest in enumerate(self.countries):
+                self.table[oid * size + did] = next(
+                    i for i, (origins, dests) in enumerate(specs)
+                    if (origins is None or origin in origins) and (dests is None or dest in dests))
+
+    @classmethod
+    def from_table(cls, rules, countries, table):
+        """A matrix from an already compiled ``table`` (e.g. a memoryview into a data file)."""
+        matrix = cls.__new__(cls)
+        matrix.rules = rules
+        matrix.countries = list(countries)
+        matrix.ids = {country: i for i, country in enumerate(matrix.countries)}
+        matrix.size = len(matrix.countries)
+        if len(table) != matrix.size * matrix.size: raise ValueError("Visa table does not match the country list")
+        matrix.table = table
+        return matrix
+
+    @classmethod
+    def _expand(cls, names, groups):
+        if cls.OTHER in names: return None
+        expanded = set()
+        for name in names:
+            expanded.update(groups[name[1:]] if name.startswith("@") else (name,))
+        return expanded
+
+    def lookup(self, origin, dest):
+        """Returns the index into ``rules`` for one origin/destination pair."""
+        return self.table[self.ids.get(origin, 0) * self.size + self.ids.get(dest, 0)]
+
+    def destinations(self, origin, status):
+        """Known destinations whose rule for ``origin`` has the given status."""
+        start = self.ids.get(origin, 0) * self.size
+        row = self.table[start:start + self.size]
+        return [self.countries[did] for did, rule in enumerate(row)
+                if did and self.countries[did] != origin and self.rules[rule][2] == status]
+
+    def origins(self, dest, status):
+        """Known origins whose rule towards ``dest`` has the given status."""
+        column = self.table[self.ids.get(dest, 0)::self.size]
+        return [self.countries[oid] for oid, rule in enumerate(column)
+                if oid and self.countries[oid] != dest and self.rules[rule][2] == status]
+
+
+# --- PACKAGE DETAILS ---
+# Every number/unit the package dialogue understands, in one alternation. A
+# prefixed budget ("budget 5") is not taken when the number is really a count
+# of nights or people ("budget 5 nights"). Lithuanian units are matched by
+# their stem, which covers every case ending, with and without diacritics
+# ("2 žmonėms", "5 naktys", "7 nakciu").
+_PEOPLE_UNIT = r'(?:people|person|pax|travelers|žmon|zmon|asmen)'
+_NIGHTS_UNIT = r'(?:nights|days|nakt|nakč|nakc|dien)'
+_WEEKS_UNIT = r'(?:weeks?|savait(?!gal))'  # Not "savaitgalis" (weekend).
+_COUNT_UNIT = r'(?:' + _NIGHTS_UNIT + '|' + _PEOPLE_UNIT + r'|-)'
+PACKAGE_ENTITY_PATTERN = re.compile(r"""
+      (?P<solo>solo|just\ me)
+    | (?P<couple>couple)
+    | (?P<budget_pre>(?:\$|€|eur|usd|budget|biudžet\w*|biudzet\w*)\s*?(?P<budget_pre_value>\d+)(?!\d|\s*""" + _COUNT_UNIT + r"""))
+    | (?<!\d)(?P<value>\d+)\s*(?:
+          -\s*(?P<range_max>\d+)\s*""" + _NIGHTS_UNIT + r"""(?P<range>)
+        | """ + _PEOPLE_UNIT + r"""(?P<people>)
+        | (?:dollars|usd|eur|€|\$|doler)(?P<budget_post>)
+        | """ + _NIGHTS_UNIT + r"""(?P<nights>)
+        | """ + _WEEKS_UNIT + r"""(?P<weeks>))
+    | (?P<week>""" + _WEEKS_UNIT + r""")
+""", re.VERBOSE)
+
+
+class PackageDetails:
+    """Package fields found in one message, with the spans they came from.
+
+    ``entities`` lists every match as ``(kind, value, (start, end))``; the
+    fields hold the winner of each kind after conflict resolution:
+    people: solo > couple > "N people"; budget: "$N"/"budget N" > "N dollars";
+    nights: "N-M nights" > "N nights" > "N weeks"; first occurrence otherwise.
+    """
+
+    __slots__ = ("people", "budget", "min_nights", "max_nights", "spans", "entities")
+
+    def __init__(self):
+        self.people = self.budget = self.min_nights = self.max_nights = None
+        self.spans = {}
+        self.entities = []
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in ("people", "budget", "min_nights", "max_nights")
+                if getattr(self, field) is not None}
+
+
+_PEOPLE_RANK = {"solo": 0, "couple": 1, "people": 2}
+_BUDGET_RANK = {"budget_pre": 0, "budget_post": 1}
+_NIGHTS_RANK = {"range": 0, "nights": 1, "weeks": 2}
+
+
+def extract_entities(text):
+    """Single regex scan of ``text`` for people, budget and nights."""
+    details = PackageDetails()
+    best = {}  # field group -> (rank, kind, value, span)
+    for match in PACKAGE_ENTITY_PATTERN.finditer(text.lower()):
+        # Every alternative ends with its (possibly empty) named group, so it closes last.
+        kind = match.lastgroup
+        if kind == "solo": value, group = 1, "people"
+        elif kind == "couple": value, group = 2, "people"
+        elif kind == "people": value, group = int(match.group("value")), "people"
+        elif kind == "budget_pre": value, group = int(match.group("budget_pre_value")), "budget"
+        elif kind == "budget_post": value, group = int(match.group("value")), "budget"
+        elif kind == "range": value, group = (int(match.group("value")), int(match.group("range_max"))), "nights"
+        elif kind == "nights": value, group = int(match.group("value")), "nights"
+        else: kind, value, group = "weeks", 7 * int(match.group("value") or 1), "nights"
+        span = match.span()
+        details.entities.append((kind, value, span))
+        rank = (_PEOPLE_RANK.get(kind) if group == "people" else
+                _BUDGET_RANK.get(kind) if group == "budget" else _NIGHTS_RANK[kind])
+        if group not in best or rank < best[group][0]: best[group] = (rank, kind, value, span)
+
+    if "people" in best: details.people, details.spans["people"] = best["people"][2], best["people"][3]
+    if "budget" in best: details.budget, details.spans["budget"] = best["budget"][2], best["budget"][3]
+    if "nights" in best:
+        _, kind, value, span = best["nights"]
+        details.min_nights, details.max_nights = value if kind == "range" else (value, value)
+        details.spans["nights"] = span
+    return details
+
+
+# --- INTENT KEYWORDS ---
+# Keyword features the rule cascade in TravelEngine._match() looks at. Each
+# entry is a whole word or a multi-word phrase; inflected forms are listed
+# explicitly because matching is word based, not substring based. A country
+# right after an "origin" keyword is where the traveller comes from.
+INTENT_KEYWORDS = {
+    "package": ["package", "packages", "plan", "plans", "planning", "planned"],
+    "visa": ["visa", "visas"],
+    "from": ["from"],
+    "origin": ["from", "citizen of", "citizens of"],
+    "best_time": ["when", "best time", "season", "seasons"],
+    "currency": ["currency", "currencies", "money", "pay", "paying", "payment"],
+    "tip": ["tip", "tips", "tipping"],
+    "language": ["language", "languages", "speak", "spoken", "speaking", "english"],
+    "attractions": ["attractions", "attraction", "sightseeing", "what to see", "places to visit"],
+    "visit": ["visit", "visiting", "see", "seeing"],
+    "packing": ["pack", "packing", "bring", "wear"],
+    "suggest": ["suggest", "suggestion", "suggestions", "recommend", "recommendation", "recommendations",
+                "where to go"],
+    "beach": ["beach", "beaches"],
+    "mountain": ["mountain", "mountains"],
+    "city": ["city", "cities"],
+    "budget": ["budget", "budgets", "budgeting"],
+    "budgeting": ["cost", "costs", "price", "prices", "budget", "budgets", "budgeting", "expensive", "cheap"],
+    "greeting": ["hi", "hello", "hey", "greetings", "hola"],
+    "fit": ["afford", "affordable", "fit", "fits", "where can"],
+}
+
+_TOKEN = re.compile(r"\w+")
+
+# Slot extraction, only run once the keyword features say the intent applies.
+VISA_FROM_TO = re.compile(r'visa.*from\s+(?P<origin>\w+)\s+to\s+(?P<dest>\w+)')
+VISA_CITIZEN = re.compile(r'visa.*(?P<origin>\w+)\s+citizen.*\s+(?P<dest>\w+)')
+PACKING_TARGET = re.compile(r'\b(?:pack|packing|bring|wear)\b.*?for\s+(?P<target>\w+)')
+
+
+# --- LANGUAGES ---
+# Vocabulary of the languages understood besides English (which is
+# INTENT_KEYWORDS and COUNTRY_ALIASES): keyword phrases by the same features,
+# and country names by canonical country. Replies stay in English.
+_LITHUANIAN_ENDINGS = {  # nominative, genitive, dative, accusative, instrumental, locative
+    "a": ("a", "os", "ai", "ą", "a", "oje"),
+    "ė": ("ė", "ės", "ei", "ę", "e", "ėje"),
+    "as": ("as", "o", "ui", "ą", "u", "e"),
+}
+
+
+def lithuanian_forms(*names):
+    """Singular case forms of Lithuanian names whose words end in -a, -ė or -as ("italija" -> "italijoje", ...)."""
+    forms = []
+    for name in names:
+        words = []
+        for word in name.split(" "):
+            ending = next(ending for ending in ("as", "a", "ė") if word.endswith(ending))
+            words.append((word[:-len(ending)], _LITHUANIAN_ENDINGS[ending]))
+        forms += [" ".join(stem + endings[case] for stem, endings in words) for case in range(6)]
+    return list(dict.fromkeys(forms))
+
+
+LITHUANIAN_KEYWORDS = {
+    "package": ["paketas", "paketo", "paketą", "paketai", "paketų", "planas", "planą", "planuoju", "planuojame",
+                "suplanuok", "suplanuokite", "suplanuoti"],
+    "visa": ["viza", "vizos", "vizą", "vizų", "vizai", "vizas", "vizoms"],
+    "from": ["iš"],
+    "origin": ["iš"],
+    "best_time": ["kada", "geriausias laikas", "geriausią laiką", "geriausias metas", "geriausią metą", "sezonas",
+                  "sezono", "sezoną"],
+    "currency": ["valiuta", "valiutos", "valiutą", "pinigai", "pinigų", "pinigus", "mokėti", "atsiskaityti"],
+    "tip": ["arbatpinigiai", "arbatpinigių", "arbatpinigius", "arbatpinigiams", "arbatpinigiais"],
+    "language": ["kalba", "kalbos", "kalbą", "kalbama", "kalbėti", "kalbate", "angliškai"],
+    "attractions": ["lankytinos vietos", "lankytinų vietų", "lankytinas vietas", "įžymybės", "įžymybių", "įžymybes",
+                    "ką pamatyti", "ką aplankyti"],
+    "visit": ["aplankyti", "lankyti", "apsilankyti", "pamatyti", "aplankysiu"],
+    "packing": ["pasiimti", "įsidėti", "susikrauti", "apsirengti", "vilkėti"],
+    "suggest": ["pasiūlyk", "pasiūlykite", "pasiūlymas", "pasiūlymų", "rekomenduok", "rekomenduokite", "rekomendacija",
+                "rekomendacijų", "kur keliauti", "kur nuvykti"],
+    "beach": ["paplūdimys", "paplūdimio", "paplūdimiai", "paplūdimių", "pajūris", "pajūrio", "prie jūros"],
+    "mountain": ["kalnai", "kalnų", "kalnuose", "kalnus"],
+    "city": ["miestas", "miesto", "miestai", "miestų", "mieste"],
+    "budget": ["biudžetas", "biudžeto", "biudžetą", "biudžetinė", "biudžetinę", "biudžetinės"],
+    "budgeting": ["kaina", "kainos", "kainą", "kainų", "kainuoja", "brangu", "brangi", "brangus", "pigu", "pigi",
+                  "pigus", "pigią", "biudžetas", "biudžeto", "biudžetą"],
+    "greeting": ["labas", "sveiki", "sveikas", "laba diena", "labas rytas", "labas vakaras"],
+    "fit": ["užtenka", "užteks", "pakanka", "pakaks", "kur galima"],
+}
+
+LITHUANIAN_COUNTRIES = {
+    "lithuania": lithuanian_forms("lietuva"),
+    "poland": lithuanian_forms("lenkija"),
+    "turkey": lithuanian_forms("turkija"),
+    "greece": lithuanian_forms("graikija"),
+    "russia": lithuanian_forms("rusija"),
+    "ukraine": lithuanian_forms("ukraina"),
+    "thailand": lithuanian_forms("tailandas"),
+    "india": lithuanian_forms("indija"),
+    "china": lithuanian_forms("kinija"),
+    "usa": ["jav", "jungtinės amerikos valstijos", "jungtinių amerikos valstijų", "jungtinėms amerikos valstijoms",
+            "jungtines amerikos valstijas", "jungtinėmis amerikos valstijomis", "jungtinėse amerikos valstijose"],
+    "uk": lithuanian_forms("jungtinė karalystė", "britanija"),
+    "france": lithuanian_forms("prancūzija"),
+    "italy": lithuanian_forms("italija"),
+    "germany": lithuanian_forms("vokietija"),
+    "spain": lithuanian_forms("ispanija"),
+    "japan": lithuanian_forms("japonija"),
+}
+
+LANGUAGES = {
+    "lt": {"keywords": LITHUANIAN_KEYWORDS, "countries": LITHUANIAN_COUNTRIES},
+}
+
+# Spellings without diacritics are added for every entry except single words
+# shorter than this, which are too often another word ("iš" -> "is").
+FOLD_MIN_LENGTH = 3
+
+
+def fold_diacritics(text):
+    """``"prancūzijoje"`` -> ``"prancuzijoje"``, as typed without a national keyboard layout."""
+    return "".join(char for char in unicodedata.normalize("NFD", text) if not unicodedata.combining(char))
+
+
+def _spellings(entries):
+    for entry in entries:
+        entry = entry.lower()
+        yield entry
+        plain = fold_diacritics(entry)
+        if plain != entry and (len(plain) >= FOLD_MIN_LENGTH or " " in plain): yield plain
+
+
+class Lexicon:
+    """Keyword phrases and country names of every language, compiled into one trie.
+
+    The trie becomes a single regex (see _trie_pattern), so scan() finds
+    every keyword and country mention of a message in one pass: another
+    language adds branches to the trie, not passes over the text. Matches do
+    not overlap, so an entry also carries the features of the keywords inside
+    it ("places to visit" -> attractions and visit).
+    """
+
+    __slots__ = ("names", "words", "entries", "pattern")
+
+    def __init__(self, countries, aliases=None, keywords=None, languages=None):
+        vocabularies = [(keywords or {}, aliases or {})]
+        vocabularies += [(language.get("keywords", {}), language.get("countries", {}))
+                         for language in (languages or {}).values()]
+        self.names = {country.lower(): country for country in countries}
+        phrases = {}
+        for keyword_table, name_table in vocabularies:
+            for country, names in name_table.items():
+                if country not in self.names: continue
+                for name in _spellings(names): self.names.setdefault(name, country)
+            for feature, entries in keyword_table.items():
+                for phrase in _spellings(" ".join(_TOKEN.findall(entry.lower())) for entry in entries):
+                    phrases.setdefault(phrase, set()).add(feature)
+        # Single keyword words, which are never typos of a country.
+        self.words = frozenset(phrase for phrase in phrases if " " not in phrase)
+
+        self.entries = {}
+        for surface in set(phrases) | set(self.names):
+            features, words = set(), surface.split(" ")
+            for i in range(len(words)):
+                for j in range(i + 1, len(words) + 1): features |= phrases.get(" ".join(words[i:j]), set())
+            self.entries[surface] = (frozenset(features), self.names.get(surface))
+        self.pattern = re.compile(r'(?<!\w)' + _trie_pattern(self.entries) + r'(?!\w)')
+
+    def __len__(self):
+        return len(self.entries)
+
+    def scan(self, text):
+        """One pass over ``text``; returns ``(features, mentions, origin)``.
+
+        ``features`` is the set of keyword features present, ``mentions``
+        lists ``(country, start, end)`` in text order and ``origin`` is the
+        index of the first mention right after an "origin" keyword ("from
+        Japan", "iš Lietuvos"), or None.
+        """
+        entries = self.entries
+        features, mentions, origin = set(), [], None
+        origin_end = None  # Where the last "origin" keyword ended.
+        for match in self.pattern.finditer(text.lower()):
+            surface = match.group()
+            found, country = entries.get(surface) or entries[" ".join(surface.split())]
+            if country is not None:
+                start = match.start()
+                if origin is None and origin_end is not None and text[origin_end:start].isspace():
+                    origin = len(mentions)
+                mentions.append((country, start, match.end()))
+            if found:
+                features |= found
+                if "origin" in found: origin_end = match.end()
+        return features, mentions, origin
+
+    def classify(self, text):
+        """Returns the set of keyword features present in ``text``."""
+        return self.scan(text)[0]
+
+
+# --- KNOWLEDGE BASE ---
+# Tourist Attractions
+COUNTRY_ATTRACTIONS = {
+    "lithuania": ["Gediminas Tower", "Trakai Island Castle", "Curonian Spit", "Hill of Crosses"],
+    "poland": ["Wawel Castle (Krakow)", "Wieliczka Salt Mine", "Warsaw Old Town", "Malbork Castle"],
+    "turkey": ["Hagia Sophia", "Cappadocia Balloons", "Pamukkale Thermal Pools", "Ephesus"],
+    "greece": ["Acropolis of Athens", "Santorini Sunsets", "Meteora Monasteries", "Navagio Beach"],
+    "russia": ["Red Square", "The Hermitage", "Lake Baikal", "Peterhof Palace"],
+    "ukraine": ["Kyiv Pechersk Lavra", "Lviv Old Town", "Tunnel of Love", "Carpathian Mountains"],
+    "thailand": ["The Grand Palace", "Phi Phi Islands", "Chiang Mai Night Bazaar", "Ayutthaya"],
+    "india": ["Taj Mahal", "Jaipur Pink City", "Varanasi Ghats", "Kerala Backwaters"],
+    "china": ["Great Wall of China", "Forbidden City", "Terracotta Army", "The Bund (Shanghai)"],
+    "usa": ["Grand Canyon", "Statue of Liberty", "Yellowstone National Park", "Disney World", "Times Square"],
+    "uk": ["Big Ben", "Stonehenge", "Edinburgh Castle", "British Museum"],
+    "france": ["Eiffel Tower", "Louvre Museum", "Mont Saint-Michel", "French Riviera"],
+    "italy": ["Colosseum", "Venice Canals", "Leaning Tower of Pisa", "Amalfi Coast"],
+    "germany": ["Brandenburg Gate", "Neuschwanstein Castle", "Cologne Cathedral", "Black Forest"],
+    "spain": ["Sagrada Família", "Alhambra", "Park Güell", "Ibiza"],
+    "japan": ["Mount Fuji", "Kyoto Temples", "Tokyo Tower", "Osaka Castle"]
+}
+
+# Detailed Country Info
+COUNTRY_INFO = {
+    "lithuania": {"currency": "Euro (€)", "lang": "Lithuanian", "tip": "Not mandatory, but 10% is appreciated.",
+                  "best_time": "May to September"},
+    "poland": {"currency": "Polish Złoty (PLN)", "lang": "Polish", "tip": "10% is standard in restaurants.",
+               "best_time": "May to October"},
+    "turkey": {"currency": "Turkish Lira (TRY)", "lang": "Turkish", "tip": "5-10% in restaurants is customary.",
+               "best_time": "April-May or September-October"},
+    "greece": {"currency": "Euro (€)", "lang": "Greek", "tip": "Round up the bill or 5-10%.",
+               "best_time": "April to June or September to October"},
+    "russia": {"currency": "Russian Ruble (RUB)", "lang": "Russian", "tip": "10% is common in cities.",
+               "best_time": "May to September"},
+    "ukraine": {"currency": "Ukrainian Hryvnia (UAH)", "lang": "Ukrainian", "tip": "10% is standard.",
+                "best_time": "May to September"},
+    "thailand": {"currency": "Thai Baht (THB)", "lang": "Thai",
+                 "tip": "Not customary, but loose change is nice.",
+                 "best_time": "November to February (Cool season)"},
+    "india": {"currency": "Indian Rupee (INR)", "lang": "Hindi & English",
+              "tip": "10% at restaurants, small amount for porters.", "best_time": "October to March"},
+    "china": {"currency": "Renminbi (CNY)", "lang": "Mandarin",
+              "tip": "Generally not practiced and can be seen as rude.",
+              "best_time": "April-May or September-October"},
+    "usa": {"currency": "US Dollar ($)", "lang": "English", "tip": "15-20% is practically mandatory.",
+            "best_time": "All year round depending on region"},
+    "uk": {"currency": "British Pound (£)", "lang": "English", "tip": "10-15% if service not included.",
+           "best_time": "May to September"},
+    "france": {"currency": "Euro (€)", "lang": "French", "tip": "Service is included, small change is polite.",
+               "best_time": "April to June or September to November"},
+    "italy": {"currency": "Euro (€)", "lang": "Italian", "tip": "Service usually included; just round up.",
+              "best_time": "April to June or September to October"},
+    "germany": {"currency": "Euro (€)", "lang": "German", "tip": "Round up or add 5-10%.",
+                "best_time": "May to September"},
+    "spain": {"currency": "Euro (€)", "lang": "Spanish", "tip": "Round up or leave loose change.",
+              "best_time": "April to June or September to October"},
+    "japan": {"currency": "Japanese Yen (JPY)", "lang": "Japanese",
+              "tip": "No tipping! It can be considered rude.",
+              "best_time": "March-May (Sakura) or September-November"}
+}
+
+# Average daily cost per person (USD)
+DAILY_COSTS = {
+    "lithuania": 80, "poland": 90, "turkey": 100, "greece": 150,
+    "russia": 90, "ukraine": 60, "thailand": 50, "india": 45,
+    "china": 110, "usa": 250, "uk": 200, "france": 220,
+    "italy": 180, "germany": 170, "spain": 160, "japan": 190
+}
+
+DESTINATIONS = {
+    "beach": ["Maldives", "Bora Bora", "Maui, Hawaii", "Phuket, Thailand", "Antalya, Turkey", "Greek Islands"],
+    "mountain": ["Swiss Alps", "Zakopane, Poland", "Kathmandu, Nepal", "Machu Picchu, Peru", "Sochi, Russia"],
+    "city": ["Tokyo, Japan", "Shanghai, China", "Paris, France", "London, UK", "Istanbul, Turkey",
+             "Mumbai, India"],
+    "budget": ["Bali, Indonesia", "Kyiv, Ukraine", "Bangkok, Thailand", "Goa, India", "Siem Reap, Cambodia"]
+}
+
+PACKING_LISTS = {
+    "cold": ["Thermal underwear", "Heavy coat", "Wool socks", "Gloves & Beanie", "Lip balm"],
+    "hot": ["Sunscreen", "Swimwear", "Sunglasses", "Light linen clothes", "Hat"],
+    "general": ["Passport", "Universal adapter", "Power bank", "Toiletries", "First aid kit"]
+}
+
+
+def _freeze(value):
+    """Recursively converts dicts, lists and sets into read-only equivalents."""
+    if isinstance(value, dict): return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (set, frozenset)): return frozenset(value)
+    if isinstance(value, (list, tuple)): return tuple(_freeze(v) for v in value)
+    return value
+
+
+class KnowledgeBase:
+    """Read-only travel data plus the indexes compiled from it.
+
+    Building one is comparatively expensive, so a single instance per process
+    is shared by every conversation (see get_knowledge_base()).
+    """
+
+    __slots__ = ("country_attractions", "country_info", "daily_costs", "destinations", "packing_lists",
+                 "visa_groups", "lexicon", "country_matcher", "visa_matrix", "revision")
+
+    def __init__(self, country_attractions, country_info, daily_costs, destinations, packing_lists,
+                 visa_groups=VISA_GROUPS, visa_rules=VISA_RULES, aliases=COUNTRY_ALIASES,
+                 intent_keywords=INTENT_KEYWORDS, visa_matrix=None, revision=0, languages=LANGUAGES):
+        # Mappings that are not dicts (e.g. the lazy views of travel_data) are kept as they are.
+        self.revision = revision
+        self.country_attractions = _freeze(country_attractions)
+        self.country_info = _freeze(country_info)
+        self.daily_costs = _freeze(daily_costs)
+        self.destinations = _freeze(destinations)
+        self.packing_lists = _freeze(packing_lists)
+        self.visa_groups = _freeze(visa_groups)
+        self.lexicon = Lexicon(self.country_attractions, aliases, intent_keywords, languages)
+        self.country_matcher = CountryMatcher(self.lexicon)
+        self.visa_matrix = visa_matrix or VisaMatrix(_freeze(visa_rules), self.visa_groups, self.country_attractions)
+
+    @classmethod
+    def from_defaults(cls):
+        return cls(COUNTRY_ATTRACTIONS, COUNTRY_INFO, DAILY_COSTS, DESTINATIONS, PACKING_LISTS)
+
+
+_knowledge_base = None
+_knowledge_base_lock = threading.Lock()
+
+
+def get_knowledge_base():
+    """Returns the process-wide KnowledgeBase, building it on first use.
+
+    With ``WANDERLUST_DATA`` set it is loaded from that data file (see
+    travel_data), otherwise from the built-in tables above.
+    """
+    global _knowledge_base
+    if _knowledge_base is None:
+        with _knowledge_base_lock:
+            if _knowledge_base is None:
+                path = os.environ.get("WANDERLUST_DATA")
+                if path:
+                    from travel_data import load_knowledge_base
+                    _knowledge_base = load_knowledge_base(path)
+                else:
+                    _knowledge_base = KnowledgeBase.from_defaults()
+    return _knowledge_base
+
+
+def set_knowledge_base(knowledge_base):
+    """Replaces the process-wide KnowledgeBase, and the shared engine's, e.g. after a data reload."""
+    global _knowledge_base
+    with _knowledge_base_lock:
+        _knowledge_base = knowledge_base
+    if _engine is not None: _engine.use_knowledge_base(knowledge_base)
+
+
+# --- ANSWER INDEX ---
+# Country-specific replies that only depend on the knowledge base. Steps 4
+# (in this order) and 5 of TravelEngine._match().
+INFO_INTENTS = ("best_time", "currency", "tip", "language")
+ANSWER_INTENTS = INFO_INTENTS + ("attractions",)
+
+
+def render_answer(kb, country, intent):
+    name = country.title()
+    if intent == "attractions":
+        return f"Top things to see in **{name}**: \n- " + "\n- ".join(kb.country_attractions.get(country))
+    info = kb.country_info[country]
+    if intent == "best_time": return f"🗓️ **Best time to visit {name}:** {info['best_time']}."
+    if intent == "currency": return f"💱 **Currency in {name}:** {info['currency']}."
+    if intent == "tip": return f"💸 **Tipping in {name}:** {info['tip']}"
+    if intent == "language": return f"🗣️ **Language in {name}:** {info['lang']}."
+    raise ValueError(f"Unknown answer intent: {intent}")
+
+
+class AnswerIndex:
+    """Every country x ANSWER_INTENTS reply rendered ahead of time into a flat dict.
+
+    Built from the knowledge base it is given, so it stays complete when
+    countries are added; ``build_seconds`` and ``size_bytes`` report its cost.
+    """
+
+    __slots__ = ("answers", "build_seconds", "size_bytes")
+
+    def __init__(self, kb):
+        started = time.perf_counter()
+        answers = {}
+        for country in kb.country_attractions:
+            answers[(country, "attractions")] = render_answer(kb, country, "attractions")
+        for country in kb.country_info:
+            for intent in INFO_INTENTS: answers[(country, intent)] = render_answer(kb, country, intent)
+        self.answers = answers
+        self.build_seconds = time.perf_counter() - started
+        self.size_bytes = sys.getsizeof(answers) + sum(sys.getsizeof(key) + sys.getsizeof(reply)
+                                                       for key, reply in answers.items())
+
+    def __len__(self):
+        return len(self.answers)
+
+    def get(self, key):
+        return self.answers.get(key)
+
+    def to_json(self):
+        """``{country: {intent: reply}}``, e.g. as a static artifact for an edge cache."""
+        table = {}
+        for (country, intent), reply in self.answers.items(): table.setdefault(country, {})[intent] = reply
+        return table
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+# --- RESPONSE CACHE ---
+# Intents whose replies must not be cached: packages change the conversation
+# state and suggestions pick a random destination.
+UNCACHEABLE_INTENTS = {"package", "suggestion"}
+
+_NOISE = re.compile(r'[?!,;:"()\[\]{}]+|\s+')
+
+
+def normalize_text(text):
+    """Lowercases, strips punctuation that never changes a reply and collapses whitespace.
+
+    Characters that carry meaning ($, €, '-' in '5-7', '.' in 'u.s.') are kept.
+    """
+    return _NOISE.sub(" ", text.lower()).strip()
+
+
+class ResponseCache:
+    """Thread-safe bounded LRU of normalized message -> reply, with hit/miss counters."""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            reply = self._entries.get(key)
+            if reply is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return reply
+
+    def put(self, key, reply):
+        with self._lock:
+            self._entries[key] = reply
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize: self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock: self._entries.clear()
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+
+class Reply:
+    """What the engine decided for one message, next to the rendered text.
+
+    ``stage`` is the index in STAGES of the stage that decided (see
+    stage_name), ``countries`` every country mentioned in order, ``package``
+    the package fields found in this message (package and budget-fit turns
+    only), ``visa`` ``(origin, destination)`` on visa turns with None for a
+    side the message did not name, and ``elapsed`` the seconds the call took.
+    TravelEngine.reply() hands out a copy, so callers may keep or change it.
+    """
+
+    __slots__ = ("intent", "stage", "package", "visa", "text", "elapsed", "_countries", "_mentions")
+
+    def __init__(self, intent, stage, countries, package, visa, text, elapsed=0.0, mentions=None):
+        self.intent = intent
+        self.stage = stage
+        self.package = package
+        self.visa = visa
+        self.text = text
+        self.elapsed = elapsed
+        # With CountryMatcher.find_all() ``mentions``, countries are only listed when first asked for.
+        self._countries = countries
+        self._mentions = mentions
+
+    @property
+    def countries(self):
+        if self._countries is None: self._countries = tuple(dict.fromkeys([m[0] for m in self._mentions]))
+        return self._countries
+
+    def __repr__(self):
+        return f"Reply(intent={self.intent!r}, stage={self.stage_name!r}, countries={self.countries!r})"
+
+    @property
+    def stage_name(self):
+        return STAGES[self.stage][0]
+
+    def copy(self):
+        # ``package`` is the only mutable field; the cached Reply must not share it.
+        package = dict(self.package) if self.package is not None else None
+        return Reply(self.intent, self.stage, self._countries, package, self.visa, self.text, self.elapsed,
+                     self._mentions)
+
+    def as_dict(self):
+        return {"intent": self.intent, "stage": self.stage_name, "countries": list(self.countries),
+                "package": self.package, "visa": list(self.visa) if self.visa else None, "text": self.text,
+                "elapsed_ms": round(self.elapsed * 1000, 3)}
+
+
+class TravelEngine:
+    """Stateless rule engine.
+
+    The engine only holds the shared knowledge base; conversation state is
+    passed in and returned by respond(), so one engine can serve any number of
+    conversations from many threads at once.
+    """
+
+    __slots__ = ("kb", "cache", "answers", "metrics", "suggestions")
+
+    def __init__(self, knowledge_base=None, cache_size=4096, precompile=False, metrics=None):
+        self.kb = knowledge_base or get_knowledge_base()
+        self.cache = ResponseCache(cache_size)
+        self.answers = None
+        self.suggestions = None  # travel_suggest.SuggestionIndex, built on the first suggest()
+        # Optional travel_metrics.Metrics; with None the stages run untimed.
+        self.metrics = metrics
+        if precompile: self.precompile()
+
+    def use_knowledge_base(self, knowledge_base):
+        """Switches to another knowledge base and drops replies built from the old one.
+
+        Safe while other threads are answering: the new answer index is built
+        before the switch, and replies computed from the old data are not cached.
+        """
+        answers = AnswerIndex(knowledge_base) if self.answers is not None else None
+        self.kb, self.answers = knowledge_base, answers
+        self.cache.clear()
+
+    @staticmethod
+    def new_state():
+        return {"state": None, "data": {}}
+
+    def respond(self, state, user_input):
+        """Returns ``(new_state, reply text)``. ``state`` itself is never modified.
+
+        Outside a dialogue, deterministic replies are served from the LRU cache
+        keyed on the normalized message.
+        """
+        context, result = self._respond(state, user_input)
+        return context, result.text
+
+    def reply(self, state, user_input):
+        """Like respond(), but returns ``(new_state, Reply)``: the decision behind the text, timed."""
+        started = time.perf_counter()
+        context, result = self._respond(state, user_input)
+        result = result.copy()  # The cached one is shared.
+        result.elapsed = time.perf_counter() - started
+        return context, result
+
+    def _respond(self, state, user_input):
+        text = normalize_text(user_input)
+        context = {"state": state.get("state"), "data": dict(state.get("data", {}))}
+        if context["state"] is not None or not self.cache.maxsize:
+            return context, self._match(context, text)
+
+        result = self.cache.get(text)
+        if result is None:
+            kb = self.kb
+            result = self._match(context, text)
+            if context["state"] is None and result.intent not in UNCACHEABLE_INTENTS and self.kb is kb:
+                self.cache.put(text, result)
+        return context, result
+
+    def suggest(self, text, limit=5):
+        """Type-ahead completions for a half-typed message: a list of travel_suggest.Suggestion."""
+        index = self.suggestions
+        if index is None or index.kb is not self.kb:  # Rebuilt once after use_knowledge_base()
+            from travel_suggest import SuggestionIndex
+            index = self.suggestions = SuggestionIndex(self.kb)
+        return index.suggest(text, limit)
+
+    def get_visa_rule(self, origin, dest):
+        if origin == dest: return "You don't need a visa to travel within your own country! 🏠"
+        reply = self.kb.visa_matrix.rules[self.kb.visa_matrix.lookup(origin, dest)][3]
+        return reply.format(origin=origin.title(), dest=dest.title())
+
+    def visa_free_destinations(self, origin):
+        """Every known destination that citizens of ``origin`` can visit visa-free."""
+        return self.kb.visa_matrix.destinations(origin, "visa_free")
+
+    def visa_required_origins(self, dest):
+        """Every known origin whose citizens need a visa for ``dest`` (ESTA does not count)."""
+        return self.kb.visa_matrix.origins(dest, "visa_required")
+
+    def calculate_package(self, data):
+        country = data.get('country')
+        people = data.get('people', 2)
+        budget = data.get('budget', 1000)
+        min_nights = data.get('min_nights', 3)
+        max_nights = data.get('max_nights', 7)
+
+        daily_cost = self.kb.daily_costs.get(country, 100)
+        total_daily_burn = daily_cost * people
+
+        if total_daily_burn <= 0: total_daily_burn = 100  # Safety
+
+        affordable_nights = int(budget / total_daily_burn)
+
+        if affordable_nights < min_nights:
+            return (f"🎉 **Custom Package for {country.title()}** 🎉\n\n"
+                    f"⚠️ **Budget Constraint:** A budget of ${budget} is quite tight for {people} people in {country.title()}. "
+                    f"Average daily cost is approx ${total_daily_burn}. You can afford about **{affordable_nights} nights**. "
+                    f"I recommend increasing the budget to at least ${total_daily_burn * min_nights} for a short {min_nights}-day trip.")
+
+        suggested_nights = min(affordable_nights, max_nights)
+        estimated_cost = suggested_nights * total_daily_burn
+        attractions = ", ".join(self.kb.country_attractions.get(country, ["City Center"])[:3])
+
+        return (f"🎉 **Custom Package for {country.title()}** 🎉\n\n"
+                f"Based on your budget of **${budget}** for **{people} people**:\n"
+                f"- **Recommended Stay:** {suggested_nights} Nights\n"
+                f"- **Estimated Total Cost:** ${estimated_cost} (Approx. ${daily_cost}/person/day)\n"
+                f"- **Suggested Itinerary:** Visit {attractions}.\n"
+                f"- **Travel Tip:** {'Great budget choice!' if suggested_nights == max_nights else 'Note: This maximizes your budget within the given range.'}")
+
+    def extract_package_details(self, text, current_data):
+        if self.metrics is None:
+            current_data.update(extract_entities(text).as_dict())
+        else:
+            started = time.perf_counter()
+            current_data.update(extract_entities(text).as_dict())
+            self.metrics.observe_call("extract_package_details", time.perf_counter() - started)
+        return current_data
+
+    def detect_country(self, text):
+        """Exact mention first; only when there is none, the closest typo ("polnd", "jappan")."""
+        matcher = self.kb.country_matcher
+        return matcher.find(text) or matcher.find_fuzzy(text)
+
+    def detect_countries(self, text):
+        return self.kb.country_matcher.find_all(text)
+
+    def rank_destinations(self, budget, people=2, min_nights=3, max_nights=7, top=5):
+        """Every country priced at once (see travel_budget); returns ``[(country, nights, cost), ...]``."""
+        from travel_budget import rank_destinations  # NumPy is only imported when needed
+        return rank_destinations(self.kb.daily_costs, budget, people, min_nights, max_nights, top)
+
+    def budget_fit_reply(self, details):
+        people = details.people or 2
+        min_nights, max_nights = details.min_nights or 3, details.max_nights or 7
+        ranked = self.rank_destinations(details.budget, people, min_nights, max_nights)
+        nights = f"{min_nights}-{max_nights}" if min_nights != max_nights else f"{min_nights}"
+        if not ranked:
+            return (f"😕 A budget of ${details.budget} does not cover {nights} nights for {people} people in any "
+                    f"destination I know. Try a bigger budget or fewer nights.")
+        lines = [f"- **{country.title()}:** {stay} nights, approx. ${cost}" for country, stay, cost in ranked]
+        return (f"💰 **Destinations that fit ${details.budget} for {people} people ({nights} nights):**\n"
+                + "\n".join(lines))
+
+    def trip_countries(self, text):
+        """Destinations mentioned in ``text`` in order, plus the origin named as "from <country>" (or None)."""
+        _, mentions, origin = self.kb.lexicon.scan(text)
+        return self._split_trip(mentions, origin)
+
+    @staticmethod
+    def _split_trip(mentions, origin):
+        # Lexicon.scan()'s mentions and origin index -> (origin country, destinations).
+        destinations = []
+        for i, (country, _, _) in enumerate(mentions):
+            if i != origin and country not in destinations: destinations.append(country)
+        return (mentions[origin][0] if origin is not None else None), destinations
+
+    def plan_itinerary(self, countries, people=2, budget=1000, nights=7, origin=None, min_leg=2,
+                       objective="attractions"):
+        """Splits ``nights`` across ``countries`` within ``budget``; see travel_itinerary.
+
+        With an ``origin``, countries whose citizens need a visa there are left out.
+        """
+        from travel_itinerary import plan_itinerary
+        excluded = {}
+        if origin is not None:
+            matrix = self.kb.visa_matrix
+            for country in countries:
+                if country != origin and matrix.rules[matrix.lookup(origin, country)][2] == "visa_required":
+                    excluded[country] = f"visa required for {origin.title()} citizens"
+        sights = {country: len(self.kb.country_attractions.get(country, ())) or 1 for country in countries}
+        return plan_itinerary(countries, self.kb.daily_costs, sights, people, budget, nights,
+                              min_leg=min_leg, objective=objective, excluded=excluded)
+
+    def itinerary_reply(self, data):
+        countries = data["countries"]
+        people, budget = data.get('people', 2), data.get('budget', 1000)
+        nights = data.get('max_nights', 7)
+        plan = self.plan_itinerary(countries, people, budget, nights, origin=data.get('origin'))
+        route = " + ".join(country.title() for country in countries)
+        lines = []
+        for leg in plan.legs:
+            sights = ", ".join(self.kb.country_attractions.get(leg.country, ["City Center"])[:leg.attractions])
+            lines.append(f"- **{leg.country.title()}:** {leg.nights} nights (~${leg.cost}) – {sights}")
+        for country, reason in plan.skipped:
+            lines.append(f"- ~~{country.title()}~~ skipped: {reason}")
+        if plan.max_nights < nights:
+            lines.append(f"- ℹ️ Trips are planned for at most {plan.max_nights} nights, not {nights}.")
+            nights = plan.max_nights
+        if not plan.legs:
+            return (f"🗺️ **Multi-country Package: {route}** 🗺️\n\n"
+                    f"⚠️ **No itinerary fits:** none of these countries works for {people} people with ${budget} "
+                    f"and up to {nights} nights.\n" + "\n".join(lines))
+        return (f"🗺️ **Multi-country Package: {route}** 🗺️\n\n"
+                f"Based on your budget of **${budget}** for **{people} people** and up to **{nights} nights**:\n"
+                + "\n".join(lines)
+                + f"\n- **Total:** {plan.nights} Nights, {plan.attractions} attractions, approx. ${plan.cost}")
+
+    def package_reply(self, data):
+        """Single-country package, or a multi-country itinerary when the dialogue named several countries."""
+        if len(data.get("countries", ())) > 1: return self.itinerary_reply(data)
+        return self.calculate_package(data)
+
+    def answer(self, country, intent):
+        """Reply for one country and ANSWER_INTENTS entry, from the precompiled index when there is one."""
+        if self.answers is not None:
+            reply = self.answers.get((country, intent))
+            if reply is not None: return reply
+        return render_answer(self.kb, country, intent)
+
+    def precompile(self):
+        """Renders every country x info-intent reply once; see AnswerIndex."""
+        self.answers = AnswerIndex(self.kb)
+        return self.answers
+
+    def _match(self, context, user_input):
+        """Runs the stages until one decides; returns its Reply (without ``elapsed``)."""
+        turn = _Turn(context, user_input.lower().strip())
+        metrics = self.metrics
+        if metrics is None:
+            self._detect(turn)
+            for index, (_, stage) in enumerate(STAGES):
+                result = stage(self, turn)
+                if result is not None: return turn.reply(index, *result)
+        else:
+            clock = time.perf_counter
+            started = clock()
+            self._detect(turn)
+            detect_seconds, timings = clock() - started, []
+            for index, (name, stage) in enumerate(STAGES):
+                started = clock()
+                result = stage(self, turn)
+                timings.append((name, clock() - started))
+                if result is not None:
+                    metrics.observe_turn(detect_seconds, timings, name)  # One lock round trip per turn.
+                    return turn.reply(index, *result)
+
+    def _detect(self, turn):
+        # One Lexicon pass for the keyword features and every country mention;
+        # then detect_country()'s choice, with the typo search only when nothing matched.
+        kb = self.kb
+        turn.features, turn.mentions, turn.origin = kb.lexicon.scan(turn.text)
+        turn.country = CountryMatcher.longest(turn.mentions) or kb.country_matcher.find_fuzzy(turn.text)
+
+    # Each stage returns ``(intent, reply)`` when it decides the reply, else None.
+    def _package_state(self, turn):
+        # 1. TRAVEL PACKAGE STATE HANDLING
+        context = turn.context
+        if context.get("state") != "planning_package": return None
+        turn.package = self.extract_package_details(turn.text, {})
+        data = context["data"]
+        data.update(turn.package)
+        if 'people' not in data: return "package", "Got it. How many people are traveling?"
+        if 'budget' not in data: return "package", f"Okay, for {data['people']} people. What is your total budget for the trip (in USD/EUR)?"
+
+        if 'min_nights' not in data:
+            if 'people' in data and 'budget' in data:
+                context["state"] = None
+                return "package", self.package_reply(data)
+            return "package", "Almost done! How many nights do you want to stay? (You can give a range like '5-7 nights')"
+
+        context["state"] = None
+        return "package", self.package_reply(data)
+
+    def _package_trigger(self, turn):
+        # 2. TRAVEL PACKAGE TRIGGER
+        context, features, mentioned_country = turn.context, turn.features, turn.country
+        if not ("package" in features and mentioned_country and "visa" not in features): return None
+        context["state"] = "planning_package"
+        context["data"] = {"country": mentioned_country}
+        origin, destinations = self._split_trip(turn.mentions, turn.origin)
+        if len(destinations) > 1:
+            # Several countries: plan one itinerary across them (see travel_itinerary).
+            mentioned_country = " + ".join(destinations)
+            context["data"] = {"country": destinations[0], "countries": destinations}
+            if origin: context["data"]["origin"] = origin
+        turn.package = self.extract_package_details(turn.text, {})
+        data = context["data"]
+        data.update(turn.package)
+        if 'people' not in data:
+            return "package", f"I can definitely build a travel package for **{mentioned_country.title()}**! 🎒\nFirst, how many people are traveling?"
+        elif 'budget' not in data:
+            return "package", f"Building a package for {data['people']} people to {mentioned_country.title()}. What is your total budget?"
+
+        elif 'min_nights' not in data:
+            if 'people' in data and 'budget' in data:
+                context["state"] = None
+                return "package", self.package_reply(data)
+            return "package", "And how many nights are you planning to stay? (e.g., '5-7 nights')"
+        else:
+            context["state"] = None
+            return "package", self.package_reply(data)
+
+    def _visa(self, turn):
+        # 3. VISA INQUIRIES
+        features, mentioned_country = turn.features, turn.country
+        if "visa" not in features: return None
+        visa_match = VISA_FROM_TO.search(turn.text) or VISA_CITIZEN.search(turn.text)
+        if visa_match:
+            origin, dest = (visa_match.group(slot).lower() for slot in ('origin', 'dest'))
+            matcher = self.kb.country_matcher
+            origin = (matcher.closest(origin) or (origin,))[0]
+            dest = (matcher.closest(dest) or (dest,))[0]
+            turn.visa = (origin, dest)
+            return "visa", self.get_visa_rule(origin, dest)
+
+        # Any language or word order: "vizos iš Lietuvos į Japoniją", "visa to Japan from the UK".
+        origin, destinations = self._split_trip(turn.mentions, turn.origin)
+        if origin and destinations:
+            turn.visa = (origin, destinations[0])
+            return "visa", self.get_visa_rule(origin, destinations[0])
+
+        if mentioned_country: turn.visa = (None, mentioned_country)
+        if mentioned_country and "from" in features:
+            return "visa", f"I see you're asking about a visa for {mentioned_country.title()}, but I need to know your origin. Try 'Visa from [Origin] to {mentioned_country.title()}'."
+        return "visa", "To check visas, please tell me: **Where are you from** and **Where are you going?** (e.g., 'Visa from Turkey to Greece')"
+
+    def _common_questions(self, turn):
+        # 4. COMMON QUESTIONS
+        if turn.country and turn.country in self.kb.country_info:
+            for intent in INFO_INTENTS:
+                if intent in turn.features: return intent, self.answer(turn.country, intent)
+        return None
+
+    def _attractions(self, turn):
+        # 5. ATTRACTIONS
+        features = turn.features
+        if turn.country:
+            if "attractions" in features or ("visit" in features and "visa" not in features and "tip" not in features):
+                return "attractions", self.answer(turn.country, "attractions")
+        return None
+
+    def _packing(self, turn):
+        # 6. PACKING
+        if "packing" not in turn.features: return None
+        pack_match = PACKING_TARGET.search(turn.text)
+        target = pack_match.group('target') if pack_match else turn.country  # "ką pasiimti į Tailandą"
+        if not target: return None
+        if any(x in target for x in ['russia', 'iceland', 'winter', 'snow', 'cold', 'ski', 'poland', 'ukraine']):
+            return "packing", f"For {target}, it might be chilly! Pack: " + ", ".join(self.kb.packing_lists['cold'])
+        elif any(x in target for x in ['beach', 'summer', 'hot', 'thailand', 'india', 'greece', 'turkey']):
+            return "packing", f"For {target}, enjoy the warmth! Pack: " + ", ".join(self.kb.packing_lists['hot'])
+        return "packing", "Sticking to general essentials: " + ", ".join(self.kb.packing_lists['general'])
+
+    def _suggestions(self, turn):
+        # 7. SUGGESTIONS
+        features = turn.features
+        if "suggest" not in features: return None
+        if "beach" in features: return "suggestion", f"For a beach trip, I highly recommend **{random.choice(self.kb.destinations['beach'])}**!"
+        if "mountain" in features: return "suggestion", f"For mountains, **{random.choice(self.kb.destinations['mountain'])}** is amazing."
+        if "city" in features: return "suggestion", f"If you want city vibes, try **{random.choice(self.kb.destinations['city'])}**."
+        if "budget" in features: return "suggestion", f"For a budget-friendly trip, consider **{random.choice(self.kb.destinations['budget'])}**."
+        return "suggestion", "Do you prefer a **beach**, **mountains**, a bustling **city**, or a **budget-friendly** trip?"
+
+    def _budget_fit(self, turn):
+        # 7b. WHAT FITS MY BUDGET
+        if "fit" in turn.features:
+            details = extract_entities(turn.text)
+            if details.budget is not None:
+                turn.package = details.as_dict()
+                return "budget_fit", self.budget_fit_reply(details)
+        return None
+
+    def _fallback(self, turn):
+        # 8. BUDGETING, GREETING, FALLBACK
+        if "budgeting" in turn.features:
+            return "budgeting", "Budgeting: \n- **Budget:** Thailand, India, Vietnam ($30-50/day)\n- **Mid:** Turkey, Greece, Poland ($80-120/day)\n- **High:** USA, UK, Switzerland ($200+/day)."
+
+        if "greeting" in turn.features:
+            return "greeting", "Hello! I can help with **Travel Packages**, **Visas**, **Packing**, **Currency**, or **Suggestions**."
+
+        return "fallback", "I can help with **Travel Packages** (e.g., 'Package for Poland'), **Visas**, **Packing**, **Currency**, **Best Time to Visit**, or **Suggestions**."
+
+
+class _Turn:
+    """One message on its way through the stages.
+
+    TravelEngine._detect() fills in the keyword features and country
+    mentions; stages leave what they extracted in ``package`` and ``visa``
+    for the Reply.
+    """
+
+    __slots__ = ("context", "text", "features", "country", "mentions", "origin", "package", "visa")
+
+    def __init__(self, context, text):
+        self.context = context
+        self.text = text
+        self.country = self.origin = self.package = self.visa = None
+        self.features = frozenset()
+        self.mentions = ()
+
+    def reply(self, stage, intent, text):
+        if self.mentions: return Reply(intent, stage, None, self.package, self.visa, text, mentions=self.mentions)
+        return Reply(intent, stage, (self.country,) if self.country else (), self.package, self.visa, text)
+
+
+# The stages of TravelEngine._match(), in order; the first that returns a reply wins.
+STAGES = (
+    ("package_state", TravelEngine._package_state),
+    ("package_trigger", TravelEngine._package_trigger),
+    ("visa", TravelEngine._visa),
+    ("common_questions", TravelEngine._common_questions),
+    ("attractions", TravelEngine._attractions),
+    ("packing", TravelEngine._packing),
+    ("suggestions", TravelEngine._suggestions),
+    ("budget_fit", TravelEngine._budget_fit),
+    ("fallback", TravelEngine._fallback),
+)
+
+
+_engine = None
+
+
+def get_engine():
+    """Returns the process-wide TravelEngine over the shared knowledge base."""
+    global _engine
+    if _engine is None:
+        knowledge_base = get_knowledge_base()
+        with _knowledge_base_lock:
+            if _engine is None: _engine = TravelEngine(knowledge_base)
+    return _engine
+
+
+def _shared(name):
+    return property(lambda self: getattr(self.kb, name))
+
+
+class RuleBasedChatbot:
+    """One conversation: its context plus the shared, stateless TravelEngine."""
+
+    # Per-session state is only the conversation context; the knowledge base
+    # and its compiled indexes are shared by all sessions.
+    __slots__ = ("context",)
+
+    # VERSION TAG: Set to 1.7
+    version = "1.7"
+
+    engine = property(lambda self: get_engine())
+    kb = property(lambda self: self.engine.kb)
+    country_attractions = _shared("country_attractions")
+    country_info = _shared("country_info")
+    daily_costs = _shared("daily_costs")
+    destinations = _shared("destinations")
+    packing_lists = _shared("packing_lists")
+    country_matcher = _shared("country_matcher")
+    visa_matrix = _shared("visa_matrix")
+    schengen = property(lambda self: self.kb.visa_groups["schengen"])
+    eu_visa_free_to_china = property(lambda self: self.kb.visa_groups["eu_visa_free_to_china"])
+
+    def __init__(self):
+        self.context = TravelEngine.new_state()
+
+    def match_rule(self, user_input):
+        self.context, reply = self.engine.respond(self.context, user_input)
+        return reply
+
+    def reply(self, user_input):
+        """Like match_rule(), but returns the structured Reply (intent, entities, timing)."""
+        self.context, result = self.engine.reply(self.context, user_input)
+        return result
+
+    def suggest(self, text, limit=5):
+        return self.engine.suggest(text, limit)
+
+    def get_visa_rule(self, origin, dest):
+        return self.engine.get_visa_rule(origin, dest)
+
+    def visa_free_destinations(self, origin):
+        return self.engine.visa_free_destinations(origin)
+
+    def visa_required_origins(self, dest):
+        return self.engine.visa_required_origins(dest)
+
+    def calculate_package(self, data):
+        return self.engine.calculate_package(data)
+
+    def extract_package_details(self, text, current_data):
+        return self.engine.extract_package_details(text, current_data)
+
+    def detect_country(self, text):
+        return self.engine.detect_country(text)
+
+    def detect_countries(self, text):
+        return self.engine.detect_countries(text)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Travel bot engine tools.")
+    parser.add_argument("--export-answers", metavar="PATH",
+                        help="Precompile every country x intent reply and write it as JSON.")
+    args = parser.parse_args(argv)
+    if args.export_answers:
+        index = get_engine().precompile()
+        index.export_json(args.export_answers)
+        print(f"{len(index)} answers in {index.build_seconds * 1000:.2f} ms, "
+              f"~{index.size_bytes / 1024:.1f} KiB -> {args.export_answers}")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
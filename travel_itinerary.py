@@ -0,0 +1,96 @@
+"""Multi-country itinerary optimizer.
+
+Splits a trip's nights across several countries with a knapsack-style dynamic
+program over ``daily_costs``. A leg of ``n`` nights in a country covers
+``min(n, attractions)`` of its sights (one per night) and costs
+``n * daily_cost * people``; a country is either skipped or gets at least
+``min_leg`` nights. The plan maximizes attractions covered, then nights
+(or the other way round), then minimizes cost, within the budget.
+
+The DP state is (nights used, attractions covered) -> cheapest cost, and
+only reachable states are kept. ``nights`` is first capped at MAX_NIGHTS and
+at what the budget buys in the cheapest country, so the search is at most
+O(countries * MAX_NIGHTS^3) however many nights or dollars a message asks for.
+"""
+OBJECTIVES = ("attractions", "nights")
+MAX_NIGHTS = 60  # Longest trip planned; longer requests are planned for this many nights.
+
+
+class Leg:
+    __slots__ = ("country", "nights", "cost", "attractions")
+
+    def __init__(self, country, nights, cost, attractions):
+        self.country = country
+        self.nights = nights
+        self.cost = cost
+        self.attractions = attractions
+
+    def __repr__(self):
+        return f"Leg({self.country!r}, nights={self.nights}, cost={self.cost}, attractions={self.attractions})"
+
+
+class Itinerary:
+    __slots__ = ("legs", "nights", "cost", "attractions", "skipped", "max_nights")
+
+    def __init__(self, legs, skipped, max_nights=None):
+        self.legs = legs
+        self.skipped = skipped  # [(country, reason), ...]
+        self.max_nights = max_nights  # Nights actually planned for, at most MAX_NIGHTS
+        self.nights = sum(leg.nights for leg in legs)
+        self.cost = sum(leg.cost for leg in legs)
+        self.attractions = sum(leg.attractions for leg in legs)
+
+
+def plan_itinerary(countries, daily_costs, attraction_counts, people, budget, nights,
+                   min_leg=2, objective="attractions", excluded=None):
+    """Best split of at most ``nights`` nights across ``countries``.
+
+    ``attraction_counts`` maps country -> number of sights; ``excluded`` maps
+    country -> reason for countries that must not get a leg (e.g. a visa is
+    required). Returns an Itinerary, with no legs when nothing fits; its
+    ``max_nights`` is below ``nights`` when the request was capped at MAX_NIGHTS.
+    """
+    if objective not in OBJECTIVES: raise ValueError(f"objective must be one of {OBJECTIVES}")
+    excluded = excluded or {}
+    skipped = [(country, excluded[country]) for country in countries if country in excluded]
+    candidates = [country for country in countries if country not in excluded]
+
+    max_nights = nights = max(0, min(nights, MAX_NIGHTS))
+    burns = {country: max(daily_costs.get(country, 100) * people, 1) for country in candidates}
+    if burns: nights = min(nights, budget // min(burns.values()))  # No plan can buy more nights than this.
+
+    cost = {(0, 0): 0}  # (nights used, attractions covered) -> cheapest cost; reachable states only
+    choices = []  # per candidate: state -> nights given to that country
+    for country in candidates:
+        burn, sights = burns[country], attraction_counts.get(country, 1)
+        new_cost = dict(cost)
+        chosen = {}
+        for (used, covered), spent in cost.items():
+            for stay in range(min_leg, nights - used + 1):
+                total = spent + stay * burn
+                if total > budget: break
+                target = (used + stay, covered + min(stay, sights))
+                if total < new_cost.get(target, budget + 1):
+                    new_cost[target] = total
+                    chosen[target] = stay
+        cost = new_cost
+        choices.append(chosen)
+
+    def rank(state):
+        used, covered = state
+        primary, secondary = (covered, used) if objective == "attractions" else (used, covered)
+        return primary, secondary, -cost[state]
+
+    best = max(cost, key=rank)
+
+    legs = []
+    for country, chosen in zip(reversed(candidates), reversed(choices)):
+        stay = chosen.get(best)
+        if stay is None: continue  # State carried over unchanged: this country got no leg.
+        sights = attraction_counts.get(country, 1)
+        legs.append(Leg(country, stay, stay * burns[country], min(stay, sights)))
+        best = (best[0] - stay, best[1] - min(stay, sights))
+    legs.reverse()
+    planned = {leg.country for leg in legs}
+    skipped += [(country, "does not fit the budget or nights") for country in candidates if country not in planned]
+    return Itinerary(legs, skipped, max_nights)
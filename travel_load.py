@@ -0,0 +1,299 @@
+"""Load generator for the multi-turn travel package dialogue.
+
+    python travel_load.py --sessions 1000 --workers 8 --think 0.2
+    python travel_load.py --sessions 10000 --processes 4 --memory 1000,10000
+    python travel_load.py --url http://127.0.0.1:8080 --sessions 1000 --workers 32
+
+Every simulated customer opens a package dialogue and then answers whatever
+the bot asks (people, budget, nights). Some answers are vague and get the
+question repeated, others volunteer several details at once, and some openers
+are complete requests or multi-country trips. All dialogues are live at the
+same time: a pool of worker threads (optionally in several processes) takes
+whichever conversation is due next, and each waits an exponentially
+distributed think time between turns. Dialogues are driven in-process
+through ChatServer.chat() or, with --url, over HTTP against a running
+travel_server.py.
+
+Reported: dialogue completion time (first message to final package),
+per-turn latency percentiles, throughput, and memory per live session.
+"""
+import argparse
+import heapq
+import http.client
+import json
+import random
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+from travel_engine import get_knowledge_base
+
+# A reply starting with one of these ends the dialogue.
+FINAL_MARKERS = ("🎉 **Custom Package", "🗺️ **Multi-country Package")
+MAX_TURNS = 12  # A dialogue still open after this many turns counts as failed.
+
+OPENERS = ["Create a travel package for {country}", "I want a travel package to {country}",
+           "Plan a package for {country} for {people}", "package to {country} for {people}, {nights}",
+           "Plan a package for {country}: {people}, {budget}, {nights}",
+           "Plan a trip package for {people}, {budget}, {nights}: {country} + {other} + {third}"]
+PEOPLE = ["{n} people", "{n} people traveling", "just me", "a couple", "{n} pax"]
+BUDGETS = ["budget {b}", "${b}", "{b} dollars", "around {b} usd", "our budget is {b} eur"]
+NIGHTS = ["{n} nights", "{n}-{m} nights", "a week", "about {n} days"]
+VAGUE = ["not sure yet", "hmm, let me think", "what do you suggest?", "depends"]
+
+
+# --- SIMULATED CUSTOMERS ---
+class Customer:
+    """One scripted conversation; every choice comes from its own seeded RNG, so a run is reproducible."""
+
+    __slots__ = ("session_id", "rng", "message", "turns", "started", "finished", "vague_rate", "extra_rate")
+
+    def __init__(self, session_id, seed, countries, vague_rate=0.15, extra_rate=0.3):
+        self.session_id = session_id
+        self.rng = random.Random(seed)
+        self.turns = 0
+        self.started = self.finished = None
+        self.vague_rate = vague_rate
+        self.extra_rate = extra_rate
+        country, other, third = self.rng.sample(countries, 3)
+        self.message = self.rng.choice(OPENERS).format(country=country, other=other, third=third, people=self.people(),
+                                                       budget=self.budget(), nights=self.nights())
+
+    def people(self):
+        return self.rng.choice(PEOPLE).format(n=self.rng.randrange(1, 7))
+
+    def budget(self):
+        return self.rng.choice(BUDGETS).format(b=self.rng.randrange(400, 9000, 50))
+
+    def nights(self):
+        n = self.rng.randrange(2, 10)
+        return self.rng.choice(NIGHTS).format(n=n, m=n + self.rng.randrange(1, 5))
+
+    def answer(self, reply):
+        """The next message after ``reply``, or None when the dialogue is over."""
+        if reply.startswith(FINAL_MARKERS): return None
+        asked = reply.lower()
+        if self.rng.random() < self.vague_rate: return self.rng.choice(VAGUE)
+        if "how many people" in asked:
+            parts = [self.people()]
+            if self.rng.random() < self.extra_rate: parts.append(self.nights())
+            if self.rng.random() < self.extra_rate: parts.append(self.budget())
+        elif "budget" in asked:
+            parts = [self.budget()]
+            if self.rng.random() < self.extra_rate: parts.insert(0, self.nights())
+        elif "nights" in asked:
+            parts = [self.nights()]
+        else:
+            raise ValueError(f"Unexpected reply in a package dialogue: {reply[:80]!r}")
+        return ", ".join(parts)
+
+
+def customers(count, seed=0, first_index=0, step=1):
+    """Customers ``first_index``, ``first_index + step``, ... below ``count``; the same index is the same script."""
+    countries = sorted(get_knowledge_base().country_attractions)
+    return [Customer(f"load-{seed}-{i}", seed * 1000003 + i, countries) for i in range(first_index, count, step)]
+
+
+# --- DRIVERS ---
+class InProcessDriver:
+    """Turns through ChatServer.chat(): the server's own code path without the network."""
+
+    def __init__(self, server=None):
+        from travel_server import ChatServer
+        self.server = server or ChatServer()
+
+    def turn(self, session_id, message):
+        return self.server.chat({"session_id": session_id, "message": message})["reply"]
+
+
+class HTTPDriver:
+    """POST /chat to a running travel_server.py, one keep-alive connection per worker thread."""
+
+    def __init__(self, url, timeout=30):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+
+    def turn(self, session_id, message):
+        body = json.dumps({"session_id": session_id, "message": message})
+        for attempt in (0, 1):  # The server may have closed an idle connection.
+            connection = getattr(self._local, "connection", None)
+            if connection is None:
+                connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                self._connections.append(connection)
+            try:
+                connection.request("POST", "/chat", body, {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                payload = json.loads(response.read())
+            except (ConnectionError, http.client.HTTPException):
+                connection.close()
+                self._local.connection = None
+                if attempt: raise
+                continue
+            if response.status != 200: raise RuntimeError(f"HTTP {response.status}: {payload.get('error')}")
+            return payload["reply"]
+
+    def close(self):
+        for connection in self._connections: connection.close()
+        self._connections = []
+
+
+# --- SCHEDULER ---
+def drive(driver, dialogues, workers=8, think=0.0, ramp=0.0):
+    """Runs every dialogue to the end; returns ``(turn latencies, completion times, turns, errors)`` in seconds.
+
+    Dialogues start spread evenly over ``ramp`` seconds. After each reply a
+    dialogue becomes due again after an exponential think time with mean
+    ``think``, and the next free worker takes the dialogue that is due first.
+    """
+    clock = time.perf_counter
+    start = clock()
+    due = [(start + ramp * i / max(len(dialogues), 1), i) for i in range(len(dialogues))]
+    heapq.heapify(due)
+    ready = threading.Condition()
+    latencies, completions = [], []
+    counts = {"open": len(dialogues), "turns": 0, "errors": 0}
+
+    def next_dialogue():
+        with ready:
+            while counts["open"]:
+                if not due:
+                    ready.wait()
+                    continue
+                delay = due[0][0] - clock()
+                if delay <= 0: return heapq.heappop(due)[1]
+                ready.wait(delay)
+            return None
+
+    def worker():
+        while True:
+            index = next_dialogue()
+            if index is None: return
+            dialogue = dialogues[index]
+            began = clock()
+            if dialogue.started is None: dialogue.started = began
+            try:
+                reply = driver.turn(dialogue.session_id, dialogue.message)
+                ended = clock()
+                dialogue.turns += 1
+                dialogue.message = dialogue.answer(reply) if dialogue.turns < MAX_TURNS else None
+                failed = dialogue.message is None and not reply.startswith(FINAL_MARKERS)
+            except Exception:
+                ended, failed = clock(), True
+                dialogue.message = None
+            with ready:
+                counts["turns"] += 1
+                latencies.append(ended - began)
+                if dialogue.message is None:
+                    counts["open"] -= 1
+                    if failed:
+                        counts["errors"] += 1
+                    else:
+                        dialogue.finished = ended
+                        completions.append(ended - dialogue.started)
+                    if not counts["open"]: ready.notify_all()
+                else:
+                    pause = dialogue.rng.expovariate(1 / think) if think > 0 else 0.0
+                    heapq.heappush(due, (ended + pause, index))
+                    ready.notify()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    return latencies, completions, counts["turns"], counts["errors"]
+
+
+def _run_shard(url, sessions, seed, shard, shards, workers, think, ramp):
+    if not url: return drive(InProcessDriver(), customers(sessions, seed, shard, shards), workers, think, ramp)
+    driver = HTTPDriver(url)
+    try:
+        return drive(driver, customers(sessions, seed, shard, shards), workers, think, ramp)
+    finally:
+        driver.close()
+
+
+def run_load(sessions, workers=8, think=0.0, ramp=0.0, processes=1, url=None, seed=0):
+    """Simulates ``sessions`` concurrent package dialogues and returns the summary dict.
+
+    With ``processes`` > 1 the dialogues are split across a process pool, each
+    process running ``workers`` threads and, in-process, its own engine.
+    """
+    started = time.perf_counter()
+    if processes > 1:
+        with ProcessPoolExecutor(processes) as pool:
+            shards = list(pool.map(_run_shard, *zip(*[(url, sessions, seed, shard, processes, workers, think, ramp)
+                                                      for shard in range(processes)])))
+    else:
+        shards = [_run_shard(url, sessions, seed, 0, 1, workers, think, ramp)]
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for shard in shards for latency in shard[0])
+    completions = sorted(completion for shard in shards for completion in shard[1])
+    turns = sum(shard[2] for shard in shards)
+    return {
+        "sessions": sessions, "completed": len(completions), "errors": sum(shard[3] for shard in shards),
+        "turns": turns, "seconds": round(elapsed, 3), "turns_per_second": round(turns / elapsed),
+        "turns_per_dialogue": round(turns / max(sessions, 1), 2),
+        "turn_ms": _percentiles(latencies, 1000), "completion_ms": _percentiles(completions, 1000),
+    }
+
+
+def _percentiles(ordered, scale):
+    if not ordered: return {}
+    def at(q): return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * scale, 3)
+    return {"p50": at(0.5), "p95": at(0.95), "p99": at(0.99), "p999": at(0.999), "max": round(ordered[-1] * scale, 3)}
+
+
+# --- MEMORY ---
+def session_memory(sessions, seed=0):
+    """Bytes still allocated per live session after every customer sent the opening message in-process."""
+    driver = InProcessDriver()
+    dialogues = customers(sessions, seed)
+    driver.turn("warm-up", dialogues[0].message)  # Lazily built indexes are not per-session memory.
+    driver.server.store.delete("warm-up")
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for dialogue in dialogues:
+        driver.turn(dialogue.session_id, dialogue.message)
+    allocated = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    live = len(driver.server.store)
+    return allocated / live if live else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent multi-turn load for the package dialogue.")
+    parser.add_argument("--sessions", type=int, default=1000, help="Concurrent dialogues (default 1000).")
+    parser.add_argument("--workers", type=int, default=8, help="Worker threads per process.")
+    parser.add_argument("--processes", type=int, default=1, help="Split the dialogues across this many processes.")
+    parser.add_argument("--think", type=float, default=0.0, help="Mean think time between turns, in seconds.")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Start the dialogues spread over this many seconds.")
+    parser.add_argument("--url", help="Drive a running travel_server.py instead of an in-process engine.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", metavar="N[,N...]", help="Also measure memory per live session at these counts.")
+    parser.add_argument("--json", metavar="PATH", help="Write the summary as JSON.")
+    args = parser.parse_args(argv)
+
+    summary = run_load(args.sessions, args.workers, args.think, args.ramp, args.processes, args.url, args.seed)
+    target = args.url or "in-process"
+    print(f"{summary['sessions']} dialogues ({target}, {args.processes} x {args.workers} workers, think {args.think}s): "
+          f"{summary['completed']} completed, {summary['errors']} failed, {summary['turns']} turns in {summary['seconds']} s")
+    print(f"  throughput: {summary['turns_per_second']} turns/s, {summary['turns_per_dialogue']} turns/dialogue")
+    for label, key in (("turn latency", "turn_ms"), ("completion", "completion_ms")):
+        values = summary[key]
+        if values: print(f"  {label:<13} " + "  ".join(f"{name} {value:.2f} ms" for name, value in values.items()))
+    if args.memory:
+        summary["bytes_per_session"] = {}
+        for count in map(int, args.memory.split(",")):
+            summary["bytes_per_session"][count] = per_session = round(session_memory(count, args.seed))
+            print(f"  memory per live session at {count}: {per_session / 1024:.2f} KiB")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(summary, f, indent=2)
+    return 0 if not summary["errors"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
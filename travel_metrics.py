@@ -0,0 +1,128 @@
+"""Latency histograms for the stages of TravelEngine._match().
+
+    metrics = Metrics()
+    engine = TravelEngine(metrics=metrics)   # or engine.metrics = metrics
+    ...
+    print(metrics.to_prometheus())
+
+Per stage it records how often the stage ran, how often it decided the reply
+and how long it took; detect_country() and extract_package_details() are
+timed as calls. With ``engine.metrics = None`` (the default) nothing is timed.
+"""
+import json
+import threading
+from bisect import bisect_left
+
+# Upper bounds in seconds: from a microsecond up to 100 ms.
+DEFAULT_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 1e-2, 1e-1)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is +Inf.
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate by linear interpolation inside the bucket, as Prometheus' histogram_quantile() does."""
+        if not self.count: return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets): return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def cumulative(self):
+        """``[(upper bound, observations <= bound), ...]`` ending with ``("+Inf", count)``."""
+        total, rows = 0, []
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            rows.append((bound, total))
+        return rows
+
+
+class Metrics:
+    """Thread-safe registry of the stage and call histograms."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.stages = {}  # stage -> Histogram
+        self.matches = {}  # stage -> replies decided
+        self.calls = {}  # function -> Histogram
+        self._lock = threading.Lock()
+
+    def observe_turn(self, detect_seconds, stage_timings, matched):
+        """Records one _match() call: detect_country's time, ``[(stage, seconds), ...]`` and the deciding stage."""
+        with self._lock:
+            self._observe(self.calls, "detect_country", detect_seconds)
+            for stage, seconds in stage_timings:
+                self._observe(self.stages, stage, seconds)
+            self.matches[matched] = self.matches.get(matched, 0) + 1
+
+    def _observe(self, histograms, name, seconds):
+        histogram = histograms.get(name)
+        if histogram is None: histogram = histograms[name] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def observe_call(self, function, seconds):
+        with self._lock:
+            self._observe(self.calls, function, seconds)
+
+    def reset(self):
+        with self._lock:
+            self.stages, self.matches, self.calls = {}, {}, {}
+
+    def summary(self):
+        """One row per stage and timed call: runs, matches, mean/p50/p95/p99 in microseconds."""
+        with self._lock:
+            rows = []
+            for kind, histograms in (("stage", self.stages), ("call", self.calls)):
+                for name, histogram in histograms.items():
+                    rows.append({
+                        "name": name, "kind": kind, "runs": histogram.count,
+                        "matches": self.matches.get(name, 0) if kind == "stage" else None,
+                        "mean_us": round(histogram.sum / histogram.count * 1e6, 2) if histogram.count else 0.0,
+                        **{f"p{int(q * 100)}_us": round(histogram.quantile(q) * 1e6, 2) for q in (0.5, 0.95, 0.99)},
+                    })
+            return rows
+
+    def to_json(self):
+        with self._lock:
+            def dump(histogram):
+                return {"count": histogram.count, "sum": histogram.sum,
+                        "buckets": [[bound, total] for bound, total in histogram.cumulative()]}
+
+            return json.dumps({
+                "stages": {stage: dict(dump(h), matches=self.matches.get(stage, 0)) for stage, h in self.stages.items()},
+                "calls": {function: dump(h) for function, h in self.calls.items()},
+            }, indent=2)
+
+    def to_prometheus(self, prefix="wanderlust"):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            lines = []
+            for metric, label, histograms, help_text in (
+                    (f"{prefix}_stage_seconds", "stage", self.stages, "Time spent in each match_rule stage."),
+                    (f"{prefix}_call_seconds", "function", self.calls, "Time spent in instrumented helper calls.")):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for name, histogram in histograms.items():
+                    for bound, total in histogram.cumulative():
+                        lines.append(f'{metric}_bucket{{{label}="{name}",le="{bound}"}} {total}')
+                    lines.append(f'{metric}_sum{{{label}="{name}"}} {histogram.sum!r}')
+                    lines.append(f'{metric}_count{{{label}="{name}"}} {histogram.count}')
+            metric = f"{prefix}_stage_matches_total"
+            lines += [f"# HELP {metric} Replies decided by each match_rule stage.", f"# TYPE {metric} counter"]
+            lines += [f'{metric}{{stage="{stage}"}} {count}' for stage, count in self.matches.items()]
+            return "\n".join(lines) + "\n"
@@ -0,0 +1,222 @@
+"""Headless HTTP/JSON chat service for the travel bot (stdlib asyncio only).
+
+    python travel_server.py --port 8080
+
+POST /chat   {"session_id": "...", "message": "..."} -> {"session_id": "...", "reply": "..."}
+             session_id is optional; a new one is issued when it is missing. With
+             "structured": true the response also has "result": the intent, stage,
+             countries, package fields and visa origin/destination (Reply.as_dict()).
+GET  /suggest?q=...&limit=N  type-ahead completions of a half-typed message:
+             {"query": "...", "suggestions": [{"text": "...", "kind": "question", "country": "..."}, ...]}
+GET  /health {"status": "ok", "sessions": <live sessions>, "data_revision": <knowledge base revision>}
+GET  /metrics       per-stage latency histograms, Prometheus text format (with --metrics)
+GET  /metrics.json  the same as JSON
+
+Every turn is a TravelEngine.respond() call against a shared engine, with the
+conversation context kept in a session store keyed by session ID: in memory,
+or with --session-db in an SQLite file that several workers can share.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import traceback
+import uuid
+from http import HTTPStatus
+from urllib.parse import parse_qs
+
+from travel_data import DataFile
+from travel_engine import TravelEngine, get_engine
+from travel_metrics import Metrics
+from travel_sessions import MemorySessionStore, SQLiteSessionStore
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_SUGGESTIONS = 20
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+class ChatServer:
+    def __init__(self, engine=None, store=None, expire_interval=30, data_file=None, flush_interval=0.25,
+                 metrics=None):
+        self.engine = engine or get_engine()
+        if metrics is not None: self.engine.metrics = metrics
+        self.store = store if store is not None else MemorySessionStore()
+        self.expire_interval = expire_interval
+        self.flush_interval = flush_interval
+        self.data_file = data_file
+        self._server = None
+        self._tasks = []
+
+    # --- LIFECYCLE ---
+    async def start(self, host="127.0.0.1", port=8080):
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        self._tasks = [asyncio.create_task(self._expire_loop()), asyncio.create_task(self._flush_loop())]
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        for task in self._tasks: task.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        self.store.flush()
+
+    async def _expire_loop(self):
+        while True:
+            await asyncio.sleep(self.expire_interval)
+            self.store.expire()
+            if self.data_file is not None: self.data_file.reload_if_changed(self.engine)
+
+    async def _flush_loop(self):
+        # Buffered stores also flush on their own when a batch fills up.
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.store.flush()
+
+    # --- ROUTES ---
+    def chat(self, payload):
+        message = payload.get("message")
+        if not isinstance(message, str) or not message.strip():
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'message' must be a non-empty string")
+        session_id = str(payload.get("session_id") or uuid.uuid4().hex)
+        state = self.store.get(session_id) or TravelEngine.new_state()
+        state, reply = self.engine.reply(state, message)
+        self.store.put(session_id, state)
+        response = {"session_id": session_id, "reply": reply.text}
+        if payload.get("structured"): response["result"] = reply.as_dict()
+        return response
+
+    def suggest(self, query):
+        params = parse_qs(query)
+        text = params.get("q", [""])[0]
+        try:
+            limit = int(params.get("limit", ["5"])[0])
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'limit' must be an integer")
+        if not 1 <= limit <= MAX_SUGGESTIONS:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"'limit' must be between 1 and {MAX_SUGGESTIONS}")
+        return {"query": text, "suggestions": [s.as_dict() for s in self.engine.suggest(text, limit)]}
+
+    def route(self, method, path, body, query=""):
+        if path == "/chat":
+            if method != "POST": raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be JSON")
+            if not isinstance(payload, dict): raise HTTPError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+            return self.chat(payload)
+        if path == "/suggest":
+            if method != "GET": raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            return self.suggest(query)
+        if path == "/health":
+            if method != "GET": raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            return {"status": "ok", "sessions": len(self.store), "data_revision": self.engine.kb.revision}
+        if path in ("/metrics", "/metrics.json"):
+            if method != "GET": raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+            metrics = self.engine.metrics
+            if metrics is None: raise HTTPError(HTTPStatus.NOT_FOUND, "Metrics are disabled")
+            return json.loads(metrics.to_json()) if path == "/metrics.json" else metrics.to_prometheus()
+        raise HTTPError(HTTPStatus.NOT_FOUND)
+
+    # --- HTTP/1.1 ---
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line: break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""): break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    await self._send(writer, HTTPStatus.BAD_REQUEST, {"error": "Bad Content-Length"}, False)
+                    break
+
+                try:
+                    if length > MAX_BODY_BYTES: raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+                    body = await reader.readexactly(length) if length else b""
+                    path, _, query = target.partition("?")
+                    status, result = HTTPStatus.OK, self.route(method, path, body, query)
+                except HTTPError as error:
+                    status, result = error.status, {"error": str(error)}
+                    keep_alive = keep_alive and status != HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    raise
+                except Exception:
+                    # A bug in one request must still get a response and leave the server running.
+                    print(f"Error handling {method} {target}:", file=sys.stderr)
+                    traceback.print_exc()
+                    status, result = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": HTTPStatus.INTERNAL_SERVER_ERROR.phrase}
+
+                await self._send(writer, status, result, keep_alive)
+                if not keep_alive: break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _send(writer, status, payload, keep_alive):
+        if isinstance(payload, str):  # Prometheus exposition format
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host, port, ttl, max_sessions, data=None, session_db=None, metrics=False):
+    engine = data_file = None
+    if data:
+        data_file = DataFile(data)
+        engine = TravelEngine(data_file.load())
+    store = SQLiteSessionStore(session_db, ttl=ttl) if session_db else MemorySessionStore(ttl=ttl, max_sessions=max_sessions)
+    server = ChatServer(engine, store, data_file=data_file, metrics=Metrics() if metrics else None)
+    host, port = await server.start(host, port)
+    print(f"Wanderlust AI chat service on http://{host}:{port}")
+    await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless HTTP/JSON chat service for the travel bot.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--ttl", type=float, default=1800, help="Seconds before an idle session is dropped.")
+    parser.add_argument("--max-sessions", type=int, default=100000, help="Least recently used sessions beyond this are evicted.")
+    parser.add_argument("--data", help="Knowledge base file from travel_data.py build; reloaded when it changes.")
+    parser.add_argument("--session-db", help="SQLite file for sessions, shared by every worker (default: in memory).")
+    parser.add_argument("--metrics", action="store_true", help="Time every match_rule stage and serve GET /metrics.")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.ttl, args.max_sessions, args.data, args.session_db, args.metrics))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Conversation state storage for headless front ends (see travel_server.py).
+
+Every store maps a session ID to a TravelEngine state and drops sessions idle
+for longer than ``ttl``. MemorySessionStore lives in one process;
+SQLiteSessionStore persists to a database file any worker can open, so a
+conversation survives restarts and can continue on another replica.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def encode_state(state):
+    """Compact serialized form of an engine state, e.g. ``[null,{}]``."""
+    return json.dumps([state.get("state"), state.get("data", {})], separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decode_state(blob):
+    state, data = json.loads(blob)
+    return {"state": state, "data": data}
+
+
+class SessionStore:
+    """Interface of the session stores."""
+
+    ttl = 1800
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def __contains__(self, session_id):
+        return self.get(session_id) is not None
+
+    def get(self, session_id):
+        """Returns the stored state, or None if unknown or idle for longer than ``ttl``."""
+        raise NotImplementedError
+
+    def put(self, session_id, state):
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+    def expire(self):
+        """Drops every idle session and returns how many were removed."""
+        raise NotImplementedError
+
+    def flush(self):
+        """Writes out anything buffered; a no-op for stores that do not buffer."""
+
+    def close(self):
+        self.flush()
+
+
+class MemorySessionStore(SessionStore):
+    """In-memory session contexts with idle-TTL expiry and LRU eviction.
+
+    Entries are kept in least-recently-used order, so both expiry and
+    eviction only ever look at the oldest end of the dict.
+    """
+
+    def __init__(self, ttl=1800, max_sessions=10000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self._sessions = OrderedDict()  # session_id -> (last_seen, state)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id):
+        entry = self._sessions.get(session_id)
+        if entry is None: return None
+        if self.clock() - entry[0] > self.ttl:
+            del self._sessions[session_id]
+            return None
+        self._sessions.move_to_end(session_id)
+        return entry[1]
+
+    def put(self, session_id, state):
+        self._sessions[session_id] = (self.clock(), state)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def delete(self, session_id):
+        self._sessions.pop(session_id, None)
+
+    def expire(self):
+        cutoff = self.clock() - self.ttl
+        removed = 0
+        while self._sessions:
+            session_id, (last_seen, _) = next(iter(self._sessions.items()))
+            if last_seen >= cutoff: break
+            del self._sessions[session_id]
+            removed += 1
+        return removed
+
+
+class SQLiteSessionStore(SessionStore):
+    """Session contexts in an SQLite database shared by every worker.
+
+    Writes are cheap in three ways: a state is only written when its
+    serialized form changed (an unchanged session just has its last-seen time
+    refreshed, at most every ``ttl / 10`` seconds); writes are buffered and
+    committed together once ``batch_size`` are pending or the oldest is
+    ``max_delay`` seconds old (or on flush()); and the database runs in WAL
+    mode so readers in other processes never block on a writer.
+    """
+
+    def __init__(self, path, ttl=1800, batch_size=128, max_delay=0.25, clock=time.time, remembered=10000):
+        self.path = path
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.clock = clock  # Wall clock: last-seen times are compared across processes.
+        self.writes = 0  # Rows written, for benchmarks and tests.
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, state BLOB NOT NULL, seen REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_seen ON sessions (seen)")
+        self._pending = {}  # session_id -> (blob, seen); None blob = delete
+        self._oldest_pending = None
+        self._stored = OrderedDict()  # session_id -> (blob, seen) as last read or written
+        self._remembered = remembered
+
+    def __len__(self):
+        self.flush()
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions WHERE seen >= ?", (self.clock() - self.ttl,)).fetchone()[0]
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._pending.get(session_id)
+            if entry is None:
+                entry = self._db.execute("SELECT state, seen FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if entry is None or entry[0] is None: return None
+            blob, seen = entry
+            if self.clock() - seen > self.ttl:
+                self.delete(session_id)
+                return None
+            self._remember(session_id, bytes(blob), seen)
+            return decode_state(blob)
+
+    def put(self, session_id, state):
+        blob = encode_state(state)
+        now = self.clock()
+        with self._lock:
+            stored = self._stored.get(session_id)
+            if stored is not None and stored[0] == blob and now - stored[1] < self.ttl / 10: return
+            self._queue(session_id, blob, now)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._stored.pop(session_id, None)
+            self._queue(session_id, None, self.clock())
+
+    def expire(self):
+        self.flush()
+        with self._lock:
+            cutoff = self.clock() - self.ttl
+            self._stored.clear()
+            return self._db.execute("DELETE FROM sessions WHERE seen < ?", (cutoff,)).rowcount
+
+    def flush(self):
+        with self._lock:
+            if not self._pending: return
+            pending, self._pending, self._oldest_pending = self._pending, {}, None
+            upserts = [(session_id, blob, seen) for session_id, (blob, seen) in pending.items() if blob is not None]
+            deletes = [(session_id,) for session_id, (blob, _) in pending.items() if blob is None]
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany("INSERT INTO sessions (id, state, seen) VALUES (?, ?, ?) "
+                                     "ON CONFLICT(id) DO UPDATE SET state = excluded.state, seen = excluded.seen", upserts)
+                self._db.executemany("DELETE FROM sessions WHERE id = ?", deletes)
+            self.writes += len(pending)
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+    def _queue(self, session_id, blob, now):
+        self._pending[session_id] = (blob, now)
+        if blob is not None: self._remember(session_id, blob, now)
+        if self._oldest_pending is None: self._oldest_pending = now
+        if len(self._pending) >= self.batch_size or now - self._oldest_pending >= self.max_delay: self.flush()
+
+    def _remember(self, session_id, blob, seen):
+        self._stored[session_id] = (blob, seen)
+        self._stored.move_to_end(session_id)
+        if len(self._stored) > self._remembered: self._stored.popitem(last=False)
@@ -0,0 +1,225 @@
+"""Type-ahead suggestions for the chat input.
+
+    index = SuggestionIndex(get_knowledge_base())
+    index.suggest("currency in ja")  # [Suggestion('currency in Japan?', 'question', 'japan'), ...]
+
+A half-typed message is completed in two ways:
+- against QUESTION_TEMPLATES, the phrasings the rule stages answer, starting
+  at any word of a template ("currency in ja" -> "currency in Japan?"); a
+  country slot the user has not reached yet is filled with an example;
+- its last word against the country names (aliases and other languages'
+  forms included) and the attractions of the knowledge base ("tell me about
+  the colos" -> "tell me about the Colosseum (Italy)").
+
+Names are found through a sorted list of every word-suffix of every name, so
+the candidates for a fragment are one bisect away and a call stays well under
+a millisecond (see bench_travel_bot.py suggest). Matching ignores case and
+diacritics.
+"""
+import bisect
+import re
+
+from travel_engine import fold_diacritics
+
+QUESTION_TEMPLATES = (
+    "Create a travel package for {country}",
+    "Do I need a visa from {country} to {country}?",
+    "What is the currency in {country}?",
+    "Do I need to tip in {country}?",
+    "Best time to visit {country}?",
+    "What to visit in {country}?",
+    "What should I pack for {country}?",
+    "Suggest a beach trip",
+    "Suggest a mountain trip",
+    "Suggest a city trip",
+    "Suggest a budget trip",
+)
+
+SUGGESTION_LIMIT = 5
+MIN_FRAGMENT = 3  # Shorter endings ("to", "in") are only completed into names inside a template slot.
+NAME_WORDS = 3  # How many of the last words may be the start of one name.
+SHORT_FRAGMENT = 2  # Names for fragments up to this long are remembered: they match the most keys.
+SHORT_MEMO_SIZE = 4096
+
+_SLOT = "{country}"
+_SPACES = re.compile(r"\s+")
+
+
+class Suggestion:
+    """One completion: the whole text to put in the input box, what kind it is and the country it names."""
+
+    __slots__ = ("text", "kind", "country")
+
+    def __init__(self, text, kind, country=None):
+        self.text = text
+        self.kind = kind  # "question", "country" or "attraction"
+        self.country = country
+
+    def __repr__(self):
+        return f"Suggestion({self.text!r}, {self.kind!r}, {self.country!r})"
+
+    def as_dict(self):
+        return {"text": self.text, "kind": self.kind, "country": self.country}
+
+
+def display_name(name):
+    """``"usa"`` -> ``"USA"``, ``"united kingdom"`` -> ``"United Kingdom"``."""
+    return name.upper() if len(name) <= 3 else name.title()
+
+
+def _parts(template):
+    # "Visa from {country} to {country}?" -> ["Visa from ", None, " to ", None, "?"]; None is a country slot.
+    parts = []
+    for i, literal in enumerate(template.split(_SLOT)):
+        if i: parts.append(None)
+        if literal: parts.append(literal)
+    return parts
+
+
+class SuggestionIndex:
+    """Question templates plus a prefix index over the knowledge base's country names and attractions."""
+
+    __slots__ = ("kb", "templates", "examples", "names", "entries", "keys", "short")
+
+    def __init__(self, kb, templates=QUESTION_TEMPLATES):
+        self.kb = kb
+        self.templates = []
+        for parts in map(_parts, templates):
+            first = parts[0]
+            # A template may be typed from any of its first words on: "currency in ..." still matches.
+            starts = [0] if first is None else [0] + [i + 1 for i, char in enumerate(first[:-1]) if char == " "]
+            self.templates.append((parts, starts))
+        self.examples = list(kb.country_attractions)  # Fills the slots the user has not reached yet.
+        self.names = {fold_diacritics(name): country for name, country in kb.lexicon.names.items()}
+
+        # entries: (display, kind, country, rank); keys: (folded word-suffix, offset in the name, entry).
+        self.entries, keys = [], []
+        named = [(display_name(name), name, "country", country) for name, country in kb.lexicon.names.items()]
+        named += [(f"{sight} ({display_name(country)})", sight, "attraction", country)
+                  for country, sights in kb.country_attractions.items() for sight in sights]
+        for display, name, kind, country in named:
+            folded = fold_diacritics(name.lower())
+            entry = len(self.entries)
+            # Countries before attractions, a country's own name before its aliases and other languages' forms.
+            rank = 0 if name == country else 1 if kind == "country" else 2
+            self.entries.append((display, kind, country, rank))
+            keys += [(folded[i:], i, entry) for i in range(len(folded)) if i == 0 or folded[i - 1] == " "]
+        keys.sort()
+        self.keys = keys
+        self.short = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def suggest(self, text, limit=SUGGESTION_LIMIT):
+        """Up to ``limit`` Suggestions for ``text`` as typed so far, most specific first."""
+        typed = _SPACES.sub(" ", text.lstrip())
+        key = fold_diacritics(typed.lower())
+        if len(key) != len(typed): typed = key  # Keep the user's casing unless folding changed the length.
+
+        filled, named, started = [], [], []  # Template slots completed, names completed, template text completed.
+        for number, (parts, starts) in enumerate(self.templates):
+            for start in starts if key else starts[:1]:  # Nothing typed: whole templates only.
+                for cut, completion, country in self._match(parts, 0, start, key, 0, [], limit):
+                    group = filled if country is not None else started
+                    group.append((start > 0, number, Suggestion(typed[:cut] + completion, "question", country)))
+        filled.sort(key=lambda item: item[:2])
+        started.sort(key=lambda item: item[:2])
+
+        words = key.split(" ")
+        for count in range(min(len(words), NAME_WORDS), 0, -1):  # "united st" is tried before "st".
+            fragment = " ".join(words[-count:])
+            if not words[-1] or len(fragment) < MIN_FRAGMENT: continue
+            named = [Suggestion(typed[:len(key) - len(fragment)] + display, kind, country)
+                     for display, kind, country, _ in self._names_starting(fragment, limit)]
+            if named: break
+
+        suggestions, seen = [], {key.rstrip("? ")}
+        # Template text typed from its first word outranks names; a template matched from a later word does not.
+        ranked = filled + [item for item in started if not item[0]]
+        ranked = [item[2] for item in ranked] + named + [item[2] for item in started if item[0]]
+        for suggestion in ranked:
+            seen_key = fold_diacritics(suggestion.text.lower()).rstrip("? ")
+            if seen_key in seen: continue
+            seen.add(seen_key)
+            suggestions.append(suggestion)
+            if len(suggestions) == limit: break
+        return suggestions
+
+    def _match(self, parts, index, start, key, pos, used, limit):
+        """Completions of ``key[pos:]`` against ``parts[index:]``: ``[(cut, completion, country), ...]``.
+
+        The Suggestion text is ``typed[:cut] + completion``; country is the
+        slot the user was typing, or None while still inside template text.
+        """
+        rest = key[pos:]
+        if index == len(parts): return []  # Typed to the end of the template or past it.
+        part = parts[index]
+        if part is None:
+            found = []
+            # Still typing the country: complete its name, or offer examples when nothing is typed yet.
+            if rest:
+                candidates = [(display, country) for display, kind, country, offset in self._names_starting(rest, limit)
+                              if kind == "country" and not offset]
+            else:
+                candidates = [(display_name(country), country) for country in self.examples[:limit]]
+            for display, country in candidates:
+                found.append((pos, display + self._render(parts[index + 1:], used + [country]), country))
+            # Or a whole country name was typed and the template goes on after it.
+            for end in range(len(rest) - 1, 0, -1):
+                if rest[end] in " ?," and rest[:end] in self.names:
+                    found += self._match(parts, index + 1, 0, key, pos + end, used + [self.names[rest[:end]]], limit)
+                    break
+            return found
+
+        literal = part[start:]
+        if len(rest) < len(literal):
+            if not literal.lower().startswith(rest): return []
+            completion = literal[len(rest):] + self._render(parts[index + 1:], used)
+            return [(len(key), completion, used[-1] if used else None)]
+        if not rest.startswith(literal.lower()): return []
+        return self._match(parts, index + 1, 0, key, pos + len(literal), used, limit)
+
+    def _render(self, parts, used):
+        # Remaining template text, with example countries in the slots.
+        text = []
+        for part in parts:
+            if part is None:
+                country = next((c for c in self.examples if c not in used), "")
+                used = used + [country]
+                part = display_name(country)
+            text.append(part)
+        return "".join(text)
+
+    def _names_starting(self, fragment, limit):
+        """``[(display, kind, country, offset), ...]`` of names with a word starting with ``fragment``.
+
+        Names starting with it come before names with a later word matching,
+        countries before attractions, canonical names before aliases, then
+        shorter names; one name per country.
+        """
+        if len(fragment) <= SHORT_FRAGMENT:
+            names = self.short.get((fragment, limit))
+            if names is None:
+                names = self._scan(fragment, limit)
+                if len(self.short) < SHORT_MEMO_SIZE: self.short[fragment, limit] = names
+            return names
+        return self._scan(fragment, limit)
+
+    def _scan(self, fragment, limit):
+        keys, found = self.keys, []
+        i = bisect.bisect_left(keys, (fragment,))
+        while i < len(keys) and keys[i][0].startswith(fragment):
+            _, offset, entry = keys[i]
+            display, kind, country, rank = self.entries[entry]
+            found.append((offset > 0, rank, len(display), display, kind, country, offset))
+            i += 1
+        found.sort()
+        names, countries = [], set()
+        for *_, display, kind, country, offset in found:
+            if kind == "country":
+                if country in countries: continue
+                countries.add(country)
+            names.append((display, kind, country, offset))
+            if len(names) == limit: break
+        return names